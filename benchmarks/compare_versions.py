@@ -0,0 +1,81 @@
+"""
+Runs the concurrency benchmark against two versions of the API in the docker-compose stack.
+
+Each revision is checked out in a git worktree, and its backend-api image is built and started next to the core-db
+container, which both versions share. The same load is run against each of them, and every run is appended to the
+output file as one JSON line labelled with its revision, see concurrency.py.
+
+Usage:
+    python benchmarks/compare_versions.py --before <revision> --after HEAD --username <user> --password <password> \\
+        --duration 60 --concurrency 64 --output results.jsonl
+
+Requires git and docker compose. The user must exist in the database of the stack.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import concurrency  # noqa: E402
+
+PROJECT_NAME = 'sed-benchmark'     # docker compose project, so that the database volume is shared by the runs
+REPOSITORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def compose(worktree: str, *args: str):
+    subprocess.run(['docker', 'compose', '-p', PROJECT_NAME, '-f', 'docker-compose.yml', *args], cwd=worktree,
+                   check=True)
+
+
+def wait_until_up(url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f'{url}/docs', timeout=5).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(2)
+    raise TimeoutError(f'The API at {url} did not start within {timeout:.0f} s')
+
+
+def run_version(revision: str, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = os.path.join(tmp, 'tree')
+        subprocess.run(['git', 'worktree', 'add', '--detach', worktree, revision], cwd=REPOSITORY, check=True)
+        try:
+            compose(worktree, 'up', '-d', '--build', 'core-db', 'backend-api')
+            try:
+                wait_until_up(args.url, args.startup_timeout)
+                # Warms up the instance, so that both versions are measured in the same state
+                concurrency.run(argparse.Namespace(**{**vars(args), 'duration': args.warmup, 'output': None}))
+                concurrency.run(argparse.Namespace(**{**vars(args), 'label': revision}))
+            finally:
+                compose(worktree, 'rm', '--stop', '--force', 'backend-api')
+        finally:
+            subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=REPOSITORY, check=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrency benchmark of two versions in the docker-compose stack')
+    parser.add_argument('--before', required=True, help='Git revision of the version to compare against')
+    parser.add_argument('--after', default='HEAD', help='Git revision of the version to compare')
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run each version')
+    parser.add_argument('--warmup', type=float, default=10, help='Seconds to run before each measured run')
+    parser.add_argument('--concurrency', type=int, default=64, help='Number of concurrent clients')
+    parser.add_argument('--mix', default='me=4,projects=4,login=1', help='Weighted scenarios, name=weight,...')
+    parser.add_argument('--timeout', type=float, default=60, help='Request timeout in seconds')
+    parser.add_argument('--startup-timeout', type=float, default=300, help='Seconds to wait for the API to start')
+    parser.add_argument('--output', default='results.jsonl', help='File to append the results to')
+    cli_args = parser.parse_args()
+    for version in (cli_args.before, cli_args.after):
+        run_version(version, cli_args)
@@ -0,0 +1,129 @@
+"""
+Concurrency benchmark for a running API instance.
+
+Runs a mix of request types from many client threads at the same time and reports throughput and latency per type.
+Use it to compare execution models or pool settings under mixed load, e.g. cheap authenticated reads competing with
+password logins (bcrypt) and project listings (database).
+
+Usage:
+    python benchmarks/concurrency.py --url http://localhost:8000 --username <user> --password <password> \\
+        --duration 30 --concurrency 32 --mix me=4,projects=4,login=1 [--label before --output results.jsonl]
+
+With --output, the results are also appended to a file as one JSON line per run, so that runs against different
+versions or settings can be compared side by side.
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+
+def login(client: httpx.Client, args) -> httpx.Response:
+    return client.post('/api/core/auth/token', data={'username': args.username, 'password': args.password})
+
+
+def get_me(client: httpx.Client, args) -> httpx.Response:
+    return client.get('/api/core/users/me')
+
+
+def get_projects(client: httpx.Client, args) -> httpx.Response:
+    return client.get('/api/cvs/project/all', params={'limit': 50})
+
+
+SCENARIOS = {
+    'login': login,         # CPU bound (password hashing)
+    'me': get_me,           # Cheap, authenticated
+    'projects': get_projects,   # Database bound
+}
+
+
+def parse_mix(mix: str):
+    weights = {}
+    for part in mix.split(','):
+        name, weight = part.split('=')
+        if name not in SCENARIOS:
+            raise ValueError(f'Unknown scenario "{name}". Available: {", ".join(SCENARIOS)}')
+        weights[name] = int(weight)
+    return weights
+
+
+def run(args):
+    weights = parse_mix(args.mix)
+    names = list(weights.keys())
+
+    with httpx.Client(base_url=args.url) as client:
+        res = login(client, args)
+        res.raise_for_status()
+        token = res.json()['access_token']
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def worker():
+        with httpx.Client(base_url=args.url, headers={'Authorization': f'Bearer {token}'},
+                          timeout=args.timeout) as worker_client:
+            while time.monotonic() < deadline:
+                name = random.choices(names, weights=[weights[n] for n in names])[0]
+                start = time.perf_counter()
+                try:
+                    ok = SCENARIOS[name](worker_client, args).status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if ok:
+                        latencies[name].append(elapsed)
+                    else:
+                        errors[name] += 1
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.concurrency):
+            executor.submit(worker)
+    wall_time = time.monotonic() - started
+
+    print(f'{args.concurrency} clients, {wall_time:.1f} s, mix {args.mix}')
+    print(f'{"scenario":<10} {"ok":>7} {"errors":>7} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+    total = 0
+    scenarios = {}
+    for name in names:
+        values = sorted(latencies[name])
+        total += len(values)
+        scenarios[name] = {'ok': len(values), 'errors': errors[name]}
+        if len(values) == 0:
+            print(f'{name:<10} {0:>7} {errors[name]:>7}')
+            continue
+        quantiles = statistics.quantiles(values, n=100) if len(values) > 1 else [values[0]] * 99
+        scenarios[name].update({'rps': len(values) / wall_time, 'p50_ms': quantiles[49] * 1000,
+                                'p95_ms': quantiles[94] * 1000, 'p99_ms': quantiles[98] * 1000})
+        print(f'{name:<10} {len(values):>7} {errors[name]:>7} {len(values) / wall_time:>8.1f} '
+              f'{quantiles[49] * 1000:>8.1f} {quantiles[94] * 1000:>8.1f} {quantiles[98] * 1000:>8.1f}')
+    print(f'{"total":<10} {total:>7} {sum(errors.values()):>7} {total / wall_time:>8.1f}')
+
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps({'label': args.label, 'url': args.url, 'concurrency': args.concurrency,
+                                'duration': wall_time, 'mix': args.mix, 'rps': total / wall_time,
+                                'scenarios': scenarios}) + '\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mixed load concurrency benchmark')
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--concurrency', type=int, default=32, help='Number of concurrent clients')
+    parser.add_argument('--mix', default='me=4,projects=4,login=1', help='Weighted scenarios, name=weight,...')
+    parser.add_argument('--timeout', type=float, default=60, help='Request timeout in seconds')
+    parser.add_argument('--label', default='', help='Name of the run in the output file, e.g. the version tested')
+    parser.add_argument('--output', help='File to append the results to, as one JSON line per run')
+    run(parser.parse_args())
@@ -0,0 +1,78 @@
+"""
+JSON serialization benchmark.
+
+Serializes a simulation result the way FastAPI does for a route with a response model (validation against the
+response model, jsonable_encoder, stdlib json) and with FastJSONResponse (orjson, straight from the models), and
+reports the time and size per response.
+
+Usage:
+    python benchmarks/json_serialization.py --runs 10 --iterations 100 --time-steps 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sedbackend.apps.core.responses import FastJSONResponse, orjson  # noqa: E402
+from sedbackend.apps.cvs.simulation.models import Simulation, SimulationResult  # noqa: E402
+
+
+def simulation_result(runs: int, iterations: int, time_steps: int) -> SimulationResult:
+    def floats(n):
+        return [random.random() * 1e6 for _ in range(n)]
+
+    return SimulationResult(designs=[], vcss=[], vds=[], runs=[
+        Simulation(time=floats(time_steps), mean_NPV=floats(time_steps), max_NPVs=floats(iterations),
+                   mean_payback_time=1.5, all_npvs=[floats(time_steps) for _ in range(iterations)],
+                   payback_time=1.5, surplus_value_end_result=10.0, design_id=i, vcs_id=1)
+        for i in range(runs)
+    ])
+
+
+def fastapi_default(route: APIRoute, result: SimulationResult) -> bytes:
+    content = asyncio.run(serialize_response(field=route.secure_cloned_response_field, response_content=result,
+                                             is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def fast_json(route: APIRoute, result: SimulationResult) -> bytes:
+    return FastJSONResponse(result).body
+
+
+SCENARIOS = {
+    'response model + json': fastapi_default,
+    'FastJSONResponse': fast_json,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='Simulation runs (designs) in the result')
+    parser.add_argument('--iterations', type=int, default=100, help='Monte Carlo iterations per run')
+    parser.add_argument('--time-steps', type=int, default=200, help='Time steps per iteration')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    result = simulation_result(args.runs, args.iterations, args.time_steps)
+    route = APIRoute('/simulation', lambda: None, response_model=SimulationResult)
+    print(f'orjson: {"installed" if orjson is not None else "not installed, FastJSONResponse uses json"}')
+    print(f'{"path":<24} {"median (ms)":>12} {"size (MB)":>10}')
+    for name, scenario in SCENARIOS.items():
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            body = scenario(route, result)
+            times.append(time.perf_counter() - start)
+        print(f'{name:<24} {statistics.median(times) * 1000:>12.1f} {len(body) / 1e6:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
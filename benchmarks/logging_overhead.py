@@ -0,0 +1,94 @@
+"""
+Logging overhead benchmark.
+
+Measures what logging costs the thread that logs, in a loop shaped like the populate_* functions that log once per
+database row. Compares the previous setup (DEBUG level, f-strings, file handler in the request thread) with the
+queued setup from sedbackend.libs.logs at the default INFO level and at DEBUG level.
+
+Usage:
+    python benchmarks/logging_overhead.py --rows 100000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from logging.handlers import TimedRotatingFileHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sedbackend.libs.logs.config import configure_logging, TEXT_FORMAT  # noqa: E402
+
+logger = logging.getLogger('fastapi')
+
+
+def rows(n: int):
+    return [{'id': i, 'name': f'Value driver {i}', 'unit': 'kg', 'project': 1} for i in range(n)]
+
+
+def populate_fstring(db_rows):
+    for row in db_rows:
+        logger.debug(f'Populating value driver with: {row}')
+
+
+def populate_lazy(db_rows):
+    for row in db_rows:
+        logger.debug('Populating value driver with: %s', row)
+
+
+def file_handler(directory: str) -> logging.Handler:
+    return TimedRotatingFileHandler(os.path.join(directory, 'benchmark.log'), when='midnight', interval=1)
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def run_sync_debug(db_rows, directory):
+    handler = file_handler(directory)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.DEBUG)
+    start = time.perf_counter()
+    populate_fstring(db_rows)
+    return time.perf_counter() - start, None
+
+
+def run_queued(level):
+    def run(db_rows, directory):
+        listener = configure_logging([file_handler(directory)], level=level)
+        start = time.perf_counter()
+        populate_lazy(db_rows)
+        return time.perf_counter() - start, listener
+    return run
+
+
+SCENARIOS = {
+    'sync, DEBUG, f-string': run_sync_debug,
+    'queued, INFO, lazy': run_queued(logging.INFO),
+    'queued, DEBUG, lazy': run_queued(logging.DEBUG),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Rows to "populate" per scenario')
+    args = parser.parse_args()
+
+    db_rows = rows(args.rows)
+    print(f'{"scenario":<24} {"total (s)":>10} {"per row (us)":>13}')
+    for name, scenario in SCENARIOS.items():
+        with tempfile.TemporaryDirectory() as directory:
+            elapsed, listener = scenario(db_rows, directory)
+            if listener is not None:
+                listener.stop()     # Drain the queue before the next scenario, outside of the measurement
+            reset_root()
+        print(f'{name:<24} {elapsed:>10.3f} {elapsed / args.rows * 1e6:>13.2f}')
+
+
+if __name__ == '__main__':
+    main()
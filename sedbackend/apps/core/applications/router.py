@@ -14,7 +14,7 @@ router = APIRouter()
             description="Produces a list of applications in alphabetical order",
             response_model=List[Application],
             dependencies=[Security(verify_token)])
-async def get_apps() -> List[Application]:
+def get_apps() -> List[Application]:
     """
 
     :param segment_length: Sample size. Min=1.
@@ -29,5 +29,5 @@ async def get_apps() -> List[Application]:
             description="Produces a list of applications in alphabetical order",
             response_model=Application,
             dependencies=[Security(verify_token)])
-async def get_app(app_id: str) -> Application:
+def get_app(app_id: str) -> Application:
     return impl_get_app(app_id)
@@ -7,8 +7,9 @@ from passlib.context import CryptContext
 from sedbackend.apps.core.users.exceptions import UserNotFoundException, UserDisabledException
 from sedbackend.apps.core.authentication.models import UserAuth
 from sedbackend.apps.core.authentication.exceptions import InvalidCredentialsException
-from sedbackend.apps.core.authentication.storage import get_user_auth_only
+from sedbackend.apps.core.authentication.storage import get_user_auth_only, get_user_auth_only_async, user_auth_cache
 from sedbackend.apps.core.db import get_connection
+from sedbackend.apps.core.db_async import get_async_connection
 from sedbackend.env import Environment
 
 
@@ -62,6 +63,26 @@ def get_user_with_pwd_from_db(username: str) -> UserAuth:
         raise InvalidCredentialsException
 
 
+async def get_user_with_pwd_cached_async(username: str) -> UserAuth:
+    """
+    Same as get_user_with_pwd_from_db, but served from a short lived cache when possible.
+    Used when verifying tokens, which happens on every authenticated request, so it does not hold a worker thread
+    while waiting for the database.
+    :param username: Username
+    :return:
+    """
+    user = user_auth_cache.get(username)
+    if user is None:
+        try:
+            async with get_async_connection() as con:
+                user = await get_user_auth_only_async(con, username)
+        except UserNotFoundException:
+            raise InvalidCredentialsException
+        user_auth_cache.set(username, user)
+
+    return user.copy()
+
+
 def verify_password(plain_pwd, hashed_pwd):
     return pwd_context.verify(plain_pwd, hashed_pwd)
 
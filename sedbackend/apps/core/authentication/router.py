@@ -13,7 +13,7 @@ router = APIRouter()
 @router.post("/token",
              summary="Login using token",
              description="Login using Token")
-async def login_with_token(form_data: OAuth2PasswordRequestForm = Depends()):
+def login_with_token(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Authenticates the user when logging in by comparing hashed password values
     """
@@ -21,7 +21,7 @@ async def login_with_token(form_data: OAuth2PasswordRequestForm = Depends()):
 
 
 @router.get("/renew", dependencies=[Security(verify_token)])
-async def renew_token(current_user: User = Depends(get_current_active_user)) -> str:
+def renew_token(current_user: User = Depends(get_current_active_user)) -> str:
     """
     Renews an existing token. It takes an existing token, and returns a new one.
     :param current_user: User accessing this endpoint
@@ -31,7 +31,7 @@ async def renew_token(current_user: User = Depends(get_current_active_user)) ->
 
 
 @router.get("/sso_token", dependencies=[Security(verify_token)])
-async def get_sso_token(request: Request, current_user: User = Depends(get_current_active_user)) -> str:
+def get_sso_token(request: Request, current_user: User = Depends(get_current_active_user)) -> str:
     """
     Get SSO token (nonce). Only lasts for a few seconds.
     :param request: client request object
@@ -42,7 +42,7 @@ async def get_sso_token(request: Request, current_user: User = Depends(get_curre
 
 
 @router.post("/sso_token")
-async def resolve_sso_token(request: Request, nonce: str):
+def resolve_sso_token(request: Request, nonce: str):
     """
     Token for nonce trade. Turn in nonce within a limited time to retrieve an auth token
     :param request: client request object
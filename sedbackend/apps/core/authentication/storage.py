@@ -10,6 +10,12 @@ from mysqlsb.builder import MySQLStatementBuilder, FetchType
 
 from mysql.connector.pooling import PooledMySQLConnection
 
+from sedbackend.apps.core import db_async
+from sedbackend.libs.datastructures.cache import TTLCache
+
+USER_AUTH_CACHE_TTL = 30    # Seconds. Bounds how long other worker processes may use stale user records
+user_auth_cache = TTLCache(ttl=USER_AUTH_CACHE_TTL)
+
 
 def get_user_auth_only(connection, user_name: str) -> UserAuth:
     """
@@ -33,6 +39,28 @@ def get_user_auth_only(connection, user_name: str) -> UserAuth:
     return user
 
 
+async def get_user_auth_only_async(connection, user_name: str) -> UserAuth:
+    """
+    Same as get_user_auth_only, for async connections.
+    :param connection: Async MySQL connection
+    :param user_name: username
+    :return: UserAuth
+    """
+    user_data = await db_async.fetch_one(connection, "SELECT * FROM users WHERE username = %s", [user_name])
+
+    if user_data is None:
+        raise UserNotFoundException
+
+    return UserAuth(**user_data)
+
+
+def invalidate_cached_user_auth(user_id: int):
+    """
+    Removes the cached authentication record of a user. Needs to be called after every committed write to users.
+    """
+    user_auth_cache.invalidate_where(lambda user: user.id == user_id)
+
+
 def db_insert_sso_token(connetion: PooledMySQLConnection, user_id: int, ip: str) -> str:
     nonce = secrets.token_urlsafe()
     stmnt = MySQLStatementBuilder(connetion)
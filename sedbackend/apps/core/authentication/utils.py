@@ -1,3 +1,4 @@
+import time
 from typing import Optional
 
 from fastapi import Depends, status, HTTPException, Request
@@ -6,10 +7,14 @@ from fastapi.logger import logger
 from jose import JWTError, jwt
 from pydantic import ValidationError
 
-from sedbackend.apps.core.authentication.login import get_user_with_pwd_from_db, SECRET_KEY, ALGORITHM, pwd_context, \
+from sedbackend.apps.core.authentication.login import get_user_with_pwd_cached_async, SECRET_KEY, ALGORITHM, pwd_context, \
     parse_scopes_array
 from sedbackend.apps.core.authentication.models import TokenData
+from sedbackend.apps.core.authentication.exceptions import InvalidCredentialsException
 from sedbackend.apps.core.users.models import User
+from sedbackend.libs.datastructures.cache import TTLCache
+
+token_cache = TTLCache(ttl=0)  # Decoded tokens, each cached until it expires
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/api/core/auth/token",
@@ -28,14 +33,7 @@ async def verify_scopes(security_scopes: SecurityScopes, token: str = Depends(oa
     )
 
     try:
-        # The payload is a dict. It contains "sub" which is the username, "scopes", which is a list of scopes,
-        # and "exp" which is a timestamp representing the time when the token expires.
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]) # dict contains 'sub', wh
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_scopes = payload.get("scopes", [])
-        token_data = TokenData(scopes=token_scopes, username=username)
+        token_data = parse_jwt_token(token)
     except (JWTError, ValidationError):
         raise credentials_exception
 
@@ -80,9 +78,10 @@ async def verify_token(security_scopes: SecurityScopes, request: Request, token:
     except JWTError:
         raise credentials_exception
 
-    user = get_user_with_pwd_from_db(username=token_data.username)
-    # Requested user does not exist
-    if not user:
+    try:
+        user = await get_user_with_pwd_cached_async(username=token_data.username)
+    except InvalidCredentialsException:
+        # Requested user does not exist
         raise credentials_exception
 
     # Assert that the user has the scopes it claims it has
@@ -97,6 +96,15 @@ async def verify_token(security_scopes: SecurityScopes, request: Request, token:
 
 
 def parse_jwt_token(token) -> Optional[TokenData]:
+    """
+    Decodes and validates a token. Valid tokens are memoized until they expire, so each token is only decoded once.
+    """
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
+
+    # The payload is a dict. It contains "sub" which is the username, "scopes", which is a list of scopes,
+    # and "exp" which is a timestamp representing the time when the token expires.
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     username: str = payload.get("sub")
     if username is None:
@@ -105,6 +113,8 @@ def parse_jwt_token(token) -> Optional[TokenData]:
     token_exp = payload.get("exp")
 
     token_data = TokenData(scopes=token_scopes, username=username, expires=token_exp)
+    if token_exp:
+        token_cache.set(token, token_data, ttl=token_exp - time.time())
     return token_data
 
 
@@ -1,53 +1,342 @@
 from fastapi.logger import logger
 import mysql.connector
 from mysql.connector import errorcode, pooling
+from mysql.connector.errors import PoolError
+from pydantic import BaseModel
 from sedbackend.env import Environment
+from sedbackend.apps.core.query_stats import InstrumentedConnection
 
-from contextlib import contextmanager
+import itertools
+import re
+import threading
+import time
+from contextlib import contextmanager, ExitStack
+from typing import Dict, List, Optional
 
 
-connection_pool = None
+INTERACTIVE_POOL = 'interactive'    # Short requests made by users of the UI
+JOBS_POOL = 'jobs'                  # Long-running work, such as simulations and file imports
 
-user = 'rw'
+user = Environment.get_variable('MYSQL_USER', 'rw').strip()
 password = Environment.get_variable('MYSQL_PWD_RW')
-host = 'core-db'
-database = 'seddb'
-port = 3306
-
-try:
-    connection_pool = mysql.connector.pooling.MySQLConnectionPool(
-        user=user,
-        password=password,
-        host=host,
-        database=database,
-        port=port,
-        autocommit=False,
-        get_warnings=True,                      # Change for production environments (True in dev)
-        raise_on_warnings=True,                 # Change for production environments (True in dev)
-        pool_size=4,                            # Change for production environments (as few as possible in dev)
-        connection_timeout=10                   # Might want to increase this for production
-    )
-except mysql.connector.Error as err:
-    if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-        logger.error('Incorrect mysql credentials')
-    elif err.errno == errorcode.ER_BAD_DB_ERROR:
-        logger.error('DB could not be found')
-    elif err.errno == 2003:
-        logger.error('Incorrect database configuration')
-    else:
-        logger.debug('Unknown database error')
-
-    raise ValueError(f'Malfunctioning database configuration. {user}@{database} at Host: {host}:{port}')
+host = Environment.get_variable('MYSQL_HOST', 'core-db').strip()
+database = Environment.get_variable('MYSQL_DATABASE', 'seddb').strip()
+port = Environment.get_int('MYSQL_PORT', 3306)
+
+POOL_SIZE = Environment.get_int('DB_POOL_SIZE', 4)                              # As few as possible in dev
+JOBS_POOL_SIZE = Environment.get_int('DB_JOBS_POOL_SIZE', 2)
+JOBS_POOL_MAX_WAITING = Environment.get_int('DB_JOBS_POOL_MAX_WAITING', JOBS_POOL_SIZE)
+POOL_CHECKOUT_TIMEOUT = Environment.get_int('DB_POOL_CHECKOUT_TIMEOUT', 30)     # Seconds to wait for a connection
+CONNECTION_TIMEOUT = Environment.get_int('DB_CONNECTION_TIMEOUT', 10)           # Might want to increase in production
+RAISE_ON_WARNINGS = Environment.get_bool('DB_RAISE_ON_WARNINGS', True)          # Change for production environments
+SLOW_CHECKOUT_WARNING = 1                                                       # Seconds
+
+# Read replicas, as a comma separated list of host[:port]. Read-only connections are spread over healthy replicas.
+REPLICA_HOSTS = [h.strip() for h in Environment.get_variable('MYSQL_REPLICA_HOSTS', '').split(',') if h.strip()]
+REPLICA_POOL_SIZE = Environment.get_int('DB_REPLICA_POOL_SIZE', POOL_SIZE)
+REPLICA_JOBS_POOL_SIZE = Environment.get_int('DB_REPLICA_JOBS_POOL_SIZE', JOBS_POOL_SIZE)
+REPLICA_CHECKOUT_TIMEOUT = Environment.get_int('DB_REPLICA_CHECKOUT_TIMEOUT', 1)    # Then try the next one or primary
+REPLICA_HEALTH_CHECK_INTERVAL = Environment.get_int('DB_REPLICA_HEALTH_CHECK_INTERVAL', 10)    # Seconds
+REPLICA_MAX_LAG = Environment.get_int('DB_REPLICA_MAX_LAG', 5)    # Seconds behind the primary. 0 disables the check
+
+
+class PoolStats(BaseModel):
+    name: str
+    size: int
+    in_use: int = 0
+    checkouts: int = 0
+    waits: int = 0                      # Checkouts that had to wait for a free connection
+    rejected: int = 0                   # Checkouts that timed out or found too many others waiting
+    wait_time_total: float = 0          # Seconds
+    wait_time_max: float = 0
+    checkout_duration_total: float = 0  # Seconds connections were held
+    checkout_duration_max: float = 0
+    healthy: bool = True                # Replicas only. False while the replica is out of rotation
+
+
+def _create_mysql_pool(name: str, size: int, pool_host: str, pool_port: int) -> pooling.MySQLConnectionPool:
+    try:
+        return mysql.connector.pooling.MySQLConnectionPool(
+            pool_name='sed.' + re.sub(r'[^a-zA-Z0-9.:-]', '-', name),
+            user=user,
+            password=password,
+            host=pool_host,
+            database=database,
+            port=pool_port,
+            autocommit=False,
+            get_warnings=RAISE_ON_WARNINGS,
+            raise_on_warnings=RAISE_ON_WARNINGS,
+            pool_size=size,
+            connection_timeout=CONNECTION_TIMEOUT
+        )
+    except mysql.connector.Error as err:
+        if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+            logger.error('Incorrect mysql credentials')
+        elif err.errno == errorcode.ER_BAD_DB_ERROR:
+            logger.error('DB could not be found')
+        elif err.errno == 2003:
+            logger.error('Incorrect database configuration')
+        else:
+            logger.debug('Unknown database error')
+
+        raise ValueError(f'Malfunctioning database configuration. {user}@{database} at Host: {pool_host}:{pool_port}')
+
+
+class ConnectionPool:
+    """
+    A named MySQL connection pool. The connector pool raises immediately when it is exhausted, so checkouts are
+    queued here instead, and the time spent waiting for and holding connections is recorded.
+    """
+
+    def __init__(self, name: str, size: int, checkout_timeout: float, max_waiting: Optional[int] = None,
+                 pool_host: str = host, pool_port: int = port):
+        """
+        :param name: Pool name
+        :param size: Number of connections
+        :param checkout_timeout: Seconds to wait for a free connection
+        :param max_waiting: Checkouts allowed to wait at the same time. Further checkouts are rejected at once,
+            which bounds how many request threads the pool can tie up. None means no limit.
+        :param pool_host: Database host. The primary by default
+        :param pool_port: Database port
+        """
+        self.name = name
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.max_waiting = max_waiting
+        self._pool = _create_mysql_pool(name, size, pool_host, pool_port)
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._stats = PoolStats(name=name, size=size)
+
+    @contextmanager
+    def connection(self) -> pooling.PooledMySQLConnection:
+        self._acquire_slot()
+        try:
+            connection = self._pool.get_connection()
+        except Exception:
+            self._release_slot(0)
+            raise
+
+        checkout_start = time.monotonic()
+        try:
+            yield InstrumentedConnection(connection)
+        finally:
+            try:
+                connection.close()
+            finally:
+                self._release_slot(time.monotonic() - checkout_start)
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return self._stats.copy()
+
+    def _acquire_slot(self):
+        if self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats.in_use += 1
+                self._stats.checkouts += 1
+            return
+
+        with self._lock:
+            if self.max_waiting is not None and self._waiting >= self.max_waiting:
+                self._stats.rejected += 1
+                raise PoolError(f'Too many requests waiting for a connection from the {self.name} pool')
+            self._waiting += 1
+
+        wait_start = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.checkout_timeout)
+        waited = time.monotonic() - wait_start
+
+        with self._lock:
+            self._waiting -= 1
+            self._stats.waits += 1
+            self._stats.wait_time_total += waited
+            self._stats.wait_time_max = max(self._stats.wait_time_max, waited)
+            if acquired:
+                self._stats.in_use += 1
+                self._stats.checkouts += 1
+            else:
+                self._stats.rejected += 1
+
+        if not acquired:
+            logger.error(f'Timed out after {waited:.1f}s waiting for a connection from the {self.name} pool')
+            raise PoolError(f'Timed out waiting for a connection from the {self.name} pool')
+        if waited > SLOW_CHECKOUT_WARNING:
+            logger.warning(f'Waited {waited:.1f}s for a connection from the {self.name} pool')
+
+    def _release_slot(self, checkout_duration: float):
+        with self._lock:
+            self._stats.in_use -= 1
+            self._stats.checkout_duration_total += checkout_duration
+            self._stats.checkout_duration_max = max(self._stats.checkout_duration_max, checkout_duration)
+        self._slots.release()
+
+
+class Replica:
+    """
+    A read replica. It is taken out of rotation when a checkout or a health check fails. It has a pool for each of the
+    named pools, so that jobs reading from it cannot take the connections of interactive requests, and each pool is
+    created the first time it is used.
+    """
+
+    def __init__(self, address: str):
+        replica_host, _, replica_port = address.partition(':')
+        self.host = replica_host
+        self.port = int(replica_port) if replica_port else 3306
+        self.name = f'replica:{self.host}:{self.port}'
+        self.pools: Dict[str, ConnectionPool] = {}
+        self.down_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def pool_name(self, pool: str) -> str:
+        return f'{self.name}:{pool}'
+
+    def get_pool(self, pool: str) -> ConnectionPool:
+        with self._lock:
+            if pool not in self.pools:
+                if pool == JOBS_POOL:
+                    # Jobs do not wait for a busy replica, they wait for the jobs pool of the primary, which bounds
+                    # how many of them can wait at the same time
+                    self.pools[pool] = ConnectionPool(self.pool_name(pool), REPLICA_JOBS_POOL_SIZE,
+                                                      REPLICA_CHECKOUT_TIMEOUT, max_waiting=0,
+                                                      pool_host=self.host, pool_port=self.port)
+                else:
+                    self.pools[pool] = ConnectionPool(self.pool_name(pool), REPLICA_POOL_SIZE,
+                                                      REPLICA_CHECKOUT_TIMEOUT, pool_host=self.host,
+                                                      pool_port=self.port)
+            return self.pools[pool]
+
+    def mark_down(self, reason):
+        if self.healthy:
+            logger.warning(f'Taking {self.name} out of rotation: {reason}')
+        self.down_until = time.monotonic() + REPLICA_HEALTH_CHECK_INTERVAL
+
+    def check(self) -> bool:
+        """
+        Connects to the replica outside of its pool, and checks that it answers and is not lagging too far behind.
+        """
+        try:
+            connection = mysql.connector.connect(user=user, password=password, host=self.host, port=self.port,
+                                                 database=database, connection_timeout=CONNECTION_TIMEOUT)
+            try:
+                with connection.cursor(dictionary=True) as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchall()
+                    if REPLICA_MAX_LAG > 0:
+                        cursor.execute('SHOW REPLICA STATUS')
+                        status = cursor.fetchone()
+                        lag = status.get('Seconds_Behind_Source') if status is not None else None
+                        if lag is None or lag > REPLICA_MAX_LAG:
+                            self.mark_down(f'replication lag is {lag} seconds')
+                            return False
+            finally:
+                connection.close()
+        except Exception as err:
+            self.mark_down(err)
+            return False
+
+        if not self.healthy:
+            logger.info(f'{self.name} is back in rotation')
+        self.down_until = 0.0
+        return True
+
+
+pools: Dict[str, ConnectionPool] = {
+    INTERACTIVE_POOL: ConnectionPool(INTERACTIVE_POOL, POOL_SIZE, POOL_CHECKOUT_TIMEOUT),
+    JOBS_POOL: ConnectionPool(JOBS_POOL, JOBS_POOL_SIZE, POOL_CHECKOUT_TIMEOUT, max_waiting=JOBS_POOL_MAX_WAITING),
+}
+replicas: List[Replica] = [Replica(address) for address in REPLICA_HOSTS]
+_replica_turn = itertools.count()
 
 
 @contextmanager
-def get_connection() -> pooling.PooledMySQLConnection:
+def get_connection(pool: str = INTERACTIVE_POOL, read_only: bool = False) -> pooling.PooledMySQLConnection:
     """
     Returns a MySQL connection that can be used for read/write.
     Should be utilized through "get with resources" methodology.
+    Waits up to POOL_CHECKOUT_TIMEOUT seconds for a connection if all of them are in use.
+    :param pool: Name of the pool to take the connection from. Long-running work should use JOBS_POOL, so that it
+        cannot starve interactive requests.
+    :param read_only: The connection is only used for reading. It is taken from the pool of the same name of a read
+        replica when one is configured and healthy, and from the primary otherwise. Replicas may lag behind the
+        primary by up to REPLICA_MAX_LAG seconds, plus the time until the next health check.
     """
-    connection = connection_pool.get_connection()
-    try:
+    with ExitStack() as stack:
+        connection = _enter_replica_connection(stack, pool) if read_only and replicas else None
+        if connection is None:
+            connection = stack.enter_context(pools[pool].connection())
         yield connection
+
+
+@contextmanager
+def get_dedicated_connection() -> mysql.connector.MySQLConnection:
+    """
+    Opens a connection to the primary outside of the pools, for background jobs that hold it for a long time, e.g.
+    together with a named lock, so that they do not take a pooled connection away from other work.
+    The connection is closed on exit.
+    """
+    connection = mysql.connector.connect(user=user, password=password, host=host, port=port, database=database,
+                                         autocommit=False, get_warnings=RAISE_ON_WARNINGS,
+                                         raise_on_warnings=RAISE_ON_WARNINGS, connection_timeout=CONNECTION_TIMEOUT)
+    try:
+        yield InstrumentedConnection(connection)
     finally:
         connection.close()
+
+
+def _enter_replica_connection(stack: ExitStack, pool: str) -> Optional[pooling.PooledMySQLConnection]:
+    """
+    Checks out a connection from the given pool of the healthy replicas, in turn. Returns None if none of them can
+    provide one.
+    """
+    first = next(_replica_turn)
+    for i in range(len(replicas)):
+        replica = replicas[(first + i) % len(replicas)]
+        if not replica.healthy:
+            continue
+        try:
+            return stack.enter_context(replica.get_pool(pool).connection())
+        except PoolError:
+            continue    # Busy
+        except Exception as err:
+            replica.mark_down(err)
+    return None
+
+
+def check_replicas():
+    for replica in replicas:
+        replica.check()
+
+
+def start_replica_health_checks():
+    """
+    Checks the replicas in a background thread every REPLICA_HEALTH_CHECK_INTERVAL seconds.
+    Without it, replicas that fail are retried by requests after the same interval.
+    """
+    if not replicas:
+        return
+
+    def run():
+        while True:
+            check_replicas()
+            time.sleep(REPLICA_HEALTH_CHECK_INTERVAL)
+
+    threading.Thread(target=run, name='replica-health-checks', daemon=True).start()
+
+
+def get_pool_stats() -> List[PoolStats]:
+    stats = [pool.stats() for pool in pools.values()]
+    for replica in replicas:
+        for pool in pools:
+            replica_pool = replica.pools.get(pool)
+            replica_stats = replica_pool.stats() if replica_pool is not None \
+                else PoolStats(name=replica.pool_name(pool),
+                               size=REPLICA_JOBS_POOL_SIZE if pool == JOBS_POOL else REPLICA_POOL_SIZE)
+            replica_stats.healthy = replica.healthy
+            stats.append(replica_stats)
+    return stats
@@ -0,0 +1,108 @@
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Sequence
+
+import aiomysql
+
+from sedbackend.apps.core.db import user, password, host, database, port, POOL_SIZE
+from sedbackend.apps.core.query_stats import record_query
+
+
+ASYNC_POOL_SIZE = POOL_SIZE     # Connections per event loop. Shares the server's connection budget with the sync pool
+
+# aiomysql pools are bound to the event loop that created them. The server only runs one loop, but the test client
+# may run each request in a loop of its own, so pools are kept per loop and dropped together with it.
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiomysql.Pool]" = weakref.WeakKeyDictionary()
+_pool_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+async def get_async_pool() -> aiomysql.Pool:
+    """
+    Returns the connection pool of the running event loop. The pool is created on first use.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is not None:
+        return pool
+
+    lock = _pool_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        pool = _pools.get(loop)
+        if pool is None:
+            pool = await aiomysql.create_pool(
+                user=user,
+                password=password,
+                host=host,
+                db=database,
+                port=port,
+                # Reads only. Without autocommit, a SELECT leaves the connection in a transaction, and the pool closes
+                # connections that are released in one instead of reusing them
+                autocommit=True,
+                minsize=1,
+                maxsize=ASYNC_POOL_SIZE,
+                connect_timeout=10
+            )
+            _pools[loop] = pool
+    return pool
+
+
+async def close_async_pool():
+    """
+    Closes the connection pool of the running event loop, if there is one. Should be run on application shutdown.
+    """
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        pool.close()
+        await pool.wait_closed()
+
+
+@asynccontextmanager
+async def get_async_connection() -> aiomysql.Connection:
+    """
+    Returns a MySQL connection for use in async request handlers.
+    Should be utilized through "async with" methodology.
+    Waits for a free connection without blocking the event loop if all of them are in use.
+    """
+    pool = await get_async_pool()
+    async with pool.acquire() as connection:
+        yield connection
+
+
+async def fetch_one(connection: aiomysql.Connection, query: str,
+                    values: Optional[Sequence[Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Runs a query and returns the first row as a dictionary, or None if there are no rows.
+    Placeholders are written as %s, as for the sync connector.
+    """
+    async with connection.cursor(aiomysql.DictCursor) as cursor:
+        await _execute(cursor, query, values)
+        return await cursor.fetchone()
+
+
+async def fetch_all(connection: aiomysql.Connection, query: str,
+                    values: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Runs a query and returns all rows as dictionaries.
+    """
+    async with connection.cursor(aiomysql.DictCursor) as cursor:
+        await _execute(cursor, query, values)
+        return list(await cursor.fetchall())
+
+
+async def execute(connection: aiomysql.Connection, query: str, values: Optional[Sequence[Any]] = None) -> int:
+    """
+    Runs a statement and returns the number of affected rows. Connections autocommit, so it is committed when it
+    returns.
+    """
+    async with connection.cursor() as cursor:
+        return await _execute(cursor, query, values)
+
+
+async def _execute(cursor: aiomysql.Cursor, query: str, values: Optional[Sequence[Any]]) -> int:
+    start = time.perf_counter()
+    try:
+        return await cursor.execute(query, values)
+    finally:
+        record_query(query, time.perf_counter() - start)
@@ -5,7 +5,7 @@ from fastapi.logger import logger
 
 from sedbackend.apps.core.projects.dependencies import SubProjectAccessChecker
 from sedbackend.apps.core.projects.models import AccessLevel
-from sedbackend.apps.core.projects.implementation import impl_get_subproject_by_id
+from sedbackend.apps.core.projects.implementation import impl_get_subproject_access
 from sedbackend.apps.core.files.implementation import impl_get_file_mapped_subproject_id
 
 
@@ -22,5 +22,5 @@ class FileAccessChecker:
         subproject_id = impl_get_file_mapped_subproject_id(file_id)
 
         # Run subproject access check
-        subproject = impl_get_subproject_by_id(subproject_id)
-        return SubProjectAccessChecker.check_user_subproject_access(subproject, self.access_levels, user_id)
+        access = impl_get_subproject_access(user_id, subproject_id)
+        return SubProjectAccessChecker.check_user_subproject_access(access, self.access_levels, user_id)
@@ -1,5 +1,3 @@
-import os.path
-
 from fastapi import HTTPException, status
 from fastapi.logger import logger
 
@@ -18,7 +16,7 @@ def impl_save_file(file: models.StoredFilePost) -> models.StoredFileEntry:
             return res
     except exc.FileSizeException:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail="File is too big, and could not be saved."
         )
 
@@ -57,10 +55,10 @@ def impl_get_file_path(file_id: int, current_user_id: int) -> models.StoredFileP
             stored_file_path = storage.db_get_file_path(con, file_id, current_user_id)
 
             # If we get this far, then the file is registered in the database.
-            # We now need to assert that the file exists on disk.
-            if os.path.exists(stored_file_path.path) is False:
-                logger.error(f'File with id={file_id} at path="{stored_file_path.path}" '
-                             f'is not available on drive, but exists in the database.')
+            # We now need to assert that the file exists in storage.
+            if storage.stored_file_exists(stored_file_path) is False:
+                logger.error(f'File with id={file_id} at key="{stored_file_path.key}" '
+                             f'is not available in storage, but exists in the database.')
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="The file is missing from persistent storage."
@@ -74,6 +72,11 @@ def impl_get_file_path(file_id: int, current_user_id: int) -> models.StoredFileP
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="The requested file could not be found. It may have been deleted."
         )
+    except exc.PathMismatchException:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Path to file does not match internal path'
+        )
     except exc_auth.UnauthorizedOperationException:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -115,9 +118,14 @@ def impl_get_file(file_id: int, current_user_id: int):
 
 
 def impl_get_file_mapped_subproject_id(file_id):
+    subproject_id = storage.file_subproject_cache.get(file_id)
+    if subproject_id is not None:
+        return subproject_id
+
     try:
         with get_connection() as con:
             subproject_id = storage.db_get_file_mapped_subproject_id(con, file_id)
+            storage.file_subproject_cache.set(file_id, subproject_id)
             return subproject_id
     except exc.SubprojectMappingNotFound:
         raise HTTPException(
@@ -0,0 +1,103 @@
+"""
+Copies stored files from one storage backend to another, e.g. from the local upload directory to S3 before
+FILES_STORAGE_BACKEND is switched to s3. Files are addressed by the same keys in every backend, so the database is not
+changed.
+
+Content is copied several objects at a time, and large objects in parts. Objects that the destination has already, with
+the same size, are skipped, so the migration can be interrupted and run again, e.g. once while the application still
+writes to the source and once more after it is stopped. Nothing is deleted from the source.
+
+    python -m sedbackend.apps.core.files.migrate --source local --destination s3 [--workers 8]
+"""
+import argparse
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Tuple
+
+from fastapi.logger import logger
+
+import sedbackend.apps.core.files.models as models
+import sedbackend.apps.core.files.storage as storage
+from sedbackend.libs.objectstorage.backends import StorageBackend, StoredObject
+
+WORKERS = 8
+PROGRESS_INTERVAL = 30  # Seconds between progress reports
+_TEMP_SUFFIX = '.tmp'
+
+
+def migrate_files(source: StorageBackend, destination: StorageBackend, report: models.StorageMigrationReport,
+                  workers: int = WORKERS) -> models.StorageMigrationReport:
+    """
+    Copies all stored content of source to destination, workers objects at a time. Temporary files are not copied.
+    """
+    migration = _Migration(source, destination, report)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Dict[Future, StoredObject] = {}
+        for stored_object in source.list_objects():
+            if stored_object.key.startswith(storage.FILES_TMP_KEY_PREFIX) or stored_object.key.endswith(_TEMP_SUFFIX):
+                continue
+            pending[executor.submit(migration.copy, stored_object)] = stored_object
+            # Bounded, so that the listing does not run ahead of the copying with millions of objects
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                migration.collect((future, pending.pop(future)) for future in done)
+        wait(pending)
+        migration.collect(pending.items())
+
+    logger.info(f'File migration finished: {report}')
+    return report
+
+
+class _Migration:
+    def __init__(self, source: StorageBackend, destination: StorageBackend, report: models.StorageMigrationReport):
+        self.source = source
+        self.destination = destination
+        self.report = report
+        self.next_progress = time.monotonic() + PROGRESS_INTERVAL
+
+    def copy(self, stored_object: StoredObject) -> bool:
+        """
+        :return: Whether the object was copied, or skipped since the destination has it already
+        """
+        existing = self.destination.stat(stored_object.key)
+        if existing is not None and existing.size == stored_object.size:
+            return False
+        with self.source.open(stored_object.key) as f:
+            self.destination.upload(stored_object.key, f)
+        return True
+
+    def collect(self, done: Iterable[Tuple[Future, StoredObject]]):
+        for future, stored_object in done:
+            self.report.objects_checked += 1
+            try:
+                copied = future.result()
+            except Exception as e:
+                logger.error(f'Failed to copy "{stored_object.key}": {e}')
+                self.report.objects_failed += 1
+                continue
+            if copied:
+                self.report.objects_copied += 1
+                self.report.bytes_copied += stored_object.size
+            else:
+                self.report.objects_skipped += 1
+
+        if time.monotonic() >= self.next_progress:
+            logger.info(f'File migration in progress: {self.report}')
+            self.next_progress = time.monotonic() + PROGRESS_INTERVAL
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Copies stored files from one storage backend to another')
+    parser.add_argument('--source', default='local', help='Backend to copy from: local or s3')
+    parser.add_argument('--destination', default='s3', help='Backend to copy to: local or s3')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Objects copied at a time')
+    args = parser.parse_args()
+
+    if args.source == args.destination:
+        parser.error('The source and the destination must differ')
+
+    result = migrate_files(storage.create_storage_backend(args.source),
+                           storage.create_storage_backend(args.destination),
+                           models.StorageMigrationReport(source=args.source, destination=args.destination),
+                           args.workers)
+    print(result.json(indent=2))
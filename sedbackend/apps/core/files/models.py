@@ -43,16 +43,41 @@ class StoredFile(BaseModel):
     directory: str
     owner_id: int
     extension: str
+    hash: Optional[str] = None
 
 
 class StoredFilePath(BaseModel):
     id: int
     filename: str
-    path: str
+    key: str        # Of the content in the storage backend (storage.get_storage_backend)
     extension: str
+    hash: Optional[str] = None  # SHA-256 of the content. None for files stored before files were deduplicated
 
 
 class StoredFileReadout(BaseModel):
     id: int
     filename: str
     content: str
+
+
+class ReconciliationReport(BaseModel):
+    dry_run: bool
+    files_checked: int = 0
+    unused_files: int = 0           # Rows of files that no subproject or application uses any more
+    missing_files: int = 0          # Rows of files whose content is missing from storage
+    blobs_checked: int = 0
+    ref_counts_fixed: int = 0
+    unused_blobs: int = 0           # Blobs that no file references
+    disk_files_checked: int = 0
+    orphaned_disk_files: int = 0    # Content, pre-compressed responses and temporary files without a row
+    orphaned_bytes: int = 0
+
+
+class StorageMigrationReport(BaseModel):
+    source: str
+    destination: str
+    objects_checked: int = 0
+    objects_copied: int = 0
+    objects_skipped: int = 0        # The destination has them already
+    objects_failed: int = 0
+    bytes_copied: int = 0
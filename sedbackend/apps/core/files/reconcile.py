@@ -0,0 +1,434 @@
+"""
+Reconciliation of stored files with the database. Finds, and removes unless it is a dry run:
+- rows of files that nothing uses any more, because their subproject was deleted or because the application that owns
+  them no longer references them (see storage.register_file_references)
+- rows of files whose content is missing from storage
+- blob reference counts that do not match the files sharing the blob, and blobs that no file references
+- content in storage without a row: blobs, files stored before files were shared and pre-compressed responses, and
+  temporary files of uploads that never finished
+
+Rows and blobs are read in batches ordered by id and hash, and the content of the storage backend is listed in the same
+order, so that memory does not grow with the number of files. Storage operations are throttled to io_rate per second,
+so that the job leaves the disk, or the object store, to requests. Only files older than GRACE_PERIOD are considered, since content is written before
+the transaction that registers it commits. A database lock makes sure that only one process runs it at a time. The job
+runs on connections of its own, not from the pools, since it can take hours.
+
+Run it once:
+    python -m sedbackend.apps.core.files.reconcile [--apply] [--batch-size 1000] [--io-rate 200]
+or let the application run it every FILES_RECONCILE_INTERVAL seconds.
+"""
+import argparse
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from fastapi.logger import logger
+from mysql.connector.pooling import PooledMySQLConnection
+from mysqlsb import MySQLStatementBuilder
+
+import sedbackend.apps.core.files.exceptions as exc
+import sedbackend.apps.core.files.models as models
+import sedbackend.apps.core.files.storage as storage
+from sedbackend.apps.core import metrics
+from sedbackend.apps.core.db import get_dedicated_connection
+from sedbackend.apps.core.projects.storage import SUBPROJECTS_TABLE
+from sedbackend.env import Environment
+from sedbackend.libs.objectstorage.backends import StoredObject
+
+RECONCILE_INTERVAL = Environment.get_int('FILES_RECONCILE_INTERVAL', 0)     # Seconds between runs. 0 disables them
+RECONCILE_APPLY = Environment.get_bool('FILES_RECONCILE_APPLY', False)      # Remove what is found, not only report it
+BATCH_SIZE = Environment.get_int('FILES_RECONCILE_BATCH_SIZE', 1000)
+MAX_IO_RATE = Environment.get_int('FILES_RECONCILE_IO_RATE', 200)           # Storage operations per second
+GRACE_PERIOD = 3600     # Seconds
+LOCK_NAME = 'sed.files_reconcile'
+
+_HASH_PATTERN = re.compile('[0-9a-f]{64}')     # Blobs
+_UUID_PATTERN = re.compile('[0-9a-f]{32}')     # Files stored before files were shared
+_TEMP_SUFFIX = '.tmp'
+_LISTED_PER_OPERATION = 100    # Stored objects listed per throttled operation
+
+
+class _Throttle:
+    """
+    Spaces calls to wait() at least 1 / rate seconds apart
+    """
+
+    def __init__(self, rate: int):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next = time.monotonic()
+
+    def wait(self):
+        if self.interval == 0:
+            return
+        now = time.monotonic()
+        if self.next > now:
+            time.sleep(self.next - now)
+        self.next = max(self.next, now) + self.interval
+
+
+def run_reconciliation(apply: bool = False, batch_size: int = BATCH_SIZE, io_rate: int = MAX_IO_RATE) \
+        -> Optional[models.ReconciliationReport]:
+    """
+    Reconciles stored files with the database. Without apply, it is a dry run that only reports what it finds.
+    :return: What was found, or None if another process is running the reconciliation
+    """
+    # The lock belongs to the session, which only holds it, so that the work can commit and roll back as it goes
+    with get_dedicated_connection() as lock_con:
+        with lock_con.cursor() as cursor:
+            cursor.execute('SELECT GET_LOCK(%s, 0)', [LOCK_NAME])
+            if cursor.fetchone()[0] != 1:
+                logger.info('File reconciliation is already running in another process')
+                return None
+        try:
+            with get_dedicated_connection() as con, metrics.track_job('files_reconciliation'):
+                reconciler = _Reconciler(con, apply, batch_size, _Throttle(io_rate))
+                try:
+                    reconciler.check_blobs()
+                    reconciler.check_files()
+                    reconciler.check_disk()
+                finally:
+                    con.rollback()
+        finally:
+            with lock_con.cursor() as cursor:
+                cursor.execute('SELECT RELEASE_LOCK(%s)', [LOCK_NAME])
+                cursor.fetchall()
+
+    logger.info(f'File reconciliation finished: {reconciler.report}')
+    return reconciler.report
+
+
+def start_reconciliation():
+    """
+    Runs the reconciliation in a background thread every FILES_RECONCILE_INTERVAL seconds, if it is set. It removes
+    what it finds only if FILES_RECONCILE_APPLY is set.
+    """
+    if RECONCILE_INTERVAL <= 0:
+        return
+
+    def run():
+        while True:
+            time.sleep(RECONCILE_INTERVAL)
+            try:
+                run_reconciliation(apply=RECONCILE_APPLY)
+            except Exception:
+                logger.exception('File reconciliation failed')
+
+    threading.Thread(target=run, name='files-reconciliation', daemon=True).start()
+
+
+class _Reconciler:
+    def __init__(self, con: PooledMySQLConnection, apply: bool, batch_size: int, throttle: _Throttle):
+        self.con = con
+        self.apply = apply
+        self.batch_size = batch_size
+        self.throttle = throttle
+        self.report = models.ReconciliationReport(dry_run=not apply)
+        self.cutoff = time.time() - GRACE_PERIOD
+
+    # Blobs
+
+    def check_blobs(self):
+        """
+        Compares the reference count of each blob with the number of files that share it
+        """
+        last_hash = ''
+        while True:
+            with self.con.cursor(prepared=True) as cursor:
+                cursor.execute(f'SELECT b.hash, b.ref_count, COUNT(f.id) '
+                               f'FROM {storage.FILES_BLOBS_TABLE} b '
+                               f'LEFT JOIN {storage.FILES_TABLE} f ON (f.hash = b.hash) '
+                               f'WHERE b.hash > %s '
+                               f'GROUP BY b.hash, b.ref_count '
+                               f'ORDER BY b.hash LIMIT %s', [last_hash, self.batch_size])
+                rows = cursor.fetchall()
+            self.con.commit()   # Ends the snapshot, so that it does not hold back purging for the whole run
+            if len(rows) == 0:
+                return
+
+            last_hash = rows[-1][0]
+            self.report.blobs_checked += len(rows)
+            for digest, ref_count, file_count in rows:
+                if ref_count != file_count:
+                    self._fix_blob(digest)
+
+    def _fix_blob(self, digest: str):
+        with self.con.cursor(prepared=True) as cursor:
+            # Locking reads see the latest rows, and wait for files that are being stored with the blob
+            cursor.execute(f'SELECT ref_count FROM {storage.FILES_BLOBS_TABLE} WHERE hash = %s FOR UPDATE', [digest])
+            res = cursor.fetchall()
+            cursor.execute(f'SELECT COUNT(*) FROM {storage.FILES_TABLE} WHERE hash = %s FOR SHARE', [digest])
+            file_count = cursor.fetchone()[0]
+            if len(res) == 0 or res[0][0] == file_count:
+                self.con.commit()
+                return
+
+            if file_count == 0:
+                logger.info(f'{self._verb()} unused blob {digest}')
+                self.report.unused_blobs += 1
+                if self.apply:
+                    # Removed while the row is locked, like released blobs are, so that a file with the same
+                    # content that is stored meanwhile writes the blob again
+                    cursor.execute(f'DELETE FROM {storage.FILES_BLOBS_TABLE} WHERE hash = %s', [digest])
+                    self.throttle.wait()
+                    storage.remove_stored_file(storage.blob_key(digest))
+            else:
+                logger.info(f'{"Fixing" if self.apply else "Would fix"} reference count of blob {digest}: '
+                            f'{res[0][0]} instead of {file_count}')
+                self.report.ref_counts_fixed += 1
+                if self.apply:
+                    cursor.execute(f'UPDATE {storage.FILES_BLOBS_TABLE} SET ref_count = %s WHERE hash = %s',
+                                   [file_count, digest])
+        self.con.commit()
+
+    # Rows of files
+
+    def check_files(self):
+        """
+        Finds rows of files that are not used, or whose content is missing
+        """
+        last_id = 0
+        while True:
+            with self.con.cursor(prepared=True, dictionary=True) as cursor:
+                # The application of the subproject of each file, None if it has no subproject
+                cursor.execute(f'SELECT f.id, f.uuid, f.directory, f.hash, '
+                               f'(SELECT ps.application_sid FROM {storage.FILES_TO_SUBPROJECTS_MAP_TABLE} fsm '
+                               f'INNER JOIN {SUBPROJECTS_TABLE} ps ON (ps.id = fsm.subproject_id) '
+                               f'WHERE fsm.file_id = f.id LIMIT 1) AS application_sid '
+                               f'FROM {storage.FILES_TABLE} f '
+                               f'WHERE f.id > %s AND f.insert_timestamp < NOW() - INTERVAL %s SECOND '
+                               f'ORDER BY f.id LIMIT %s', [last_id, GRACE_PERIOD, self.batch_size])
+                rows = cursor.fetchall()
+            if len(rows) == 0:
+                self.con.commit()
+                return
+
+            last_id = rows[-1]['id']
+            referenced = self._referenced_file_ids(rows)
+            backend = storage.get_storage_backend()
+            for row in rows:
+                self.report.files_checked += 1
+                try:
+                    key = storage.file_key(row['directory'], row['uuid'])
+                except exc.PathMismatchException:
+                    logger.warning(f'File {row["id"]} is outside the upload directory, at "{row["directory"]}"')
+                    continue
+
+                if row['application_sid'] is None or \
+                        (row['application_sid'] in storage.FILE_REFERENCES and row['id'] not in referenced):
+                    logger.info(f'{self._verb()} unused file {row["id"]} at "{key}"')
+                    self.report.unused_files += 1
+                    self._delete_file_entry(row, key)
+                    continue
+
+                self.throttle.wait()
+                if not backend.exists(key):
+                    logger.warning(f'{self._verb()} file {row["id"]}, its content at "{key}" is missing')
+                    self.report.missing_files += 1
+                    self._delete_file_entry(row, key)
+            self.con.commit()
+
+    def _referenced_file_ids(self, rows: List[Dict]) -> Set[int]:
+        """
+        Ids of the files among rows that are referenced by the application that owns them
+        """
+        file_ids = defaultdict(list)
+        for row in rows:
+            if row['application_sid'] in storage.FILE_REFERENCES:
+                file_ids[row['application_sid']].append(row['id'])
+
+        referenced = set()
+        for application_sid, ids in file_ids.items():
+            for table, column in storage.FILE_REFERENCES[application_sid]:
+                with self.con.cursor(prepared=True) as cursor:
+                    cursor.execute(f'SELECT `{column}` FROM `{table}` '
+                                   f'WHERE `{column}` IN {MySQLStatementBuilder.placeholder_array(len(ids))}', ids)
+                    referenced.update(file_id for (file_id,) in cursor.fetchall())
+        return referenced
+
+    def _delete_file_entry(self, row: Dict, key: str):
+        if not self.apply:
+            return
+        self.throttle.wait()
+        storage.db_delete_file_entry(self.con, row['id'], key, row['hash'])
+
+    # Content in storage
+
+    def check_disk(self):
+        """
+        Finds content in storage that no row refers to
+        """
+        self._check_temp_files()
+
+        backend = storage.get_storage_backend()
+        blob_hashes = self._blob_hashes()
+        next_hash = next(blob_hashes, None)
+        blob_objects: List[StoredObject] = []     # Content of one blob: the blob and its pre-compressed response
+        legacy_objects: List[StoredObject] = []
+
+        def check_blob():
+            # Merged with the blobs in the database, which are in the same order
+            nonlocal next_hash
+            digest = _blob_hash(blob_objects[0].key)
+            while next_hash is not None and next_hash < digest:
+                next_hash = next(blob_hashes, None)
+            if next_hash != digest and self._remove_orphaned_blob(digest, blob_objects):
+                blob_objects.clear()
+                return
+            content_exists = any(obj.key == storage.blob_key(digest) for obj in blob_objects)
+            for obj in blob_objects:
+                if (obj.key != storage.blob_key(digest) and not content_exists) or obj.key.endswith(_TEMP_SUFFIX):
+                    self._remove_orphan(obj, backend.delete)
+                else:
+                    self.report.disk_files_checked += 1
+            blob_objects.clear()
+
+        for count, stored_object in enumerate(backend.list_objects()):
+            if count % _LISTED_PER_OPERATION == 0:
+                self.throttle.wait()
+            if stored_object.key.startswith(storage.FILES_TMP_KEY_PREFIX):
+                continue
+
+            digest = _blob_hash(stored_object.key)
+            if digest is not None:
+                # Listed by key, so the content of a blob is listed together, and blobs in the order of their hashes
+                if blob_objects and _blob_hash(blob_objects[0].key) != digest:
+                    check_blob()
+                blob_objects.append(stored_object)
+            elif '/' not in stored_object.key and _UUID_PATTERN.fullmatch(_base_name(stored_object.key)):
+                legacy_objects.append(stored_object)
+                if len(legacy_objects) >= self.batch_size:
+                    self._check_legacy_files(legacy_objects)
+                    legacy_objects = []
+
+        if blob_objects:
+            check_blob()
+        if legacy_objects:
+            self._check_legacy_files(legacy_objects)
+
+    def _remove_orphaned_blob(self, digest: str, objects: List[StoredObject]) -> bool:
+        """
+        Removes the content of a blob that had no row when the blobs were read, if it still has none
+        :return: Whether the blob still has no row. If it has one by now, its content is checked like that of the others
+        """
+        objects = [obj for obj in objects if obj.mtime <= self.cutoff]
+        if not objects:
+            return True     # Nothing old enough to remove
+
+        backend = storage.get_storage_backend()
+        with self.con.cursor(prepared=True) as cursor:
+            # The rows were read in an earlier snapshot, and a file with the same content may have been stored since.
+            # The locking read sees it, and otherwise locks the gap where its row would go, so that a file that is
+            # being stored with the blob waits until the content is removed, and then writes it again
+            lock = 'FOR UPDATE' if self.apply else ''
+            cursor.execute(f'SELECT hash FROM {storage.FILES_BLOBS_TABLE} WHERE hash = %s {lock}', [digest])
+            has_row = len(cursor.fetchall()) > 0
+            if not has_row:
+                for obj in objects:
+                    self._remove_orphan(obj, backend.delete)
+        self.con.commit()
+        return not has_row
+
+    def _blob_hashes(self) -> Iterator[str]:
+        last_hash = ''
+        while True:
+            with self.con.cursor(prepared=True) as cursor:
+                cursor.execute(f'SELECT hash FROM {storage.FILES_BLOBS_TABLE} WHERE hash > %s ORDER BY hash LIMIT %s',
+                               [last_hash, self.batch_size])
+                rows = cursor.fetchall()
+            self.con.commit()
+            if len(rows) == 0:
+                return
+            last_hash = rows[-1][0]
+            for (digest,) in rows:
+                yield digest
+
+    def _check_legacy_files(self, objects: List[StoredObject]):
+        """
+        Files stored before files were shared, directly in the upload directory and named by the uuid of their row
+        """
+        uuids = sorted({_base_name(obj.key) for obj in objects})
+        with self.con.cursor(prepared=True) as cursor:
+            cursor.execute(f'SELECT uuid FROM {storage.FILES_TABLE} '
+                           f'WHERE uuid IN {MySQLStatementBuilder.placeholder_array(len(uuids))}', uuids)
+            stored = {uuid for (uuid,) in cursor.fetchall()}
+        self.con.commit()
+
+        backend = storage.get_storage_backend()
+        for obj in objects:
+            if _base_name(obj.key) not in stored or obj.key.endswith(_TEMP_SUFFIX):
+                self._remove_orphan(obj, backend.delete)
+            else:
+                self.report.disk_files_checked += 1
+
+    def _check_temp_files(self):
+        """
+        Uploads are written to the temporary directory before they are stored, also with other backends than the
+        local one. Only the temporary files of the node that runs the job are found.
+        """
+        if not os.path.isdir(storage.FILES_TMP_DIR):
+            return
+        with os.scandir(storage.FILES_TMP_DIR) as entries:
+            for entry in entries:
+                self.throttle.wait()
+                if entry.is_file(follow_symlinks=False):
+                    try:
+                        stat_result = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    self._remove_orphan(StoredObject(entry.path, stat_result.st_size, stat_result.st_mtime),
+                                        os.remove)
+
+    def _remove_orphan(self, stored_object: StoredObject, remove: Callable[[str], None]):
+        if stored_object.mtime > self.cutoff:
+            return      # May belong to a transaction that has not committed yet
+
+        logger.info(f'{self._verb()} orphaned file "{stored_object.key}"')
+        self.report.orphaned_disk_files += 1
+        self.report.orphaned_bytes += stored_object.size
+        if self.apply:
+            self.throttle.wait()
+            try:
+                remove(stored_object.key)
+            except FileNotFoundError:
+                pass
+
+    def _verb(self) -> str:
+        return 'Removing' if self.apply else 'Would remove'
+
+
+def _base_name(name: str) -> str:
+    """
+    Name of the stored file that a file in the upload directory belongs to, e.g. its pre-compressed response
+    "<hash>.gz" belongs to "<hash>"
+    """
+    return name.split('.', 1)[0]
+
+
+def _blob_hash(key: str) -> Optional[str]:
+    """
+    Hash of the blob that the content at key belongs to, if it is in a blob directory ("ab/cd/<hash>...")
+    """
+    parts = key.split('/')
+    if len(parts) != 3:
+        return None
+    digest = _base_name(parts[2])
+    if _HASH_PATTERN.fullmatch(digest) and parts[0] == digest[0:2] and parts[1] == digest[2:4]:  # Keeps the order
+        return digest
+    return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reconciles stored files with the database')
+    parser.add_argument('--apply', action='store_true', help='Remove what is found. Without it, only report it')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows and files per batch')
+    parser.add_argument('--io-rate', type=int, default=MAX_IO_RATE,
+                        help='Storage operations per second, 0 for no limit')
+    args = parser.parse_args()
+
+    import sedbackend.main_router  # noqa: F401 Registers the file references of all applications
+
+    result = run_reconciliation(args.apply, args.batch_size, args.io_rate)
+    print(result.json(indent=2) if result is not None else 'File reconciliation is already running')
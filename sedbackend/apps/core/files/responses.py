@@ -0,0 +1,221 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+import sedbackend.apps.core.files.models as models
+import sedbackend.apps.core.files.storage as storage
+from sedbackend.libs.objectstorage.backends import StorageBackend, StoredObject
+
+# Stored files never change: a new upload is a new file, with a new id. Private, since downloads require access.
+CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRangeResponse(FileResponse):
+    """
+    A single byte range of a file, as 206 Partial Content. The range is inclusive, like the Range header.
+    """
+
+    def __init__(self, path: str, start: int, end: int, stat_result: os.stat_result, **kwargs):
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers['content-length'] = str(end - start + 1)
+        self.headers['content-range'] = f'bytes {start}-{end}/{stat_result.st_size}'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        async with await anyio.open_file(self.path, mode='rb') as file:
+            await file.seek(self.start)
+            remaining = self.end - self.start + 1
+            more_body = True
+            while more_body:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                more_body = remaining > 0 and len(chunk) > 0
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+        if self.background is not None:
+            await self.background()
+
+
+class StoredObjectResponse(StreamingResponse):
+    """
+    Content of a storage backend that does not keep it in the local filesystem, e.g. S3, streamed as it is read. A
+    byte range is sent as 206 Partial Content.
+    """
+
+    def __init__(self, backend: StorageBackend, stored_object: StoredObject, filename: Optional[str] = None,
+                 byte_range: Optional[Tuple[int, int]] = None, headers: Optional[Dict[str, str]] = None,
+                 media_type: Optional[str] = None):
+        start, end = byte_range if byte_range is not None else (0, stored_object.size - 1)
+        content = backend.iter_range(stored_object.key, start, end) if end >= start else iter([])
+        if media_type is None:
+            media_type = guess_type(filename or stored_object.key)[0] or 'text/plain'
+        super().__init__(content, status_code=206 if byte_range is not None else 200, headers=headers,
+                         media_type=media_type)
+        self.headers['content-length'] = str(end - start + 1)
+        if filename is not None:
+            self.headers['content-disposition'] = _content_disposition(filename)
+        if byte_range is not None:
+            self.headers['content-range'] = f'bytes {start}-{end}/{stored_object.size}'
+
+
+def stored_file_response(headers: Headers, stored_file_path: models.StoredFilePath) -> Response:
+    """
+    Response to a download of a stored file. Answers If-None-Match and If-Modified-Since with 304 Not Modified, and a
+    single byte range (Range, If-Range) with 206 Partial Content. Other requests get the whole file. Files in the local
+    filesystem are sent from there, others are streamed from the storage backend or, with
+    FILES_S3_PRESIGNED_DOWNLOADS, downloaded by the client from a presigned URL that it is redirected to.
+    """
+    backend = storage.get_storage_backend()
+    stored_object = backend.stat(stored_file_path.key)
+    if stored_object is None:
+        return Response(status_code=404)
+    etag = file_etag(stored_file_path, stored_object.mtime)
+    last_modified = formatdate(stored_object.mtime, usegmt=True)
+    response_headers = {'ETag': etag, 'Last-Modified': last_modified, 'Cache-Control': CACHE_CONTROL,
+                        'Accept-Ranges': 'bytes'}
+
+    if is_not_modified(headers, etag, stored_object.mtime):
+        return Response(status_code=304, headers=response_headers)
+
+    local_path = backend.local_path(stored_file_path.key)
+    if local_path is None and storage.FILES_S3_PRESIGNED_DOWNLOADS:
+        url = backend.presigned_url(stored_file_path.key, stored_file_path.filename, storage.FILES_S3_PRESIGN_EXPIRY)
+        if url is not None:
+            # The client sends its Range header again to the URL. The redirect itself expires with the URL.
+            return RedirectResponse(url, status_code=307, headers={'Cache-Control': 'private, no-store'})
+
+    byte_range = None
+    range_header = headers.get('range')
+    if range_header is not None and is_range_current(headers.get('if-range'), etag, stored_object.mtime):
+        try:
+            byte_range = parse_range(range_header, stored_object.size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**response_headers,
+                                                      'Content-Range': f'bytes */{stored_object.size}'})
+
+    if local_path is None:
+        return StoredObjectResponse(backend, stored_object, filename=stored_file_path.filename, byte_range=byte_range,
+                                    headers=response_headers)
+
+    stat_result = os.stat(local_path)
+    if byte_range is not None:
+        return FileRangeResponse(local_path, *byte_range, stat_result=stat_result, filename=stored_file_path.filename,
+                                 headers=response_headers)
+    return FileResponse(local_path, filename=stored_file_path.filename, stat_result=stat_result,
+                        headers=response_headers)
+
+
+def stored_content_response(key: str, media_type: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Response with the whole content at a key of the storage backend, e.g. a pre-compressed response body
+    """
+    backend = storage.get_storage_backend()
+    local_path = backend.local_path(key)
+    if local_path is not None:
+        return FileResponse(local_path, media_type=media_type, headers=headers)
+
+    stored_object = backend.stat(key)
+    if stored_object is None:
+        return Response(status_code=404)
+    return StoredObjectResponse(backend, stored_object, headers=headers, media_type=media_type)
+
+
+def file_etag(stored_file_path: models.StoredFilePath, mtime: float) -> str:
+    """
+    Strong ETag of a stored file: the hash of its content or, for files stored before files were hashed, its id and
+    modification time
+    """
+    if stored_file_path.hash is not None:
+        return f'"{stored_file_path.hash}"'
+    return f'"{stored_file_path.id}-{int(mtime)}"'
+
+
+def is_not_modified(headers: Headers, etag: str, mtime: float) -> bool:
+    """
+    Whether the client has the current version, by If-None-Match or, when that is absent, If-Modified-Since.
+    If-None-Match uses the weak comparison, so a tag made weak by compression still matches.
+    """
+    if_none_match = headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or any(_strip_weak(tag) == etag for tag in tags)
+
+    since = _parse_http_date(headers.get('if-modified-since'))
+    return since is not None and int(mtime) <= since
+
+
+def is_range_current(if_range: Optional[str], etag: str, mtime: float) -> bool:
+    """
+    Whether a range may be served: without If-Range always, otherwise only if it is the strong ETag or the exact
+    modification time of the file
+    """
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return _parse_http_date(if_range) == int(mtime)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a Range header of a single byte range into the first and last byte, e.g. "bytes=0-99" or "bytes=-100" (the
+    last 100 bytes). Returns None for headers that should be ignored, i.e. other units, several ranges and invalid
+    syntax, and raises RangeNotSatisfiable for ranges that start past the end of the file.
+    """
+    unit, _, byte_range = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in byte_range:
+        return None
+
+    first, sep, last = byte_range.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if first == '':
+            suffix_length = int(last)
+            if suffix_length <= 0 or size == 0:
+                raise RangeNotSatisfiable
+            return max(size - suffix_length, 0), size - 1
+        start = int(first)
+        end = int(last) if last != '' else None
+    except ValueError:
+        return None
+
+    if start < 0 or (end is not None and end < start):
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def _content_disposition(filename: str) -> str:
+    # Like FileResponse, so that files are named the same wherever they are stored
+    quoted_filename = quote(filename)
+    if quoted_filename != filename:
+        return f"attachment; filename*=utf-8''{quoted_filename}"
+    return f'attachment; filename="{filename}"'
+
+
+def _strip_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import FileResponse
 
 import sedbackend.apps.core.files.implementation as impl
+import sedbackend.apps.core.files.responses as responses
 from sedbackend.apps.core.files.dependencies import FileAccessChecker
 from sedbackend.apps.core.authentication.utils import get_current_active_user
 from sedbackend.apps.core.projects.models import AccessLevel
@@ -16,23 +17,20 @@ router = APIRouter()
              response_class=FileResponse,
              dependencies=[Depends(FileAccessChecker(AccessLevel.list_can_read()))]
              )
-async def get_file(file_id: int, current_user: User = Depends(get_current_active_user)):
+def get_file(file_id: int, request: Request, current_user: User = Depends(get_current_active_user)):
     """
-    Download an uploaded file
+    Download an uploaded file.
+    Supports conditional requests (If-None-Match, If-Modified-Since) and single byte ranges (Range, If-Range).
     """
     stored_file_path = impl.impl_get_file_path(file_id, current_user.id)
-    resp = FileResponse(
-        path=stored_file_path.path,
-        filename=stored_file_path.filename
-    )
-    return resp
+    return responses.stored_file_response(request.headers, stored_file_path)
 
 
 @router.delete("/{file_id}/delete",
                summary="Delete file",
                response_model=bool,
                dependencies=[Depends(FileAccessChecker(AccessLevel.list_are_admins()))])
-async def delete_file(file_id: int, current_user: User = Depends(get_current_active_user)):
+def delete_file(file_id: int, current_user: User = Depends(get_current_active_user)):
     """
     Delete a file. 
     Only accessible to admins and the owner of the file. 
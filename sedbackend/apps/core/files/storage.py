@@ -1,33 +1,137 @@
-import uuid
+import gzip
+import hashlib
+import io
 import shutil
+import uuid
+from typing import BinaryIO, Callable, Dict, IO, List, Optional, Tuple
 
+import magic
 from mysql.connector.pooling import PooledMySQLConnection
 from fastapi.logger import logger
 import os
 
 import sedbackend.apps.core.files.models as models
 import sedbackend.apps.core.files.exceptions as exc
-import sedbackend.apps.core.files.implementation as impl
 from mysqlsb import MySQLStatementBuilder, exclude_cols, FetchType
+from sedbackend.env import Environment
+from sedbackend.libs.datastructures.cache import TTLCache
+from sedbackend.libs.objectstorage.backends import LocalStorageBackend, StorageBackend
+from sedbackend.libs.objectstorage.s3 import S3StorageBackend
 
+# Files are addressed by their path relative to this directory (their key), wherever the storage backend keeps them.
+# Uploads are written to the temporary directory in it first, also with other backends.
 FILES_RELATIVE_UPLOAD_DIR = f'{os.path.abspath(os.sep)}sed_lab/uploaded_files/'
+FILES_TMP_KEY_PREFIX = 'tmp/'
+FILES_TMP_DIR = FILES_RELATIVE_UPLOAD_DIR + FILES_TMP_KEY_PREFIX
 FILES_TABLE = 'files'
+FILES_BLOBS_TABLE = 'files_blobs'
 FILES_TO_SUBPROJECTS_MAP_TABLE = 'files_subprojects_map'
-FILES_COLUMNS = ['id', 'temp', 'uuid', 'filename', 'insert_timestamp', 'directory', 'owner_id', 'extension']
+FILES_COLUMNS = ['id', 'temp', 'uuid', 'filename', 'insert_timestamp', 'directory', 'owner_id', 'extension', 'hash']
 FILES_TO_SUBPROJECTS_MAP_COLUMNS = ['id', 'file_id', 'subproject_id']
+PRECOMPRESSED_SUFFIX = '.gz'
+COPY_CHUNK_SIZE = 1024 * 1024
+MIME_SNIFF_SIZE = 8 * 1024
+MAX_FILE_SIZE = 100 * 10 ** 6  # 100MB
+
+# Where the content of files is kept: "local" (FILES_RELATIVE_UPLOAD_DIR) or "s3" (a bucket of an S3 compatible store,
+# so that several API nodes can share the files)
+FILES_STORAGE_BACKEND = Environment.get_variable('FILES_STORAGE_BACKEND', 'local').strip()
+# Send S3 downloads as a redirect to a presigned URL, valid for FILES_S3_PRESIGN_EXPIRY seconds, instead of streaming
+# them through the API
+FILES_S3_PRESIGNED_DOWNLOADS = Environment.get_bool('FILES_S3_PRESIGNED_DOWNLOADS', False)
+FILES_S3_PRESIGN_EXPIRY = Environment.get_int('FILES_S3_PRESIGN_EXPIRY', 300)
+
+# A file is mapped to a subproject when it is stored, and the mapping never changes. The TTL only bounds how long other
+# worker processes may remember files that were deleted.
+FILE_SUBPROJECT_CACHE_TTL = 600     # Seconds
+file_subproject_cache = TTLCache(ttl=FILE_SUBPROJECT_CACHE_TTL)
+
+# Columns that reference files, per application. The files of the subprojects of an application listed here are in use
+# only while one of them references them. The files of other applications are in use while they are mapped to a
+# subproject.
+FILE_REFERENCES: Dict[str, List[Tuple[str, str]]] = {}
+
+
+_storage_backend: Optional[StorageBackend] = None
+
+
+def get_storage_backend() -> StorageBackend:
+    """
+    The storage backend configured by FILES_STORAGE_BACKEND
+    """
+    global _storage_backend
+    if _storage_backend is None:
+        _storage_backend = create_storage_backend(FILES_STORAGE_BACKEND)
+    return _storage_backend
+
+
+def create_storage_backend(name: str) -> StorageBackend:
+    """
+    Creates a storage backend by name. The S3 backend is configured by FILES_S3_BUCKET, and optionally
+    FILES_S3_ENDPOINT_URL (e.g. http://localhost:9000 for a local MinIO), FILES_S3_REGION, FILES_S3_ACCESS_KEY,
+    FILES_S3_SECRET_KEY and FILES_S3_MAX_CONCURRENCY (parts uploaded at a time).
+    """
+    if name == 'local':
+        return LocalStorageBackend(FILES_RELATIVE_UPLOAD_DIR)
+    if name == 's3':
+        return S3StorageBackend(Environment.get_variable('FILES_S3_BUCKET').strip(),
+                                endpoint_url=_optional_variable('FILES_S3_ENDPOINT_URL'),
+                                region=_optional_variable('FILES_S3_REGION'),
+                                access_key=_optional_variable('FILES_S3_ACCESS_KEY'),
+                                secret_key=_optional_variable('FILES_S3_SECRET_KEY'),
+                                max_concurrency=Environment.get_int('FILES_S3_MAX_CONCURRENCY', 4))
+    raise ValueError(f'Unknown storage backend "{name}"')
+
+
+def _optional_variable(var_name: str) -> Optional[str]:
+    return Environment.get_variable(var_name, '').strip() or None
+
+
+def register_file_references(application_sid: str, table: str, column: str):
+    """
+    Registers a column of an application table that holds file ids, so that the files that no row references any more
+    are found by the reconciliation job (sedbackend.apps.core.files.reconcile)
+    """
+    references = FILE_REFERENCES.setdefault(application_sid, [])
+    if (table, column) not in references:
+        references.append((table, column))
+
+
+def db_save_file(con: PooledMySQLConnection, file: models.StoredFilePost, max_size: Optional[int] = MAX_FILE_SIZE) \
+        -> models.StoredFileEntry:
+    # Store file content in storage. Files with the same content share one blob, named by its hash
+    tmp_path, digest, size = write_temp_file(file.file_object, max_size)
+    return db_insert_file(con, tmp_path, digest, size, file.filename, file.extension, file.owner_id,
+                          file.subproject_id)
 
 
-def db_save_file(con: PooledMySQLConnection, file: models.StoredFilePost) -> models.StoredFileEntry:
-    # Store file in filesystem
-    filename_uuid = uuid.uuid4().hex
-    path = FILES_RELATIVE_UPLOAD_DIR+filename_uuid
-    with open(path, 'wb') as buffer:
-        shutil.copyfileobj(file.file_object, buffer)
+def db_save_generated_file(con: PooledMySQLConnection, filename: str, owner_id: int, subproject_id: int,
+                           write_content: Callable[[IO], None], encoding: Optional[str] = None) \
+        -> models.StoredFileEntry:
+    """
+    Stores content generated by the backend, e.g. simulation results, without the checks that uploads go through.
+    write_content is given a file to write the content to, which hashes it on the way to the upload directory, so
+    that the content is written once, without intermediate copies.
+    :param filename: Name of the file, with extension
+    :param write_content: Writes the content, e.g. lambda f: dataframe.to_json(f)
+    :param encoding: If given, write_content is given a text file that encodes with it. Otherwise, a binary file.
+    """
+    tmp_path, digest, size = write_temp_content(write_content, encoding=encoding)
+    return db_insert_file(con, tmp_path, digest, size, filename, os.path.splitext(filename)[1], owner_id,
+                          subproject_id)
+
+
+def db_insert_file(con: PooledMySQLConnection, tmp_path: str, digest: str, size: int, filename: str, extension: str,
+                   owner_id: int, subproject_id: int) -> models.StoredFileEntry:
+    """
+    Stores the content of a temporary file written by write_temp_content as a file of a subproject
+    """
+    directory = db_store_blob(con, tmp_path, digest, size)
 
     # Store reference to file in database
     insert_stmnt = MySQLStatementBuilder(con)
     insert_stmnt.insert(FILES_TABLE, exclude_cols(FILES_COLUMNS, ['id', 'insert_timestamp']))\
-        .set_values([True, filename_uuid, file.filename, FILES_RELATIVE_UPLOAD_DIR, file.owner_id, file.extension])\
+        .set_values([True, digest, filename, directory, owner_id, extension, digest])\
         .execute()
 
     file_id = insert_stmnt.last_insert_id
@@ -35,33 +139,259 @@ def db_save_file(con: PooledMySQLConnection, file: models.StoredFilePost) -> mod
     # Store mapping between file id and subproject id in database
     insert_mapping_stmnt = MySQLStatementBuilder(con)
     insert_mapping_stmnt.insert(FILES_TO_SUBPROJECTS_MAP_TABLE, ['file_id', 'subproject_id'])\
-        .set_values([file_id, file.subproject_id])\
+        .set_values([file_id, subproject_id])\
         .execute()
 
-    return db_get_file_entry(con, file_id, file.owner_id)
+    return db_get_file_entry(con, file_id, owner_id)
 
 
 def db_delete_file(con: PooledMySQLConnection, file_id: int, current_user_id: int) -> bool:
-    stored_file_path = impl.impl_get_file_path(file_id, current_user_id)
-    
-    if os.path.commonpath([FILES_RELATIVE_UPLOAD_DIR]) != os.path.commonpath([FILES_RELATIVE_UPLOAD_DIR, os.path.abspath(stored_file_path.path)]):
-        raise exc.PathMismatchException
-        
+    # Content that is missing from storage does not prevent the file from being deleted
+    stored_file_path = db_get_file_path(con, file_id, current_user_id)
+
     try:
-        delete_stmnt = MySQLStatementBuilder(con)
-        delete_stmnt.delete(FILES_TABLE) \
-            .where('id=?', [file_id]) \
-            .execute(fetch_type=FetchType.FETCH_NONE)
-        os.remove(stored_file_path.path)
-            
+        db_delete_file_entry(con, file_id, stored_file_path.key, stored_file_path.hash)
     except Exception:
-        logger.error(f'Unexpected error when deleting file from database or filesystem. '
-                     f'id = {file_id}, path = \"{stored_file_path.path}\"')
+        logger.error(f'Unexpected error when deleting file from database or storage. '
+                     f'id = {file_id}, key = \"{stored_file_path.key}\"')
         raise exc.FileNotDeletedException
 
     return True
 
 
+def db_delete_file_entry(con: PooledMySQLConnection, file_id: int, key: str, digest: Optional[str]):
+    """
+    Deletes the row of a file, and its content unless other files share it. Rows that reference the file, e.g. the DSM
+    of a VCS, are deleted with it.
+    """
+    delete_stmnt = MySQLStatementBuilder(con)
+    delete_stmnt.delete(FILES_TABLE) \
+        .where('id=?', [file_id]) \
+        .execute(fetch_type=FetchType.FETCH_NONE)
+    file_subproject_cache.invalidate(file_id)
+    if digest is None:
+        # Stored before files were shared
+        con.after_commit(lambda: _remove_after_commit(key))
+    else:
+        db_release_blob(con, digest)
+
+
+def blob_directory(digest: str) -> str:
+    """
+    Directory of the blob with the given SHA-256 hash, as stored in the database. Blobs are spread over two levels of
+    256 directories each, so that no directory grows too large.
+    """
+    return f'{FILES_RELATIVE_UPLOAD_DIR}{blob_key(digest)[:6]}'
+
+
+def blob_key(digest: str) -> str:
+    return f'{digest[0:2]}/{digest[2:4]}/{digest}'
+
+
+def file_key(directory: str, file_uuid: str) -> str:
+    """
+    Key of a file in the storage backend: its path relative to the upload directory
+    """
+    path = os.path.abspath(directory + file_uuid)
+    if os.path.commonpath([FILES_RELATIVE_UPLOAD_DIR]) != os.path.commonpath([FILES_RELATIVE_UPLOAD_DIR, path]):
+        raise exc.PathMismatchException
+    return os.path.relpath(path, FILES_RELATIVE_UPLOAD_DIR).replace(os.sep, '/')
+
+
+def check_upload(file_object: BinaryIO, max_size: Optional[int] = None) -> str:
+    """
+    Checks the size of an uploaded file and detects its type without reading all of it. The size is taken from the end
+    of the file, which Starlette has spooled already, and the type is detected from the first MIME_SNIFF_SIZE bytes,
+    cut at the last line break so that a text file is not judged by a partial character. The file is left at its start.
+    :return: Type of the file, as described by libmagic, e.g. "CSV text"
+    """
+    file_object.seek(0, os.SEEK_END)
+    if max_size is not None and file_object.tell() > max_size:
+        raise exc.FileSizeException
+    file_object.seek(0)
+    head = file_object.read(MIME_SNIFF_SIZE)
+    file_object.seek(0)
+    if len(head) == MIME_SNIFF_SIZE and b'\n' in head:
+        head = head[:head.rindex(b'\n') + 1]
+    return magic.from_buffer(head)
+
+
+class _HashingWriter(io.RawIOBase):
+    """
+    Writes to a file, and hashes and counts what is written on the way. Raises FileSizeException, before writing, when
+    more than max_size bytes are written.
+    """
+
+    def __init__(self, file: BinaryIO, max_size: Optional[int] = None):
+        super().__init__()
+        self.file = file
+        self.max_size = max_size
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise exc.FileSizeException
+        self.sha256.update(data)
+        self.file.write(data)
+        return len(data)
+
+
+def write_temp_file(file_object: BinaryIO, max_size: Optional[int] = None) -> Tuple[str, str, int]:
+    """
+    Copies a file object to a temporary file in the upload directory and hashes it on the way. Stops as soon as more
+    than max_size bytes have been read, if given, and removes what was written.
+    :return: Path of the temporary file, SHA-256 hash of the content and size in bytes
+    """
+    return write_temp_content(lambda f: shutil.copyfileobj(file_object, f, COPY_CHUNK_SIZE), max_size=max_size)
+
+
+def write_temp_content(write_content: Callable[[IO], None], encoding: Optional[str] = None,
+                       max_size: Optional[int] = None) -> Tuple[str, str, int]:
+    """
+    Writes content to a temporary file in the upload directory and hashes it on the way. The temporary file is removed
+    if write_content raises. With the S3 backend it is uploaded from there, in parts, when it is stored.
+    :param write_content: Writes the content to the file it is given
+    :param encoding: If given, write_content is given a text file that encodes with it. Otherwise, a binary file.
+    :param max_size: Bytes. More raises FileSizeException
+    :return: Path of the temporary file, SHA-256 hash of the content and size in bytes
+    """
+    os.makedirs(FILES_TMP_DIR, exist_ok=True)
+    tmp_path = FILES_TMP_DIR + uuid.uuid4().hex
+    try:
+        with open(tmp_path, 'wb') as buffer:
+            writer = _HashingWriter(buffer, max_size)
+            if encoding is None:
+                write_content(writer)
+            else:
+                text_file = io.TextIOWrapper(io.BufferedWriter(writer, COPY_CHUNK_SIZE), encoding=encoding, newline='')
+                write_content(text_file)
+                text_file.flush()
+                text_file.detach()
+    except BaseException:
+        remove_temp_file(tmp_path)
+        raise
+    return tmp_path, writer.sha256.hexdigest(), writer.size
+
+
+def db_store_blob(con: PooledMySQLConnection, tmp_path: str, digest: str, size: int) -> str:
+    """
+    Adds a reference to the blob with the given hash. If the blob is new, the temporary file is stored as the blob,
+    otherwise it is removed.
+    :return: Directory of the blob
+    """
+    key = blob_key(digest)
+    try:
+        # Locks the blob row until the transaction ends, so that a concurrent removal of the last reference
+        # (db_release_blob) either happens before, and the blob is written again below, or waits for this one
+        with con.cursor(prepared=True) as cursor:
+            cursor.execute(f'INSERT INTO {FILES_BLOBS_TABLE} (hash, size, ref_count) VALUES (%s, %s, 1) '
+                           f'ON DUPLICATE KEY UPDATE ref_count = ref_count + 1', [digest, size])
+        backend = get_storage_backend()
+        if backend.exists(key):
+            os.remove(tmp_path)
+        else:
+            backend.store(key, tmp_path)
+    except BaseException:
+        remove_temp_file(tmp_path)
+        raise
+    return blob_directory(digest)
+
+
+def db_release_blob(con: PooledMySQLConnection, digest: str):
+    """
+    Removes a reference to the blob with the given hash, and the blob itself once nothing references it. The content
+    is removed after the transaction commits, so that it is kept if the transaction rolls back.
+    """
+    with con.cursor(prepared=True) as cursor:
+        cursor.execute(f'UPDATE {FILES_BLOBS_TABLE} SET ref_count = ref_count - 1 WHERE hash = %s AND ref_count > 0',
+                       [digest])
+        cursor.execute(f'SELECT ref_count FROM {FILES_BLOBS_TABLE} WHERE hash = %s', [digest])
+        res = cursor.fetchall()
+        if len(res) and res[0][0] > 0:
+            return
+        cursor.execute(f'DELETE FROM {FILES_BLOBS_TABLE} WHERE hash = %s', [digest])
+    con.after_commit(lambda: _remove_released_blob(con, digest))
+
+
+def _remove_released_blob(con: PooledMySQLConnection, digest: str):
+    """
+    Removes the content of a blob whose row was deleted, unless a file with the same content has been stored since
+    """
+    try:
+        with con.cursor(prepared=True) as cursor:
+            # The locking read sees a row stored meanwhile, and otherwise locks the gap where it would go, so that a
+            # file that is being stored with the blob waits until the content is removed, and then writes it again
+            cursor.execute(f'SELECT hash FROM {FILES_BLOBS_TABLE} WHERE hash = %s FOR UPDATE', [digest])
+            if len(cursor.fetchall()) == 0:
+                remove_stored_file(blob_key(digest))
+        con.commit()
+    except Exception:
+        con.rollback()
+        logger.exception(f'Could not remove the content of blob {digest}. It is left to the reconciliation')
+
+
+def _remove_after_commit(key: str):
+    try:
+        remove_stored_file(key)
+    except Exception:
+        logger.exception(f'Could not remove the content at "{key}". It is left to the reconciliation')
+
+
+def remove_stored_file(key: str):
+    """
+    Removes the content of a stored file and its pre-compressed response body, if they exist
+    """
+    backend = get_storage_backend()
+    backend.delete(key)
+    backend.delete(key + PRECOMPRESSED_SUFFIX)
+
+
+def remove_temp_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def open_stored_file(stored_file_path: models.StoredFilePath) -> BinaryIO:
+    """
+    Opens the content of a stored file for reading, wherever it is stored
+    """
+    try:
+        return get_storage_backend().open(stored_file_path.key)
+    except FileNotFoundError:
+        raise exc.FileNotFoundException('File content not found in storage')
+
+
+def stored_file_exists(stored_file_path: models.StoredFilePath) -> bool:
+    return get_storage_backend().exists(stored_file_path.key)
+
+
+def save_precompressed(key: str, content: bytes, level: int = 9) -> str:
+    """
+    Stores a gzip compressed response body next to a stored file, so that it can be served to clients that accept
+    gzip without being generated and compressed on every request. It is deleted together with the file.
+    :param key: Key of the stored file
+    :param content: Uncompressed response body
+    :param level: Compression level. The file is compressed once, so the default is the smallest output
+    :return: Key of the compressed response body
+    """
+    precompressed_key = key + PRECOMPRESSED_SUFFIX
+    get_storage_backend().put_bytes(precompressed_key, gzip.compress(content, compresslevel=level, mtime=0))
+    return precompressed_key
+
+
+def get_precompressed_key(key: str) -> Optional[str]:
+    """
+    Key of the pre-compressed response body of a stored file, or None if there is none
+    """
+    precompressed_key = key + PRECOMPRESSED_SUFFIX
+    return precompressed_key if get_storage_backend().exists(precompressed_key) else None
+
+
 def db_get_file_entry(con: PooledMySQLConnection, file_id: int, current_user_id: int) -> models.StoredFileEntry:
     res_dict = None
     with con.cursor(prepared=True) as cursor:
@@ -93,16 +423,16 @@ def db_get_file_entry(con: PooledMySQLConnection, file_id: int, current_user_id:
 def db_get_file_path(con: PooledMySQLConnection, file_id: int, current_user_id: int) -> models.StoredFilePath:
     select_stmnt = MySQLStatementBuilder(con)
     res = select_stmnt\
-        .select(FILES_TABLE, ['filename', 'uuid', 'directory', 'owner_id', 'extension'])\
+        .select(FILES_TABLE, ['filename', 'uuid', 'directory', 'owner_id', 'extension', 'hash'])\
         .where('id=?', [file_id])\
         .execute(dictionary=True, fetch_type=FetchType.FETCH_ONE)
 
     if res is None:
         raise exc.FileNotFoundException('File not found in DB')
 
-    path = res['directory'] + res['uuid']
     stored_path = models.StoredFilePath(
-        id=file_id, filename=res['filename'], path=path, owner_id=res['owner_id'], extension=res['extension'])
+        id=file_id, filename=res['filename'], key=file_key(res['directory'], res['uuid']), owner_id=res['owner_id'],
+        extension=res['extension'], hash=res['hash'])
     return stored_path
 
 
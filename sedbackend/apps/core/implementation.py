@@ -1,7 +1,18 @@
+from typing import List
+
 import sedbackend.apps.core.storage as storage
-from sedbackend.apps.core.db import get_connection
+from sedbackend.apps.core.db import get_connection, get_pool_stats, PoolStats
+from sedbackend.apps.core.query_stats import get_route_stats, RouteQueryStats
 
 
 def impl_check_db_connection() -> int:
     with get_connection() as con:
         return storage.db_check_db_connection(con)
+
+
+def impl_get_pool_stats() -> List[PoolStats]:
+    return get_pool_stats()
+
+
+def impl_get_route_query_stats() -> List[RouteQueryStats]:
+    return get_route_stats()
@@ -1,14 +1,17 @@
 from pandas import read_csv, read_excel
 import sedbackend.apps.core.files.models as models_files
 import sedbackend.apps.core.files.exceptions as exc_files
+import sedbackend.apps.core.files.storage as storage_files
 
 
 def get_sheet_headers(stored_file_path: models_files.StoredFilePath, csv_delimiter=None):
     df = None
     if stored_file_path.extension in ['.xls', '.xlsx', '.xlsm', '.xlsb', '.odf', '.ods', '.odt']:
-        df = read_excel(stored_file_path.path, sheet_name=0)
+        with storage_files.open_stored_file(stored_file_path) as f:
+            df = read_excel(f, sheet_name=0)
     elif stored_file_path.extension == '.csv':
-        df = read_csv(stored_file_path.path, sep=csv_delimiter)
+        with storage_files.open_stored_file(stored_file_path) as f:
+            df = read_csv(f, sep=csv_delimiter)
     else:
         raise exc_files.FileParsingException('Failed to recognize file extension. Could not retrieve sheet headers')
 
@@ -91,7 +91,7 @@ def impl_delete_measurement(measurement_set_id: int, measurement_id: int) -> boo
 
 
 def impl_get_measurement_result_by_id(m_id: int, mr_id: int) -> models.MeasurementResultData:
-    with get_connection() as con:
+    with get_connection(read_only=True) as con:
         return storage.db_get_measurement_result_by_id(con, m_id, mr_id)
 
 
@@ -102,7 +102,7 @@ def impl_get_measurement_results(measurement_id: int,
                                  date_to: Optional[datetime],
                                  ) -> List[models.MeasurementResultData]:
 
-    with get_connection() as con:
+    with get_connection(read_only=True) as con:
         res = storage.db_get_measurement_results(con,
                                                  measurement_id,
                                                  date_from=date_from,
@@ -130,6 +130,6 @@ def impl_post_upload_set(file, current_user_id: int, subproject_id: int, csv_del
             return res
     except exc_files.FileSizeException:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail="File size too high. Could not be saved"
         )
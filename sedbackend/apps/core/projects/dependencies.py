@@ -3,8 +3,8 @@ from typing import List
 from fastapi import HTTPException, Request, status
 from fastapi.logger import logger
 
-from sedbackend.apps.core.projects.models import AccessLevel, SubProject
-from sedbackend.apps.core.projects.implementation import impl_get_project, impl_get_subproject_native
+from sedbackend.apps.core.projects.models import AccessLevel, SubProjectAccess
+from sedbackend.apps.core.projects.implementation import impl_get_project, impl_get_subproject_native_access_async
 
 
 class ProjectAccessChecker:
@@ -43,33 +43,30 @@ class SubProjectAccessChecker:
         self.access_levels = allowed_levels
         self.application_sid = application_sid
 
-    def __call__(self, native_project_id: int, request: Request):
+    async def __call__(self, native_project_id: int, request: Request):
         logger.debug(f'Does user with id {request.state.user_id} '
                      f'have access of type {self.access_levels} '
                      f'to sub project with native id = {native_project_id}, '
                      f'in application with sid {self.application_sid}?')
 
         user_id = request.state.user_id
-        # Get subproject
-        subproject = impl_get_subproject_native(self.application_sid, native_project_id)
+        # Get the user's access to the subproject (cached for a short while)
+        access = await impl_get_subproject_native_access_async(user_id, self.application_sid, native_project_id)
 
-        return SubProjectAccessChecker.check_user_subproject_access(subproject, self.access_levels, user_id)
+        return SubProjectAccessChecker.check_user_subproject_access(access, self.access_levels, user_id)
 
     @staticmethod
-    def check_user_subproject_access(subproject: SubProject, access_levels: List[AccessLevel], user_id: int):
-        if subproject.project_id is not None:
-            # Get project
-            project = impl_get_project(subproject.project_id)   # <-- This can throw
-            # Check user access level in that project
-            access = project.participants_access[user_id]
-            if access in access_levels:
-                logger.debug(f"Yes, user {user_id} has access level {access}")
+    def check_user_subproject_access(access: SubProjectAccess, access_levels: List[AccessLevel], user_id: int):
+        if access.project_id is not None:
+            # Check user access level in the project of the subproject
+            if access.access_level in access_levels:
+                logger.debug(f"Yes, user {user_id} has access level {access.access_level}")
                 return True
         else:
             # Fallback solution: Check if user is the owner/creator of the subproject.
-            if user_id == subproject.owner_id:
-                logger.debug(f"User with id {user_id} is the owner of subproject with id {subproject.id} "
-                             f"(owner_id = {subproject.owner_id}).")
+            if user_id == access.owner_id:
+                logger.debug(f"User with id {user_id} is the owner of subproject with id {access.subproject_id} "
+                             f"(owner_id = {access.owner_id}).")
                 return True
 
         logger.debug(f"No, user {user_id} does not have the minimum required access level")
@@ -77,5 +74,3 @@ class SubProjectAccessChecker:
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User does not have the necessary access level",
         )
-
-
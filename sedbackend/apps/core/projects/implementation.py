@@ -7,6 +7,7 @@ import sedbackend.apps.core.projects.storage as storage
 import sedbackend.apps.core.users.storage as storage_users
 import sedbackend.apps.core.users.exceptions as exc_users
 from sedbackend.apps.core.db import get_connection
+from sedbackend.apps.core.db_async import get_async_connection
 import sedbackend.apps.core.projects.models as models
 import sedbackend.apps.core.projects.exceptions as exc
 
@@ -41,6 +42,7 @@ def impl_post_project(project: models.ProjectPost, owner_id: int) -> models.Proj
 
             res = storage.db_post_project(con, project, owner_id)
             con.commit()
+            storage.invalidate_access_cache()
             return res
     except exc.ParticipantInconsistencyException as e:
         raise HTTPException(
@@ -64,6 +66,7 @@ def impl_delete_project(project_id: int) -> bool:
         with get_connection() as con:
             res = storage.db_delete_project(con, project_id)
             con.commit()
+            storage.invalidate_access_cache()
             return res
     except exc.ProjectNotFoundException:
         raise HTTPException(
@@ -84,6 +87,7 @@ def impl_update_project(project_id: int, project_updated: models.ProjectEdit) ->
         with get_connection() as con:
             res = storage.db_update_project(con, project_updated)
             con.commit()
+            storage.invalidate_access_cache()
             return res
     except exc.ProjectNotFoundException:
         raise HTTPException(
@@ -97,6 +101,7 @@ def impl_post_participant(project_id: int, user_id: int, access_level: models.Ac
         with get_connection() as con:
             res = storage.db_add_participant(con, project_id, user_id, access_level)
             con.commit()
+            storage.invalidate_access_cache()
             return res
     except exc.ProjectNotFoundException:
         raise HTTPException(
@@ -110,6 +115,7 @@ def impl_post_participants(project_id: int, participants_access_dict: dict[int,
         with get_connection() as con:
             res = storage.db_add_participants(con, project_id, participants_access_dict)
             con.commit()
+            storage.invalidate_access_cache()
             return res
     except exc.ProjectNotFoundException:
         raise HTTPException(
@@ -123,6 +129,7 @@ def impl_delete_participant(project_id: int, user_id: int) -> bool:
         with get_connection() as con:
             res = storage.db_delete_participant(con, project_id, user_id)
             con.commit()
+            storage.invalidate_access_cache()
             return res
     except exc.ProjectNotFoundException:
         raise HTTPException(
@@ -216,11 +223,82 @@ def impl_get_subproject_by_id(subproject_id: int) -> models.SubProject:
         )
 
 
+def impl_get_subproject_native_access(user_id: int, application_sid: str,
+                                      native_project_id: int) -> models.SubProjectAccess:
+    cache_key = (user_id, application_sid, native_project_id)
+    access = storage.subproject_access_cache.get(cache_key)
+    if access is not None:
+        return access
+
+    try:
+        with get_connection() as con:
+            access = storage.db_get_subproject_native_access(con, user_id, application_sid, native_project_id)
+    except exc.SubProjectNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sub-project not found."
+        )
+    except ApplicationNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No such application."
+        )
+
+    storage.subproject_access_cache.set(cache_key, access)
+    return access
+
+
+async def impl_get_subproject_native_access_async(user_id: int, application_sid: str,
+                                                  native_project_id: int) -> models.SubProjectAccess:
+    cache_key = (user_id, application_sid, native_project_id)
+    access = storage.subproject_access_cache.get(cache_key)
+    if access is not None:
+        return access
+
+    try:
+        async with get_async_connection() as con:
+            access = await storage.db_get_subproject_native_access_async(con, user_id, application_sid,
+                                                                         native_project_id)
+    except exc.SubProjectNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sub-project not found."
+        )
+    except ApplicationNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No such application."
+        )
+
+    storage.subproject_access_cache.set(cache_key, access)
+    return access
+
+
+def impl_get_subproject_access(user_id: int, subproject_id: int) -> models.SubProjectAccess:
+    cache_key = (user_id, subproject_id)
+    access = storage.subproject_access_cache.get(cache_key)
+    if access is not None:
+        return access
+
+    try:
+        with get_connection() as con:
+            access = storage.db_get_subproject_access(con, user_id, subproject_id)
+    except exc.SubProjectNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sub-project not found."
+        )
+
+    storage.subproject_access_cache.set(cache_key, access)
+    return access
+
+
 def impl_delete_subproject(project_id: Union[int, None], subproject_id: int) -> bool:
     try:
         with get_connection() as con:
             res = storage.db_delete_subproject(con, project_id, subproject_id)
             con.commit()
+            storage.invalidate_access_cache()
             return res
     except exc.SubProjectNotFoundException:
         raise HTTPException(
@@ -239,6 +317,7 @@ def impl_delete_subproject_native(application_id: str, native_project_id: int):
         with get_connection() as con:
             res = storage.db_delete_subproject_native(con, application_id, native_project_id)
             con.commit()
+            storage.invalidate_access_cache()
             return res
     except exc.SubProjectNotFoundException:
         raise HTTPException(
@@ -69,6 +69,13 @@ class SubProject(SubProjectPost):
     datetime_created: datetime
 
 
+class SubProjectAccess(BaseModel):
+    subproject_id: int
+    project_id: Optional[int]
+    owner_id: int
+    access_level: Optional[AccessLevel] = None  # Access level of the user in the project of the subproject
+
+
 class Project(BaseModel):
     id: Optional[int] = None        # Project database ID
     name: Optional[str] = None      # Name of the project
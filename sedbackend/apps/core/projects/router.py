@@ -16,8 +16,8 @@ router = APIRouter()
             summary="Lists all accessible projects",
             description="Lists all projects in alphabetical order",
             response_model=List[models.ProjectListing])
-async def get_projects(segment_length: Optional[int] = 0, index: Optional[int] = 0,
-                       current_user: User = Depends(get_current_active_user)):
+def get_projects(segment_length: Optional[int] = 0, index: Optional[int] = 0,
+                 current_user: User = Depends(get_current_active_user)):
     """
     Lists all projects that the current user has access to
     :param current_user:
@@ -33,8 +33,8 @@ async def get_projects(segment_length: Optional[int] = 0, index: Optional[int] =
             description="Lists all projects that exist, and is only available to those who have the authority.",
             response_model=List[models.ProjectListing],
             dependencies=[Security(verify_scopes, scopes=['admin'])])
-async def get_all_projects(segment_length: Optional[int] = 0, index: Optional[int] = 0,
-                           current_user: User = Depends(get_current_active_user)):
+def get_all_projects(segment_length: Optional[int] = 0, index: Optional[int] = 0,
+                     current_user: User = Depends(get_current_active_user)):
     """
     Lists all projects that exists, and is only available to those who have the authority.
     :param current_user:
@@ -50,7 +50,7 @@ async def get_all_projects(segment_length: Optional[int] = 0, index: Optional[in
             response_model=models.Project,
             description="Get a specific project using project ID",
             dependencies=[Depends(ProjectAccessChecker(models.AccessLevel.list_can_read()))])
-async def get_project(project_id: int):
+def get_project(project_id: int):
     return impl.impl_get_project(project_id)
 
 
@@ -59,7 +59,7 @@ async def get_project(project_id: int):
              description="Create a new empty project. The current user is automatically set as the owner.",
              response_model=models.Project,
              dependencies=[Security(verify_scopes, scopes=['admin'])])
-async def post_project(project: models.ProjectPost, current_user: User = Depends(get_current_active_user)):
+def post_project(project: models.ProjectPost, current_user: User = Depends(get_current_active_user)):
     current_user_id = current_user.id
     return impl.impl_post_project(project, current_user_id)
 
@@ -69,7 +69,7 @@ async def post_project(project: models.ProjectPost, current_user: User = Depends
                description="Delete a project",
                response_model=bool,
                dependencies=[Depends(ProjectAccessChecker([models.AccessLevel.OWNER, models.AccessLevel.ADMIN]))])
-async def delete_project(project_id: int):
+def delete_project(project_id: int):
     return impl.impl_delete_project(project_id)
 
 
@@ -78,7 +78,7 @@ async def delete_project(project_id: int):
             description="Edit project",
             response_model=models.Project,
             dependencies=[Depends(ProjectAccessChecker(models.AccessLevel.list_are_admins()))])
-async def update_project(project_id: int, project_updated: models.ProjectEdit):
+def update_project(project_id: int, project_updated: models.ProjectEdit):
     return impl.impl_update_project(project_id, project_updated)
 
 
@@ -86,7 +86,7 @@ async def update_project(project_id: int, project_updated: models.ProjectEdit):
              summary="Add participant to project",
              description="Add a participant to a project",
              dependencies=[Depends(ProjectAccessChecker([models.AccessLevel.OWNER, models.AccessLevel.ADMIN]))])
-async def post_participant(project_id: int, user_id: int, access_level: models.AccessLevel):
+def post_participant(project_id: int, user_id: int, access_level: models.AccessLevel):
     return impl.impl_post_participant(project_id, user_id, access_level)
 
 
@@ -95,7 +95,7 @@ async def post_participant(project_id: int, user_id: int, access_level: models.A
                response_model=bool,
                description="Remove a participant from a project",
                dependencies=[Depends(ProjectAccessChecker([models.AccessLevel.OWNER, models.AccessLevel.ADMIN]))])
-async def delete_participant(project_id: int, user_id: int):
+def delete_participant(project_id: int, user_id: int):
     return impl.impl_delete_participant(project_id, user_id)
 
 
@@ -104,7 +104,7 @@ async def delete_participant(project_id: int, user_id: int):
             description="Update the name of the project",
             dependencies=[Depends(ProjectAccessChecker([models.AccessLevel.OWNER]))],
             response_model=bool)
-async def put_participant_name(project_id: int, name: str):
+def put_participant_name(project_id: int, name: str):
     return impl.impl_put_name(project_id, name)
 
 
@@ -112,7 +112,7 @@ async def put_participant_name(project_id: int, name: str):
             summary="Get subprojects in project",
             dependencies=[Depends(ProjectAccessChecker(models.AccessLevel.list_can_read()))],
             response_model=List[models.SubProject])
-async def get_subprojects(project_id: int):
+def get_subprojects(project_id: int):
     return impl.impl_get_subprojects(project_id)
 
 
@@ -120,7 +120,7 @@ async def get_subprojects(project_id: int):
             summary="Get subproject",
             response_model=models.SubProject,
             description="Get a specific project using subproject ID")
-async def get_subproject(project_id: int, subproject_id: int):
+def get_subproject(project_id: int, subproject_id: int):
     return impl.impl_get_subproject(project_id, subproject_id)
 
 
@@ -129,8 +129,8 @@ async def get_subproject(project_id: int, subproject_id: int):
              description="Create a new subproject. Needs to be connected to an existing project.",
              response_model=models.SubProject,
              dependencies=[Depends(ProjectAccessChecker([models.AccessLevel.OWNER, models.AccessLevel.ADMIN]))])
-async def post_subproject(project_id: int, subproject: models.SubProjectPost,
-                          current_user: User = Depends(get_current_active_user)):
+def post_subproject(project_id: int, subproject: models.SubProjectPost,
+                    current_user: User = Depends(get_current_active_user)):
     return impl.impl_post_subproject(subproject, current_user.id, project_id=project_id)
 
 
@@ -139,21 +139,21 @@ async def post_subproject(project_id: int, subproject: models.SubProjectPost,
                description="Delete a project",
                response_model=bool,
                dependencies=[Depends(ProjectAccessChecker(models.AccessLevel.list_are_admins()))])
-async def delete_subproject(project_id: int, subproject_id: int):
+def delete_subproject(project_id: int, subproject_id: int):
     return impl.impl_delete_subproject(project_id, subproject_id)
 
 
 @router.get("/apps/{app_id}/native-subprojects/{native_project_id}",
             summary="Get application specific native subproject",
             response_model=models.SubProject)
-async def get_app_native_project(app_id, native_project_id):
+def get_app_native_project(app_id, native_project_id):
     return impl.impl_get_subproject_native(app_id, native_project_id)
 
 
 @router.get("/apps/{app_id}/native-subprojects",
             summary="List application specific native subprojects available to the user",
             response_model=List[models.SubProject])
-async def get_user_subprojects_with_application_sid(app_id: str, current_user: User = Depends(get_current_active_user),
-                                                    no_project_association: Optional[bool] = False):
+def get_user_subprojects_with_application_sid(app_id: str, current_user: User = Depends(get_current_active_user),
+                                              no_project_association: Optional[bool] = False):
     return impl.impl_get_user_subprojects_with_application_sid(current_user.id, current_user.id, app_id,
                                                                no_project_association=no_project_association)
@@ -9,6 +9,8 @@ from sedbackend.apps.core.applications.state import get_application
 import sedbackend.apps.core.projects.models as models
 import sedbackend.apps.core.projects.exceptions as exc
 from sedbackend.apps.core.users.storage import db_get_users_with_ids
+from sedbackend.apps.core import db_async
+from sedbackend.libs.datastructures.cache import TTLCache
 
 PROJECTS_TABLE = 'projects'
 PROJECTS_COLUMNS = ['id', 'name']
@@ -18,6 +20,17 @@ SUBPROJECT_COLUMNS = ['id', 'name', 'application_sid', 'project_id', 'native_pro
 PROJECTS_PARTICIPANTS_TABLE = 'projects_participants'
 PROJECTS_PARTICIPANTS_COLUMNS = ['id', 'user_id', 'project_id', 'access_level']
 
+SUBPROJECT_ACCESS_CACHE_TTL = 10    # Seconds. Bounds how long other worker processes may serve stale access levels
+subproject_access_cache = TTLCache(ttl=SUBPROJECT_ACCESS_CACHE_TTL)
+
+
+def invalidate_access_cache():
+    """
+    Clears cached access levels. Called by the implementation layer once writes to participants and subproject
+    associations are committed, since requests in between would cache the access levels from before the writes.
+    """
+    subproject_access_cache.clear()
+
 
 def db_get_projects(connection, user_id: int, segment_length: int = 0, index: int = 0) -> List[models.ProjectListing]:
 
@@ -140,6 +153,59 @@ def db_get_project(connection, project_id) -> models.Project:
     return project
 
 
+def db_get_projects_with_ids(connection, project_ids: List[int]) -> Dict[int, models.Project]:
+    """
+    Fetches several projects, with their participants and subprojects, using a constant number of queries.
+    Projects that do not exist are left out of the result.
+    """
+    project_ids = list(set(project_ids))
+    if len(project_ids) == 0:
+        return {}
+
+    proj_sql = MySQLStatementBuilder(connection)
+    proj_rows = proj_sql \
+        .select(PROJECTS_TABLE, PROJECTS_COLUMNS) \
+        .where(f'id IN {MySQLStatementBuilder.placeholder_array(len(project_ids))}', project_ids) \
+        .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
+
+    projects = {row['id']: models.Project(id=row['id'], name=row['name']) for row in proj_rows}
+    if len(projects) == 0:
+        return projects
+
+    part_sql = MySQLStatementBuilder(connection)
+    participant_rows = part_sql \
+        .select(PROJECTS_PARTICIPANTS_TABLE, PROJECTS_PARTICIPANTS_COLUMNS) \
+        .where(f'project_id IN {MySQLStatementBuilder.placeholder_array(len(projects))}', list(projects.keys())) \
+        .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
+
+    participant_ids = {project_id: [] for project_id in projects}
+    for participant_db in participant_rows:
+        participant_ids[participant_db['project_id']].append(participant_db['user_id'])
+        projects[participant_db['project_id']].participants_access[participant_db['user_id']] = \
+            participant_db['access_level']
+
+    for project_id, user_ids in participant_ids.items():
+        if len(user_ids) == 0:
+            logger.error(f"This project (id = {project_id}) does not have any participants")
+            raise exc.NoParticipantsException()
+
+    users = {user.id: user for user in db_get_users_with_ids(
+        connection, list({user_id for user_ids in participant_ids.values() for user_id in user_ids}))}
+    for project_id, user_ids in participant_ids.items():
+        projects[project_id].participants = [users[user_id] for user_id in user_ids]
+
+    sub_sql = MySQLStatementBuilder(connection)
+    subproject_rows = sub_sql \
+        .select(SUBPROJECTS_TABLE, SUBPROJECT_COLUMNS) \
+        .where(f'project_id IN {MySQLStatementBuilder.placeholder_array(len(projects))}', list(projects.keys())) \
+        .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
+
+    for res in subproject_rows:
+        projects[res['project_id']].subprojects.append(models.SubProject(**res))
+
+    return projects
+
+
 def db_post_project(connection, project: models.ProjectPost, owner_id: int) -> models.Project:
     # Set owner if it is not already set
     if owner_id not in project.participants:
@@ -536,3 +602,59 @@ def db_delete_subproject_native(connection: PooledMySQLConnection, application_i
         raise exc.SubProjectNotFoundException
 
     return True
+
+
+def db_get_subproject_native_access(connection: PooledMySQLConnection, user_id: int, application_sid: str,
+                                    native_project_id: int) -> models.SubProjectAccess:
+    """
+    Fetches what is needed to check a user's access to a subproject with a single query, without building the
+    project with all of its participants.
+    """
+    get_application(application_sid)        # Raises exception of application does not exist
+
+    return _db_get_subproject_access(connection, user_id, 'ps.application_sid = %s AND ps.native_project_id = %s',
+                                     [application_sid, native_project_id])
+
+
+def db_get_subproject_access(connection: PooledMySQLConnection, user_id: int,
+                             subproject_id: int) -> models.SubProjectAccess:
+    return _db_get_subproject_access(connection, user_id, 'ps.id = %s', [subproject_id])
+
+
+def _db_get_subproject_access(connection: PooledMySQLConnection, user_id: int, where_statement: str,
+                              where_values: List) -> models.SubProjectAccess:
+    with connection.cursor(prepared=True, dictionary=True) as cursor:
+        cursor.execute(_subproject_access_query(where_statement), [user_id] + where_values)
+        res = cursor.fetchone()
+
+    return _populate_subproject_access(res)
+
+
+async def db_get_subproject_native_access_async(connection, user_id: int, application_sid: str,
+                                                native_project_id: int) -> models.SubProjectAccess:
+    """
+    Same as db_get_subproject_native_access, for async connections.
+    """
+    get_application(application_sid)        # Raises exception of application does not exist
+
+    res = await db_async.fetch_one(
+        connection,
+        _subproject_access_query('ps.application_sid = %s AND ps.native_project_id = %s'),
+        [user_id, application_sid, native_project_id])
+
+    return _populate_subproject_access(res)
+
+
+def _subproject_access_query(where_statement: str) -> str:
+    return f'SELECT ps.id, ps.project_id, ps.owner_id, pp.access_level ' \
+           f'FROM {SUBPROJECTS_TABLE} ps ' \
+           f'LEFT JOIN {PROJECTS_PARTICIPANTS_TABLE} pp ON pp.project_id = ps.project_id AND pp.user_id = %s ' \
+           f'WHERE {where_statement}'
+
+
+def _populate_subproject_access(res) -> models.SubProjectAccess:
+    if res is None:
+        raise exc.SubProjectNotFoundException
+
+    return models.SubProjectAccess(subproject_id=res['id'], project_id=res['project_id'], owner_id=res['owner_id'],
+                                   access_level=res['access_level'])
@@ -0,0 +1,211 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+N_PLUS_ONE_THRESHOLD = 10   # Executions of the same statement within one request before it is reported
+
+
+class QueryStats:
+    """
+    Queries executed during a request or a test: how many, how long they took, and how often each statement was run.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0   # Seconds
+        self.fingerprints: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float):
+        fp = fingerprint(statement)
+        with self._lock:
+            self.count += 1
+            self.total_time += duration
+            self.fingerprints[fp] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """
+        Statements executed at least threshold times, most frequent first. Usually a query run once per row.
+        """
+        with self._lock:
+            return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+
+class RouteQueryStats(BaseModel):
+    route: str
+    requests: int = 0
+    queries: int = 0
+    max_queries: int = 0
+    db_time: float = 0          # Seconds
+    max_db_time: float = 0
+    n_plus_one_requests: int = 0    # Requests that ran a statement at least N_PLUS_ONE_THRESHOLD times
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar('request_query_stats', default=None)
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+
+_route_stats: Dict[str, RouteQueryStats] = {}
+_route_stats_lock = threading.Lock()
+
+_literals = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b|%s|%\(\w+\)s")
+_value_lists = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*')
+_whitespace = re.compile(r'\s+')
+
+
+def fingerprint(statement) -> str:
+    """
+    Normalizes a statement so that executions which only differ in their values are counted together.
+    """
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode(errors='replace')
+    statement = _literals.sub('?', str(statement))
+    statement = _value_lists.sub('(...)', statement)
+    return _whitespace.sub(' ', statement).strip()
+
+
+def record_query(statement, duration: float):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                capture.record(statement, duration)
+
+
+@contextmanager
+def record_request_queries():
+    """
+    Records the queries of the current request. The stats follow the context into the worker threads of sync
+    handlers and dependencies.
+    """
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+@contextmanager
+def capture_queries():
+    """
+    Records all queries executed while the block runs, in any thread. Meant for tests, e.g. to check that an endpoint
+    stays within a query budget when called through the test client.
+    """
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+def add_route_stats(route: str, stats: QueryStats, n_plus_one: bool):
+    with _route_stats_lock:
+        route_stats = _route_stats.get(route)
+        if route_stats is None:
+            route_stats = _route_stats[route] = RouteQueryStats(route=route)
+        route_stats.requests += 1
+        route_stats.queries += stats.count
+        route_stats.max_queries = max(route_stats.max_queries, stats.count)
+        route_stats.db_time += stats.total_time
+        route_stats.max_db_time = max(route_stats.max_db_time, stats.total_time)
+        if n_plus_one:
+            route_stats.n_plus_one_requests += 1
+
+
+def get_route_stats() -> List[RouteQueryStats]:
+    """
+    Query stats per route since the server started, routes with the most queries first.
+    """
+    with _route_stats_lock:
+        res = [route_stats.copy() for route_stats in _route_stats.values()]
+    return sorted(res, key=lambda route_stats: route_stats.queries, reverse=True)
+
+
+class InstrumentedCursor:
+    """
+    Wraps a cursor and records the statements it executes. Everything else is passed on to the cursor.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
+        finally:
+            record_query(operation, time.perf_counter() - start)
+
+    def executemany(self, operation, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, *args, **kwargs)
+        finally:
+            record_query(operation, time.perf_counter() - start)
+
+    def callproc(self, procname, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.callproc(procname, *args, **kwargs)
+        finally:
+            record_query(f'CALL {procname}', time.perf_counter() - start)
+
+    def __getattr__(self, item):
+        return getattr(self._cursor, item)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._cursor.__exit__(exc_type, exc_val, exc_tb)
+
+
+class InstrumentedConnection:
+    """
+    Wraps a pooled connection so that all cursors it creates, including those of MySQLStatementBuilder, are recorded.
+    Work that must not happen before the transaction commits, such as removing content from storage, is registered
+    with after_commit.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._after_commit: List[Callable[[], None]] = []
+
+    def cursor(self, *args, **kwargs) -> InstrumentedCursor:
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs))
+
+    def after_commit(self, callback: Callable[[], None]):
+        """
+        Calls callback once the current transaction has committed. It is dropped if the transaction rolls back, or
+        if the connection is closed first.
+        """
+        self._after_commit.append(callback)
+
+    def commit(self):
+        self._connection.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
+
+    def rollback(self):
+        self._after_commit = []
+        self._connection.rollback()
+
+    def __getattr__(self, item):
+        return getattr(self._connection, item)
@@ -0,0 +1,46 @@
+import decimal
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:     # Optional. Without it, FastJSONResponse uses the standard library encoder
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serialized with orjson, for large results such as simulation files and formula tables.
+
+    A handler that returns FastJSONResponse(result) bypasses the response model: FastAPI neither validates the
+    already validated models again nor converts them with jsonable_encoder, and the models are serialized straight
+    from their attributes. Only return results that are built from the declared response model, since nothing is
+    filtered out. Declare response_class=FastJSONResponse on the route to keep the documentation accurate.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializes content, including pydantic models, to JSON the way FastJSONResponse does
+    """
+    if orjson is None:
+        return JSONResponse(jsonable_encoder(content)).body
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.__dict__     # Nested models are passed back to _default by orjson
+    if isinstance(obj, (float, decimal.Decimal)):   # Float subclasses, e.g. numpy.float64, are not native to orjson
+        return float(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
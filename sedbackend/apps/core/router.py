@@ -1,12 +1,16 @@
 from datetime import datetime
+from typing import List
 
 from fastapi import APIRouter, Security
 
-from sedbackend.apps.core.implementation import impl_check_db_connection
+from sedbackend.apps.core.db import PoolStats
+from sedbackend.apps.core.query_stats import RouteQueryStats
+from sedbackend.apps.core.implementation import impl_check_db_connection, impl_get_pool_stats, \
+    impl_get_route_query_stats
 
 from sedbackend.apps.core.users.router import router as router_users
 from sedbackend.apps.core.authentication.router import router as router_auth
-from sedbackend.apps.core.authentication.utils import verify_token
+from sedbackend.apps.core.authentication.utils import verify_token, verify_scopes
 from sedbackend.apps.core.applications.router import router as router_apps
 from sedbackend.apps.core.projects.router import router as router_projects
 from sedbackend.apps.core.individuals.router import router as router_individuals
@@ -22,3 +26,25 @@ router.include_router(router_projects, prefix='/projects', tags=['projects'], de
 router.include_router(router_individuals, prefix='/individuals', tags=['individuals'], dependencies=[Security(verify_token)])
 router.include_router(router_measurements, prefix='/data', tags=['data'], dependencies=[Security(verify_token)])
 router.include_router(router_files, prefix='/files', tags=['files'], dependencies=[Security(verify_token)])
+
+
+@router.get("/db/pools",
+            summary="Get database connection pool statistics",
+            description="Connections in use, checkouts, waits and time spent waiting for and holding connections, "
+                        "per pool, since the server started",
+            response_model=List[PoolStats],
+            tags=['database'],
+            dependencies=[Security(verify_token), Security(verify_scopes, scopes=['admin'])])
+def get_db_pool_stats():
+    return impl_get_pool_stats()
+
+
+@router.get("/db/queries",
+            summary="Get database query statistics per route",
+            description="Number of requests, queries and time spent in the database per route since the server "
+                        "started, and how many requests executed the same statement many times (N+1 queries)",
+            response_model=List[RouteQueryStats],
+            tags=['database'],
+            dependencies=[Security(verify_token), Security(verify_scopes, scopes=['admin'])])
+def get_db_query_stats():
+    return impl_get_route_query_stats()
@@ -7,9 +7,10 @@ from fastapi.logger import logger
 from sedbackend.apps.core.authentication.exceptions import UnauthorizedOperationException
 import sedbackend.apps.core.authentication.login as auth_login
 import sedbackend.apps.core.authentication.exceptions as exc_auth
+from sedbackend.apps.core.authentication.storage import invalidate_cached_user_auth
 import sedbackend.apps.core.users.exceptions as exc
 import sedbackend.apps.core.users.models as models
-from sedbackend.apps.core.db import get_connection
+from sedbackend.apps.core.db import get_connection, JOBS_POOL
 import sedbackend.apps.core.users.storage as storage
 
 import pandas as pd
@@ -91,7 +92,7 @@ def impl_post_user(user: models.UserPost) -> models.User:
 def impl_post_users_bulk(file: File):
     logger.info("Bulk user creation requested.")
     try:
-        with get_connection() as con:
+        with get_connection(JOBS_POOL) as con:
             df = pd.read_excel(file)
             cols = list(df.columns)
 
@@ -121,6 +122,7 @@ def impl_delete_user_from_db(user_id: int) -> bool:
         with get_connection() as con:
             res = storage.db_delete_user(con, user_id)
             con.commit()
+            invalidate_cached_user_auth(user_id)
             return res
     except UnauthorizedOperationException:
         raise HTTPException(
@@ -142,6 +144,7 @@ def impl_update_user_password(current_user: models.User, user_id: int, current_p
         with get_connection() as connection:
             storage.db_update_user_password(connection, user_id, new_password)
             connection.commit()
+            invalidate_cached_user_auth(user_id)
             return True
     except exc.UserNotFoundException:
         raise HTTPException(
@@ -165,6 +168,7 @@ def impl_update_user_details(current_user: models.User,
         with get_connection() as connection:
             storage.db_update_user_details(connection, user_id, update_details_request)
             connection.commit()
+            invalidate_cached_user_auth(user_id)
 
     except exc.UserNotFoundException:
         raise HTTPException(
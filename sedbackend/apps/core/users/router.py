@@ -14,8 +14,8 @@ router = APIRouter()
             summary="Lists all users",
             description="Produces a list of users in alphabetical order",
             response_model=List[models.User])
-async def get_users(segment_length: int, index: int, order_by: Optional[str] = 'username',
-                    order_direction: Optional[str] = 'asc'):
+def get_users(segment_length: int, index: int, order_by: Optional[str] = 'username',
+              order_direction: Optional[str] = 'asc'):
     return impl.impl_get_users(segment_length, index, order_by=order_by, order_direction=order_direction)
 
 
@@ -23,7 +23,7 @@ async def get_users(segment_length: int, index: int, order_by: Optional[str] = '
              summary="Create new user",
              response_model=models.User,
              dependencies=[Security(verify_scopes, scopes=['admin'])])
-async def post_user(user: models.UserPost):
+def post_user(user: models.UserPost):
     return impl.impl_post_user(user)
 
 
@@ -32,7 +32,7 @@ async def post_user(user: models.UserPost):
                      "Needs to have two columns: \"username\" and \"password\".",
              # response_model=List[models.User],
              dependencies=[Security(verify_scopes, scopes=['admin'])])
-async def post_users_bulk(file: bytes = File()):
+def post_users_bulk(file: bytes = File()):
     impl.impl_post_users_bulk(file)
     return {"size": len(file)}
 
@@ -40,23 +40,23 @@ async def post_users_bulk(file: bytes = File()):
 @router.get("/me",
             summary="Returns logged in user",
             response_model=models.User)
-async def get_users_me(current_user: models.User = Depends(get_current_active_user)):
+def get_users_me(current_user: models.User = Depends(get_current_active_user)):
     return impl.impl_get_users_me(current_user)
 
 
 @router.get("/search",
             summary="Search for users",
             response_model=List[models.User])
-async def get_search_users(username: Optional[str] = "", full_name: Optional[str] = "",
-                           limit: Optional[int] = 10, order_by: Optional[str] = 'username',
-                           order_direction: str = 'asc'):
+def get_search_users(username: Optional[str] = "", full_name: Optional[str] = "",
+                     limit: Optional[int] = 10, order_by: Optional[str] = 'username',
+                     order_direction: str = 'asc'):
     return impl.impl_search_users(username, full_name, limit, order_by=order_by, order_direction=order_direction)
 
 
 @router.get("/{user_id}",
             summary="Get user with ID",
             response_model=models.User)
-async def get_user_with_id(user_id: int):
+def get_user_with_id(user_id: int):
     return impl.impl_get_user_with_id(user_id)
 
 
@@ -64,16 +64,16 @@ async def get_user_with_id(user_id: int):
                summary="Remove user from DB",
                response_model=bool,
                dependencies=[Security(verify_scopes, scopes=['admin'])])
-async def delete_user_from_db(user_id: int):
+def delete_user_from_db(user_id: int):
     return impl.impl_delete_user_from_db(user_id)
 
 
 @router.put("/{user_id}/password",
             summary="Update user password",
             response_model=bool)
-async def update_user_password(user_id: int,
-                               new_password_request: models.NewPasswordRequest,
-                               current_user: models.User = Depends(get_current_active_user)):
+def update_user_password(user_id: int,
+                         new_password_request: models.NewPasswordRequest,
+                         current_user: models.User = Depends(get_current_active_user)):
     return impl.impl_update_user_password(current_user,
                                           user_id,
                                           new_password_request.current_password,
@@ -83,7 +83,7 @@ async def update_user_password(user_id: int,
 @router.put("/{user_id}/details",
             summary="Update user details",
             response_model=bool)
-async def update_user_details(user_id: int, update_email_request: models.UpdateDetailsRequest,
-                              current_user: models.User = Depends(get_current_active_user)):
+def update_user_details(user_id: int, update_email_request: models.UpdateDetailsRequest,
+                        current_user: models.User = Depends(get_current_active_user)):
     return impl.impl_update_user_details(current_user, user_id, update_email_request)
 
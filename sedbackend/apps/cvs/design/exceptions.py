@@ -1,3 +1,6 @@
+from typing import List
+
+
 # ======================================================================================================================
 # Design
 # ======================================================================================================================
@@ -18,6 +21,20 @@ class DesignInsertException(Exception):
     pass
 
 
+class DesignImportFileTypeException(Exception):
+    pass
+
+
+class DesignImportFileException(Exception):
+    def __init__(self, message: str = None):
+        self.message = message
+
+
+class DesignImportColumnException(Exception):
+    def __init__(self, columns: List[str] = None):
+        self.columns = columns
+
+
 # ======================================================================================================================
 # Quantified Objectives
 # ======================================================================================================================
@@ -1,12 +1,13 @@
 from typing import List
 
-from fastapi import HTTPException
+from fastapi import HTTPException, UploadFile
 from starlette import status
 
 import sedbackend.apps.cvs.vcs.exceptions as vcs_exceptions
 import sedbackend.apps.cvs.project.exceptions as project_exceptions
 from sedbackend.apps.core.authentication import exceptions as auth_ex
-from sedbackend.apps.core.db import get_connection
+from sedbackend.apps.core.db import get_connection, JOBS_POOL
+from sedbackend.apps.core.db_async import get_async_connection
 from sedbackend.apps.cvs.design import models, storage, exceptions
 
 
@@ -176,6 +177,22 @@ def get_designs(project_id: int, design_group_id: int) -> List[models.Design]:
         )
 
 
+async def get_designs_async(project_id: int, design_group_id: int) -> List[models.Design]:
+    try:
+        async with get_async_connection() as con:
+            return await storage.get_designs_async(con, project_id, design_group_id)
+    except exceptions.DesignGroupNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Could not find design group'
+        )
+    except project_exceptions.CVSProjectNoMatchException:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Design group with id={design_group_id} is not a part of project with id={project_id}.',
+        )
+
+
 def edit_designs(project_id: int, design_group_id: int, designs: List[models.DesignPut]) -> bool:
     try:
         with get_connection() as con:
@@ -209,6 +226,45 @@ def edit_designs(project_id: int, design_group_id: int, designs: List[models.Des
         )
 
 
+def import_designs(project_id: int, design_group_id: int, file: UploadFile) -> models.DesignImportResult:
+    try:
+        with get_connection(JOBS_POOL) as con:
+            res = storage.import_designs(con, project_id, design_group_id, file)
+            con.commit()
+            return res
+    except exceptions.DesignImportFileTypeException:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f'Wrong filetype. Designs can be imported from .csv or .xlsx files.'
+        )
+    except exceptions.DesignImportFileException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Could not read the file. {e.message}.'
+        )
+    except exceptions.DesignImportColumnException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Columns do not match the value drivers of the design group: {", ".join(e.columns)}'
+            if e.columns else f'Could not find a header row in the file.'
+        )
+    except exceptions.DesignGroupNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Could not find design group'
+        )
+    except exceptions.DesignInsertException:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Could not insert the values provided'
+        )
+    except project_exceptions.CVSProjectNoMatchException:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Design group with id={design_group_id} is not a part of project with id={project_id}.',
+        )
+
+
 def get_all_formula_value_drivers(formula_id: int) -> List[models.ValueDriver]:
     try:
         with get_connection() as con:
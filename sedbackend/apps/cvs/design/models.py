@@ -52,3 +52,14 @@ class DesignPut(BaseModel):
 class DesignPost(BaseModel):
     name: str
     vd_design_values: Optional[List[ValueDriverDesignValue]]
+
+
+class DesignImportError(BaseModel):
+    row: int
+    message: str
+
+
+class DesignImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[DesignImportError]
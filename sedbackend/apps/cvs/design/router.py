@@ -1,6 +1,6 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, UploadFile
 
 from sedbackend.apps.core.projects.dependencies import SubProjectAccessChecker
 from sedbackend.apps.core.projects.models import AccessLevel
@@ -21,7 +21,7 @@ router = APIRouter()
     response_model=models.DesignGroup,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def create_design_group(native_project_id: int, design_group_post: models.DesignGroupPost) \
+def create_design_group(native_project_id: int, design_group_post: models.DesignGroupPost) \
         -> models.DesignGroup:
     return implementation.create_cvs_design_group(native_project_id, design_group_post)
 
@@ -32,7 +32,7 @@ async def create_design_group(native_project_id: int, design_group_post: models.
     response_model=List[models.DesignGroup],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_all_design_groups(native_project_id: int) \
+def get_all_design_groups(native_project_id: int) \
         -> List[models.DesignGroup]:
     return implementation.get_all_design_groups(native_project_id)
 
@@ -43,7 +43,7 @@ async def get_all_design_groups(native_project_id: int) \
     response_model=models.DesignGroup,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_design_group(native_project_id: int, design_group_id: int) -> models.DesignGroup:
+def get_design_group(native_project_id: int, design_group_id: int) -> models.DesignGroup:
     return implementation.get_design_group(native_project_id, design_group_id)
 
 
@@ -54,7 +54,7 @@ async def get_design_group(native_project_id: int, design_group_id: int) -> mode
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def delete_design_group(native_project_id: int, design_group_id: int) -> bool:
+def delete_design_group(native_project_id: int, design_group_id: int) -> bool:
     return implementation.delete_design_group(native_project_id, design_group_id)
 
 
@@ -64,8 +64,8 @@ async def delete_design_group(native_project_id: int, design_group_id: int) -> b
     response_model=models.DesignGroup,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def edit_design_group(native_project_id: int, design_group_id: int,
-                            design_group: models.DesignGroupPut) -> models.DesignGroup:
+def edit_design_group(native_project_id: int, design_group_id: int,
+                      design_group: models.DesignGroupPut) -> models.DesignGroup:
     return implementation.edit_design_group(native_project_id, design_group_id, design_group)
 
 
@@ -80,7 +80,7 @@ async def edit_design_group(native_project_id: int, design_group_id: int,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
 async def get_designs(native_project_id: int, design_group_id: int) -> List[models.Design]:
-    return implementation.get_designs(native_project_id, design_group_id)
+    return await implementation.get_designs_async(native_project_id, design_group_id)
 
 
 @router.put(
@@ -89,5 +89,17 @@ async def get_designs(native_project_id: int, design_group_id: int) -> List[mode
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def edit_design(native_project_id: int, design_group_id: int, designs: List[models.DesignPut]) -> bool:
+def edit_design(native_project_id: int, design_group_id: int, designs: List[models.DesignPut]) -> bool:
     return implementation.edit_designs(native_project_id, design_group_id, designs)
+
+
+@router.post(
+    '/project/{native_project_id}/design-group/{design_group_id}/designs/import',
+    summary='Import designs from a .csv or .xlsx sheet. The sheet needs a "name" column, and one column per value '
+            'driver named by the value driver name, "name [unit]" or id.',
+    response_model=models.DesignImportResult,
+    dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
+)
+def import_designs(native_project_id: int, design_group_id: int, file: UploadFile) \
+        -> models.DesignImportResult:
+    return implementation.import_designs(native_project_id, design_group_id, file)
@@ -1,4 +1,7 @@
-from typing import List
+import os
+from typing import List, Tuple, Dict, Iterator
+
+from fastapi import UploadFile
 from mysql.connector import Error
 from fastapi.logger import logger
 from mysql.connector.pooling import PooledMySQLConnection
@@ -8,6 +11,9 @@ from sedbackend.apps.cvs.vcs import storage as vcs_storage
 from sedbackend.apps.cvs.vcs.storage import CVS_VALUE_DRIVER_COLUMNS, CVS_VALUE_DRIVER_TABLE, populate_value_driver
 from mysqlsb import MySQLStatementBuilder, FetchType, Sort
 from sedbackend.apps.cvs.design import models, exceptions
+from sedbackend.apps.core import db_async
+from sedbackend.libs.spreadsheets.reader import read_sheet
+from sedbackend.libs.spreadsheets.exceptions import InvalidSheetException, UnsupportedSheetTypeException
 
 DESIGN_GROUPS_TABLE = 'cvs_design_groups'
 DESIGN_GROUPS_COLUMNS = ['id', 'project', 'name']
@@ -21,6 +27,11 @@ DESIGNS_COLUMNS = ['id', 'design_group', 'name']
 VD_DESIGN_VALUES_TABLE = 'cvs_vd_design_values'
 VD_DESIGN_VALUES_COLUMNS = ['value_driver', 'design', 'value']
 
+BULK_CHUNK_SIZE = 1000  # Max rows per multi-row statement
+DESIGN_IMPORT_BATCH_SIZE = 2000  # Designs inserted per batch when importing from file
+DESIGN_IMPORT_MAX_ERRORS = 1000  # Max number of row errors reported when importing from file
+MAX_DESIGN_TEXT_LENGTH = 255
+
 
 def create_design_group(db_connection: PooledMySQLConnection, project_id: int,
                         design_group: models.DesignGroupPost) -> models.DesignGroup:
@@ -196,47 +207,72 @@ def get_designs(db_connection: PooledMySQLConnection, project_id: int, design_gr
 
     get_design_group(db_connection, project_id, design_group_id)  # Check if design group exists and matches project
 
-    try:
-        select_statement = MySQLStatementBuilder(db_connection)
-        res = select_statement \
-            .select(DESIGNS_TABLE, DESIGNS_COLUMNS) \
-            .where('design_group = %s', [design_group_id]) \
-            .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
-    except Error as e:
-        logger.debug(f'Error msg: {e.msg}')
-        raise exceptions.DesignGroupNotFoundException
-
-    designs = []
-    for result in res:
-        vd_design_values = get_all_vd_design_values(db_connection, result['id'])
-        result.update({'vd_values': vd_design_values})
-        designs.append(populate_design_with_values(result))
-
-    return designs
+    return get_all_designs(db_connection, [design_group_id])
 
 
 def get_all_designs(db_connection: PooledMySQLConnection, design_group_ids: List[int]) -> List[models.Design]:
+    """
+    Fetches all designs in the given design groups together with their value driver values in a single query.
+    """
     logger.debug(f'Get all designs in design groups with ids = {design_group_ids}')
 
+    if len(design_group_ids) == 0:
+        return []
+
     try:
-        query = f'SELECT cvs_designs.id, cvs_designs.design_group, cvs_designs.name \
-                    FROM cvs_designs \
-                    WHERE cvs_designs.design_group IN ({",".join(["%s" for _ in range(len(design_group_ids))])})'
         with db_connection.cursor(prepared=True) as cursor:
-            cursor.execute(query, design_group_ids)
+            cursor.execute(_all_designs_query(len(design_group_ids)), design_group_ids)
             res = cursor.fetchall()
             res = [dict(zip(cursor.column_names, row)) for row in res]
     except Error as e:
         logger.debug(f'Error msg: {e.msg}')
         raise exceptions.DesignGroupNotFoundException
 
-    designs = []
+    return _populate_designs_with_values(res)
+
+
+async def get_designs_async(db_connection, project_id: int, design_group_id: int) -> List[models.Design]:
+    """
+    Same as get_designs, for async connections. Only checks that the design group belongs to the project, without
+    fetching its value drivers.
+    """
+    logger.debug(f'Get all designs in design group with id = {design_group_id}')
+
+    design_group = await db_async.fetch_one(db_connection, f'SELECT project FROM {DESIGN_GROUPS_TABLE} WHERE id = %s',
+                                            [design_group_id])
+    if design_group is None:
+        raise exceptions.DesignGroupNotFoundException
+    if design_group['project'] != project_id:
+        raise CVSProjectNoMatchException
+
+    res = await db_async.fetch_all(db_connection, _all_designs_query(1), [design_group_id])
+    return _populate_designs_with_values(res)
+
+
+def _all_designs_query(design_group_count: int) -> str:
+    return f'SELECT cvs_designs.id, cvs_designs.design_group, cvs_designs.name, \
+                cvs_vd_design_values.value_driver, cvs_vd_design_values.value \
+                FROM cvs_designs \
+                LEFT JOIN cvs_vd_design_values ON cvs_vd_design_values.design = cvs_designs.id \
+                WHERE cvs_designs.design_group IN {MySQLStatementBuilder.placeholder_array(design_group_count)} \
+                ORDER BY cvs_designs.id'
+
+
+def _populate_designs_with_values(res) -> List[models.Design]:
+    designs = {}
     for result in res:
-        vd_design_values = get_all_vd_design_values(db_connection, result['id'])
-        result.update({'vd_values': vd_design_values})
-        designs.append(populate_design_with_values(result))
+        design = designs.get(result['id'])
+        if design is None:
+            design = {'id': result['id'], 'design_group': result['design_group'], 'name': result['name'],
+                      'vd_values': []}
+            designs[result['id']] = design
+        if result['value_driver'] is not None:
+            design['vd_values'].append(models.ValueDriverDesignValue(
+                vd_id=result['value_driver'],
+                value=result['value']
+            ))
 
-    return designs
+    return [populate_design_with_values(design) for design in designs.values()]
 
 
 def create_design(db_connection: PooledMySQLConnection, design_group_id: int,
@@ -251,56 +287,86 @@ def create_design(db_connection: PooledMySQLConnection, design_group_id: int,
     design_id = insert_statement.last_insert_id
 
     if design.vd_design_values is not None:
-        [add_value_to_design_vd(db_connection, design_id, d_val.vd_id, d_val.value) for d_val in
-         design.vd_design_values]
+        add_values_to_designs(db_connection, [(design_id, d_val.vd_id, d_val.value)
+                                              for d_val in design.vd_design_values])
 
     return True
 
 
-def edit_design(db_connection: PooledMySQLConnection, design: models.DesignPut) -> bool:
-    logger.debug(f'Edit design with id = {design.id}')
-    design_id = design.id
+def add_values_to_designs(db_connection: PooledMySQLConnection, values: List[Tuple[int, int, str]]) -> bool:
+    """
+    Inserts or updates value driver values for designs with multi-row upserts.
+
+    :param values: List of (design id, value driver id, value)
+    """
+    for i in range(0, len(values), BULK_CHUNK_SIZE):
+        chunk = values[i:i + BULK_CHUNK_SIZE]
+        query = f'INSERT INTO {VD_DESIGN_VALUES_TABLE} (design, value_driver, value) ' \
+                f'VALUES {",".join(["(%s, %s, %s)" for _ in range(len(chunk))])} ' \
+                f'ON DUPLICATE KEY UPDATE value = VALUES(value)'
+        try:
+            with db_connection.cursor(prepared=True) as cursor:
+                cursor.execute(query, [v for value in chunk for v in value])
+        except Error as e:
+            logger.debug(f'Error msg: {e.msg}')
+            raise exceptions.DesignInsertException
 
-    try:
-        update_statement = MySQLStatementBuilder(db_connection)
-        update_statement.update(
-            table=DESIGNS_TABLE,
-            set_statement='name = %s',
-            values=[design.name]
-        )
-        update_statement.where('id = %s', [design_id])
-        _, rows = update_statement.execute(return_affected_rows=True)
-    except Error as e:
-        logger.debug(f'Error msg: {e.msg}')
-        raise exceptions.DesignNotFoundException
+    return True
 
-    vd_values = get_all_vd_design_values(db_connection, design_id)
 
-    if vd_values is not None:
-        for val in vd_values:
+def delete_values_from_designs(db_connection: PooledMySQLConnection, values: List[Tuple[int, int]]) -> bool:
+    """
+    Deletes value driver values from designs.
+
+    :param values: List of (design id, value driver id)
+    """
+    for i in range(0, len(values), BULK_CHUNK_SIZE):
+        chunk = values[i:i + BULK_CHUNK_SIZE]
+        try:
             delete_statement = MySQLStatementBuilder(db_connection)
             delete_statement.delete(VD_DESIGN_VALUES_TABLE) \
-                .where('value_driver = %s AND design = %s', [val.vd_id, design_id]) \
+                .where(f'(design, value_driver) IN ({",".join(["(%s, %s)" for _ in range(len(chunk))])})',
+                       [v for value in chunk for v in value]) \
                 .execute(fetch_type=FetchType.FETCH_NONE)
-
-    for val in design.vd_design_values:
-        add_value_to_design_vd(db_connection, design_id, val.vd_id, val.value)
+        except Error as e:
+            logger.debug(f'Error msg: {e.msg}')
+            raise exceptions.DesignInsertException
 
     return True
 
 
-def add_value_to_design_vd(db_connection: PooledMySQLConnection, design_id: int, vd_id: int, value: float) -> bool:
-    try:
+def create_designs(db_connection: PooledMySQLConnection, design_group_id: int,
+                   designs: List[models.DesignPost]) -> List[int]:
+    """
+    Creates designs with a single multi-row insert and returns their ids, in the same order as the given designs.
+    """
+    if len(designs) == 0:
+        return []
+
+    design_ids = []
+    for i in range(0, len(designs), BULK_CHUNK_SIZE):
+        chunk = designs[i:i + BULK_CHUNK_SIZE]
         insert_statement = MySQLStatementBuilder(db_connection)
         insert_statement \
-            .insert(table=VD_DESIGN_VALUES_TABLE, columns=VD_DESIGN_VALUES_COLUMNS) \
-            .set_values([vd_id, design_id, value]) \
+            .insert(table=DESIGNS_TABLE, columns=['design_group', 'name']) \
+            .set_values([[design_group_id, design.name] for design in chunk]) \
             .execute(fetch_type=FetchType.FETCH_NONE)
-    except Exception as e:
-        logger.debug(f'{e.__class__}, {e}')
+
+        # last_insert_id is the id of the first inserted row. Ids within a statement are increasing,
+        # so the new designs are the first rows from that id onwards.
+        select_statement = MySQLStatementBuilder(db_connection)
+        res = select_statement \
+            .select(DESIGNS_TABLE, ['id']) \
+            .where('design_group = %s AND id >= %s', [design_group_id, insert_statement.last_insert_id]) \
+            .order_by(['id'], Sort.ASCENDING) \
+            .limit(len(chunk)) \
+            .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
+        design_ids += [r['id'] for r in res]
+
+    if len(design_ids) != len(designs):
         raise exceptions.DesignInsertException
 
-    return True
+    return design_ids
 
 
 # Edit design if exists, otherwise create a new one. Delete if not longer used
@@ -309,41 +375,174 @@ def edit_designs(db_connection: PooledMySQLConnection, project_id: int, design_g
     logger.debug(f'Edit designs with design group id = {design_group_id}')
 
     # Check if design group exists and matches project
-    curr_designs = get_designs(db_connection, project_id, design_group_id)
-    for design in curr_designs:
-        if design.id not in [d.id for d in designs]:
-            delete_design(db_connection, design.id)
+    curr_designs = {design.id: design for design in get_designs(db_connection, project_id, design_group_id)}
+
+    # Delete removed designs. Their values are removed by cascade
+    kept_design_ids = {design.id for design in designs if design.id in curr_designs}
+    removed_design_ids = [design_id for design_id in curr_designs if design_id not in kept_design_ids]
+    if len(removed_design_ids):
+        delete_statement = MySQLStatementBuilder(db_connection)
+        delete_statement.delete(DESIGNS_TABLE) \
+            .where(f'design_group = %s AND id IN {MySQLStatementBuilder.placeholder_array(len(removed_design_ids))}',
+                   [design_group_id] + removed_design_ids) \
+            .execute(fetch_type=FetchType.FETCH_NONE)
 
+    # Designs without a (known) id in this design group are created
+    new_designs = [design for design in designs if design.id not in curr_designs]
+    new_design_ids = create_designs(db_connection, design_group_id,
+                                    [models.DesignPost(name=design.name, vd_design_values=design.vd_design_values)
+                                     for design in new_designs])
+
+    renamed_designs = [design for design in designs
+                       if design.id in curr_designs and curr_designs[design.id].name != design.name]
+    if len(renamed_designs):
+        query = f'INSERT INTO {DESIGNS_TABLE} (id, design_group, name) ' \
+                f'VALUES {",".join(["(%s, %s, %s)" for _ in range(len(renamed_designs))])} ' \
+                f'ON DUPLICATE KEY UPDATE name = VALUES(name)'
+        try:
+            with db_connection.cursor(prepared=True) as cursor:
+                cursor.execute(query, [v for design in renamed_designs
+                                       for v in (design.id, design_group_id, design.name)])
+        except Error as e:
+            logger.debug(f'Error msg: {e.msg}')
+            raise exceptions.DesignNotFoundException
+
+    # Diff the value driver values against the stored ones
+    stored_values = {(design.id, val.vd_id): val.value
+                     for design in curr_designs.values() if design.id in kept_design_ids
+                     for val in design.vd_design_values}
+    new_values = {}
     for design in designs:
-        count = 0
-        if design.id:
-            count_statement = MySQLStatementBuilder(db_connection)
-            count_result = count_statement.count(DESIGNS_TABLE) \
-                .where(f'id = %s', [design.id]) \
-                .execute(fetch_type=FetchType.FETCH_ONE, dictionary=True)
-            count = count_result['count']
-
-        if count == 0:
-            create_design(db_connection, design_group_id,
-                          models.DesignPost(name=design.name, vd_design_values=design.vd_design_values))
-        else:
-            edit_design(db_connection, design)
+        if design.id in kept_design_ids and design.vd_design_values is not None:
+            new_values.update({(design.id, val.vd_id): val.value for val in design.vd_design_values})
+    for design_id, design in zip(new_design_ids, new_designs):
+        if design.vd_design_values is not None:
+            new_values.update({(design_id, val.vd_id): val.value for val in design.vd_design_values})
+
+    delete_values_from_designs(db_connection, [key for key in stored_values if key not in new_values])
+    add_values_to_designs(db_connection, [(design_id, vd_id, value)
+                                          for (design_id, vd_id), value in new_values.items()
+                                          if stored_values.get((design_id, vd_id)) != value])
 
     return True
 
 
-def delete_design(db_connection: PooledMySQLConnection, design_id: int) -> bool:
-    logger.debug(f'Delete design with id = {design_id}')
+def map_design_import_columns(header: list, value_drivers: List[ValueDriver]) -> Tuple[int, Dict[int, int]]:
+    """
+    Maps the header of an imported sheet to the design name column and the value drivers of the design group.
+    Value driver columns may be named by value driver name, "name [unit]" or id.
+
+    :return: Index of the name column, and a mapping from column index to value driver id
+    :raises InvalidSheetException: If the header has no name column
+    """
+    vd_lookup = {}
+    for vd in value_drivers:
+        vd_lookup[vd.name.strip().lower()] = vd.id
+        vd_lookup[f'{vd.name} [{vd.unit if vd.unit else "N/A"}]'.strip().lower()] = vd.id
+        vd_lookup[str(vd.id)] = vd.id
+
+    header = ['' if cell is None else str(cell).strip() for cell in header]
+    name_index = next((i for i, cell in enumerate(header) if cell.lower() == 'name'), None)
+    if name_index is None:
+        raise InvalidSheetException('The header has no name column')
+
+    vd_columns = {}
+    unknown_columns = []
+    for i, cell in enumerate(header):
+        if i == name_index or cell == '':
+            continue
+        if cell.lower() in vd_lookup:
+            vd_columns[i] = vd_lookup[cell.lower()]
+        else:
+            unknown_columns.append(cell)
 
-    delete_statement = MySQLStatementBuilder(db_connection)
-    _, rows = delete_statement.delete(DESIGNS_TABLE) \
-        .where('id = %s', [design_id]) \
-        .execute(return_affected_rows=True)
+    if len(unknown_columns):
+        raise exceptions.DesignImportColumnException(unknown_columns)
 
-    if rows == 0:
-        raise exceptions.QuantifiedObjectiveNotFoundException
+    return name_index, vd_columns
 
-    return True
+
+def import_designs(db_connection: PooledMySQLConnection, project_id: int, design_group_id: int,
+                   file: UploadFile) -> models.DesignImportResult:
+    """
+    Imports designs and their value driver values from a CSV or Excel sheet with one design per row.
+    The rows are streamed and inserted in batches. Rows that fail validation are skipped and reported.
+    """
+    logger.debug(f'Importing designs from file {file.filename} to design group with id = {design_group_id}')
+
+    # Check if design group exists and matches project
+    design_group = get_design_group(db_connection, project_id, design_group_id)
+
+    try:
+        rows = read_sheet(file.file, os.path.splitext(file.filename)[1])
+    except UnsupportedSheetTypeException:
+        raise exceptions.DesignImportFileTypeException
+
+    try:
+        return _import_design_rows(db_connection, design_group, rows)
+    except InvalidSheetException as e:
+        raise exceptions.DesignImportFileException(e.message)
+
+
+def _import_design_rows(db_connection: PooledMySQLConnection, design_group: models.DesignGroup,
+                        rows: Iterator[list]) -> models.DesignImportResult:
+    header = next(rows, None)
+    if header is None:
+        raise exceptions.DesignImportColumnException([])
+    name_index, vd_columns = map_design_import_columns(header, design_group.vds)
+
+    result = models.DesignImportResult(imported=0, failed=0, errors=[])
+
+    def report_error(row_number: int, message: str):
+        result.failed += 1
+        if len(result.errors) < DESIGN_IMPORT_MAX_ERRORS:
+            result.errors.append(models.DesignImportError(row=row_number, message=message))
+
+    batch = []
+
+    def flush_batch():
+        design_ids = create_designs(db_connection, design_group.id, batch)
+        add_values_to_designs(db_connection, [(design_id, val.vd_id, val.value)
+                                              for design_id, design in zip(design_ids, batch)
+                                              for val in design.vd_design_values])
+        result.imported += len(batch)
+        batch.clear()
+
+    for row_number, row in enumerate(rows, start=2):
+        cells = ['' if cell is None else str(cell).strip() for cell in row]
+        if not any(cells):
+            continue
+
+        name = cells[name_index] if name_index < len(cells) else ''
+        if name == '':
+            report_error(row_number, 'Missing design name')
+            continue
+        if len(name) > MAX_DESIGN_TEXT_LENGTH:
+            report_error(row_number, f'Design name is longer than {MAX_DESIGN_TEXT_LENGTH} characters')
+            continue
+
+        vd_values = []
+        for column, vd_id in vd_columns.items():
+            value = cells[column] if column < len(cells) else ''
+            if value == '':
+                continue
+            if len(value) > MAX_DESIGN_TEXT_LENGTH:
+                report_error(row_number, f'Value in column {column + 1} is longer than '
+                                         f'{MAX_DESIGN_TEXT_LENGTH} characters')
+                break
+            vd_values.append(models.ValueDriverDesignValue(vd_id=vd_id, value=value))
+        else:
+            batch.append(models.DesignPost(name=name, vd_design_values=vd_values))
+
+        if len(batch) >= DESIGN_IMPORT_BATCH_SIZE:
+            flush_batch()
+
+    if len(batch):
+        flush_batch()
+
+    logger.debug(f'Imported {result.imported} designs, {result.failed} rows failed')
+
+    return result
 
 
 # TODO Add error handling when selecting value drivers
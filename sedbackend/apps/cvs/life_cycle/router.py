@@ -19,7 +19,7 @@ router = APIRouter()
     response_model=models.StartStopNodeGet,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def create_process_node(node: models.StartStopNodePost, vcs_id: int) -> models.StartStopNodeGet:
+def create_process_node(node: models.StartStopNodePost, vcs_id: int) -> models.StartStopNodeGet:
     return implementation.create_start_stop_node(node, vcs_id)
 
 
@@ -29,7 +29,7 @@ async def create_process_node(node: models.StartStopNodePost, vcs_id: int) -> mo
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def delete_bpmn_node(native_project_id: int, node_id: int) -> bool:
+def delete_bpmn_node(native_project_id: int, node_id: int) -> bool:
     return implementation.delete_node(native_project_id, node_id)
 
 
@@ -39,7 +39,7 @@ async def delete_bpmn_node(native_project_id: int, node_id: int) -> bool:
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def update_bpmn_node(native_project_id: int, node_id: int, node: models.NodePost) -> bool:
+def update_bpmn_node(native_project_id: int, node_id: int, node: models.NodePost) -> bool:
     return implementation.update_node(native_project_id, node_id, node)
 
 
@@ -49,8 +49,8 @@ async def update_bpmn_node(native_project_id: int, node_id: int, node: models.No
     response_model=models.BPMNGet,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_bpmn(native_project_id: int, vcs_id: int,
-                   user: User = Depends(get_current_active_user)) -> models.BPMNGet:
+def get_bpmn(native_project_id: int, vcs_id: int,
+             user: User = Depends(get_current_active_user)) -> models.BPMNGet:
     return implementation.get_bpmn(native_project_id, vcs_id, user.id)
 
 
@@ -60,7 +60,7 @@ async def get_bpmn(native_project_id: int, vcs_id: int,
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def update_bpmn(native_project_id: int, vcs_id: int, bpmn: models.BPMNGet) -> bool:
+def update_bpmn(native_project_id: int, vcs_id: int, bpmn: models.BPMNGet) -> bool:
     return implementation.update_bpmn(native_project_id, vcs_id, bpmn)
 
 
@@ -70,8 +70,8 @@ async def update_bpmn(native_project_id: int, vcs_id: int, bpmn: models.BPMNGet)
     response_model=List[List[str or float]],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_dsm(native_project_id: int, vcs_id: int,
-                  user: User = Depends(get_current_active_user)) -> List[List[str or float]]:
+def get_dsm(native_project_id: int, vcs_id: int,
+            user: User = Depends(get_current_active_user)) -> List[List[str or float]]:
     return implementation.get_dsm(native_project_id, vcs_id, user.id)
 
 
@@ -81,8 +81,8 @@ async def get_dsm(native_project_id: int, vcs_id: int,
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def save_dsm(native_project_id: int, vcs_id: int, dsm: List[List[str or float]],
-                   user: User = Depends(get_current_active_user)) -> bool:
+def save_dsm(native_project_id: int, vcs_id: int, dsm: List[List[str or float]],
+             user: User = Depends(get_current_active_user)) -> bool:
     return implementation.save_dsm(native_project_id, vcs_id, dsm, user.id)
 
 
@@ -92,8 +92,8 @@ async def save_dsm(native_project_id: int, vcs_id: int, dsm: List[List[str or fl
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def upload_dsm_file(native_project_id: int, vcs_id: int, file: UploadFile,
-                          user: User = Depends(get_current_active_user)) -> bool:
+def upload_dsm_file(native_project_id: int, vcs_id: int, file: UploadFile,
+                    user: User = Depends(get_current_active_user)) -> bool:
     return implementation.save_dsm_file(native_project_id, vcs_id, file, user.id)
 
 
@@ -103,7 +103,7 @@ async def upload_dsm_file(native_project_id: int, vcs_id: int, file: UploadFile,
     response_model=int,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_dsm_file(native_project_id: int, vcs_id: int) -> int:
+def get_dsm_file(native_project_id: int, vcs_id: int) -> int:
     return implementation.get_dsm_file_id(native_project_id, vcs_id)
 
 
@@ -113,6 +113,6 @@ async def get_dsm_file(native_project_id: int, vcs_id: int) -> int:
     response_model=models.DSMApplyAllResponse,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def apply_dsm_to_all(native_project_id: int, vcs_id: int, dsm: List[List[str or float]],
-                           user: User = Depends(get_current_active_user)) -> models.DSMApplyAllResponse:
+def apply_dsm_to_all(native_project_id: int, vcs_id: int, dsm: List[List[str or float]],
+                     user: User = Depends(get_current_active_user)) -> models.DSMApplyAllResponse:
     return implementation.apply_dsm_to_all(native_project_id, vcs_id, dsm, user.id)
@@ -1,8 +1,6 @@
 import csv
 import io
-import os
-import tempfile
-from typing import List, Tuple, Optional, TextIO
+from typing import List, Tuple, Optional, TextIO, Dict
 
 from fastapi import UploadFile
 from fastapi.logger import logger
@@ -17,7 +15,6 @@ from sedbackend.apps.cvs.vcs import storage as vcs_storage, exceptions as vcs_ex
 from sedbackend.apps.core.files import models as file_models, storage as file_storage, exceptions as file_ex
 from sedbackend.apps.core.projects import storage as core_project_storage
 from mysql.connector import Error
-import magic
 import pandas as pd
 
 CVS_NODES_TABLE = 'cvs_nodes'
@@ -34,9 +31,11 @@ CVS_DSM_FILES_COLUMNS = ['vcs', 'file']
 
 MAX_FILE_SIZE = 100 * 10 ** 6  # 100MB
 
+file_storage.register_file_references(CVS_APP_SID, CVS_DSM_FILES_TABLE, 'file')
+
 
 def populate_process_node(db_connection, project_id, result) -> models.ProcessNodeGet:
-    logger.debug(f'Populating model for process node with id={result["id"]} ')
+    logger.debug('Populating model for process node with id=%s', result['id'])
 
     return models.ProcessNodeGet(
         id=result['id'],
@@ -273,20 +272,79 @@ def update_bpmn(db_connection: PooledMySQLConnection, project_id: int, vcs_id: i
     # Check if vcs exists and matches project id
     vcs_storage.check_vcs(db_connection, project_id, vcs_id)
 
-    for node in bpmn.nodes:
-        updated_node = models.NodePost(
-            pos_x=node.pos_x,
-            pos_y=node.pos_y
+    positions = {node.id: (node.pos_x, node.pos_y) for node in bpmn.nodes}
+    update_node_positions(db_connection, vcs_id, positions)
+
+    return True
+
+
+def update_node_positions(db_connection: PooledMySQLConnection, vcs_id: int,
+                          positions: Dict[int, Tuple[int, int]]) -> bool:
+    """
+    Bulk update of node positions within a vcs. All node ids are validated against the vcs in a single query,
+    and the positions of the nodes that actually moved are written in a single statement.
+
+    :param positions: Mapping from node id to (pos_x, pos_y)
+    """
+    logger.debug(f'Updating positions of {len(positions)} nodes in vcs with id={vcs_id}.')
+
+    if len(positions) == 0:
+        return True
+
+    node_ids = list(positions.keys())
+
+    select_statement = MySQLStatementBuilder(db_connection)
+    stored_nodes = select_statement \
+        .select(CVS_NODES_TABLE, ['id', 'pos_x', 'pos_y']) \
+        .where(f'vcs = %s AND id IN {MySQLStatementBuilder.placeholder_array(len(node_ids))}', [vcs_id] + node_ids) \
+        .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
+
+    if len(stored_nodes) != len(node_ids):
+        raise exceptions.NodeNotFoundException
+
+    moved_nodes = [node['id'] for node in stored_nodes
+                   if (node['pos_x'], node['pos_y']) != positions[node['id']]]
+
+    if len(moved_nodes) == 0:
+        return True
+
+    case_statement = ' '.join(['WHEN %s THEN %s' for _ in range(len(moved_nodes))])
+    pos_x_values = [value for node_id in moved_nodes for value in (node_id, positions[node_id][0])]
+    pos_y_values = [value for node_id in moved_nodes for value in (node_id, positions[node_id][1])]
+
+    try:
+        update_statement = MySQLStatementBuilder(db_connection)
+        update_statement.update(
+            table=CVS_NODES_TABLE,
+            set_statement=f'pos_x = CASE id {case_statement} END, pos_y = CASE id {case_statement} END',
+            values=pos_x_values + pos_y_values
         )
-        update_node(db_connection, project_id, node.id, updated_node)
+        update_statement \
+            .where(f'vcs = %s AND id IN {MySQLStatementBuilder.placeholder_array(len(moved_nodes))}',
+                   [vcs_id] + moved_nodes) \
+            .execute(fetch_type=FetchType.FETCH_NONE)
+    except Error as e:
+        logger.debug(f'Error msg: {e.msg}')
+        raise exceptions.NodeFailedToUpdateException
 
     return True
 
 
 def save_dsm_matrix(db_connection: PooledMySQLConnection, project_id: int, vcs_id: int, dsm: List[List[str or float]],
                     user_id: int) -> bool:
-    upload_file = csv_from_matrix(dsm)
-    return save_dsm_file(db_connection, project_id, vcs_id, upload_file, user_id)
+    if len(dsm) == 0 or len(dsm[0]) == 0 or dsm[0][0] != 'Processes':
+        raise exceptions.ProcessesVcsMatchException
+    check_dsm_processes(db_connection, project_id, vcs_id, [row[0] for row in dsm[2:-1]])
+    delete_existing_dsm_file(db_connection, project_id, vcs_id, user_id)
+
+    # Written as csv straight into the file store. The matrix is generated here, so it is not checked like uploads are
+    subproject = core_project_storage.db_get_subproject_native(db_connection, CVS_APP_SID, project_id)
+    stored_file = file_storage.db_save_generated_file(
+        db_connection, 'dsm.csv', user_id, subproject.id,
+        lambda f: csv.writer(f, delimiter=',').writerows(dsm), encoding='utf-8')
+
+    insert_dsm_file(db_connection, vcs_id, stored_file.id)
+    return True
 
 
 def save_dsm_file(db_connection: PooledMySQLConnection, project_id: int,
@@ -300,57 +358,67 @@ def save_dsm_file(db_connection: PooledMySQLConnection, project_id: int,
         raise exceptions.InvalidFileTypeException
 
     with model_file.file_object as f:
-        f.seek(0)
-        tmp_file = f.read()
-        mime = magic.from_buffer(tmp_file)
+        try:
+            mime = file_storage.check_upload(f, MAX_FILE_SIZE)
+        except file_ex.FileSizeException:
+            raise exceptions.FileSizeException
         logger.debug(f'File mime: {mime}')
         # TODO doesn't work with windows if we create the file in excel.
         if mime != "CSV text" and "ASCII text" not in mime:
             raise exceptions.InvalidFileTypeException
 
-        if f.tell() > MAX_FILE_SIZE:
-            raise exceptions.FileSizeException
-
-        f.seek(0)
         dsm_file = pd.read_csv(f)
         logger.debug(f'File content: {dsm_file}')
-        vcs_table = vcs_storage.get_vcs_table(db_connection, project_id, vcs_id)
-        vcs_processes = get_process_names_from_rows(vcs_table)
+        check_dsm_processes(db_connection, project_id, vcs_id, dsm_file['Processes'].values[1:-1])
+        delete_existing_dsm_file(db_connection, project_id, vcs_id, user_id)
+
+        f.seek(0)
+        logger.debug(f'File content: {model_file}')
+        stored_file = file_storage.db_save_file(db_connection, model_file, MAX_FILE_SIZE)
 
-        if len(dsm_file['Processes'].values[1:-1]) != len(vcs_processes):
+    insert_dsm_file(db_connection, vcs_id, stored_file.id)
+    return True
+
+
+def check_dsm_processes(db_connection: PooledMySQLConnection, project_id: int, vcs_id: int, processes) -> None:
+    """
+    Checks that the processes of a DSM, without start and end, are the technical processes of the VCS
+    """
+    vcs_table = vcs_storage.get_vcs_table(db_connection, project_id, vcs_id)
+    vcs_processes = get_process_names_from_rows(vcs_table)
+
+    if len(processes) != len(vcs_processes):
+        raise exceptions.ProcessesVcsMatchException
+
+    for process in processes:
+        if process not in vcs_processes:
             raise exceptions.ProcessesVcsMatchException
 
-        for process in dsm_file['Processes'].values[1:-1]:
-            if process not in vcs_processes:
-                raise exceptions.ProcessesVcsMatchException
 
+def delete_existing_dsm_file(db_connection: PooledMySQLConnection, project_id: int, vcs_id: int, user_id: int) -> None:
+    try:
+        file_id = get_dsm_file_id(db_connection, project_id, vcs_id)
+        if file_id is not None:
+            delete_dsm_file(db_connection, project_id, vcs_id, file_id, user_id)
+    except file_ex.FileNotFoundException:
+        pass  # File doesn't exist, so we don't need to delete it
+    except Exception:
         try:
-            file_id = get_dsm_file_id(db_connection, project_id, vcs_id)
-            if file_id is not None:
-                delete_dsm_file(db_connection, project_id, vcs_id, file_id, user_id)
-        except file_ex.FileNotFoundException:
-            pass  # File doesn't exist, so we don't need to delete it
-        except Exception:
-            try:
-                # File does not exist in persistent storage but exists in database
-                delete_statement = MySQLStatementBuilder(db_connection)
-                _, rows = delete_statement.delete(CVS_DSM_FILES_TABLE) \
-                    .where('vcs = %s', [vcs_id]) \
-                    .execute(return_affected_rows=True)
-            except:
-                pass
+            # File does not exist in persistent storage but exists in database
+            delete_statement = MySQLStatementBuilder(db_connection)
+            _, rows = delete_statement.delete(CVS_DSM_FILES_TABLE) \
+                .where('vcs = %s', [vcs_id]) \
+                .execute(return_affected_rows=True)
+        except:
+            pass
 
-        f.seek(0)
-        logger.debug(f'File content: {model_file}')
-        stored_file = file_storage.db_save_file(db_connection, model_file)
 
+def insert_dsm_file(db_connection: PooledMySQLConnection, vcs_id: int, file_id: int) -> None:
     insert_statement = MySQLStatementBuilder(db_connection)
     insert_statement.insert(CVS_DSM_FILES_TABLE, CVS_DSM_FILES_COLUMNS) \
-        .set_values([vcs_id, stored_file.id]) \
+        .set_values([vcs_id, file_id]) \
         .execute(fetch_type=FetchType.FETCH_NONE)
 
-    return True
-
 
 def get_dsm_file_id(db_connection: PooledMySQLConnection, project_id: int, vcs_id: int) -> int:
     vcs_storage.check_vcs(db_connection, project_id, vcs_id)  # Check if vcs exists and matches project id
@@ -384,8 +452,8 @@ def get_dsm_file_path(db_connection: PooledMySQLConnection, project_id: int, vcs
 
 def get_dsm(db_connection: PooledMySQLConnection, project_id: int, vcs_id: int, user_id) -> List[List[str or float]]:
     try:
-        path = get_dsm_file_path(db_connection, project_id, vcs_id, user_id).path
-        with open(path, newline='') as f:
+        stored_file_path = get_dsm_file_path(db_connection, project_id, vcs_id, user_id)
+        with io.TextIOWrapper(file_storage.open_stored_file(stored_file_path), encoding='utf-8', newline='') as f:
             reader = csv.reader(f)
             data = list(reader)
     except Exception:
@@ -398,8 +466,8 @@ def delete_dsm_file(db_connection: PooledMySQLConnection, project_id: int, vcs_i
                     file_id: Optional[int], user_id: int) -> bool:
     if file_id is None:
         file_id = get_dsm_file_id(db_connection, project_id, vcs_id)
-    file_storage.db_delete_file(db_connection, file_id, user_id)
 
+    # Before the file, which would delete the row with it
     delete_statement = MySQLStatementBuilder(db_connection)
     _, rows = delete_statement.delete(CVS_DSM_FILES_TABLE) \
         .where('vcs = %s', [vcs_id]) \
@@ -408,19 +476,23 @@ def delete_dsm_file(db_connection: PooledMySQLConnection, project_id: int, vcs_i
     if rows == 0:
         raise exceptions.DSMFileFailedDeletionException
 
+    file_storage.db_delete_file(db_connection, file_id, user_id)
+
     return True
 
 def get_dsm_from_file_id(db_connection: PooledMySQLConnection, file_id: int, user_id: int) -> dict:
     try:
-        path = file_storage.db_get_file_path(db_connection, file_id, user_id)
+        stored_file_path = file_storage.db_get_file_path(db_connection, file_id, user_id)
+        file_object = file_storage.open_stored_file(stored_file_path)
     except Exception:
         raise file_ex.FileNotFoundException
-    return get_dsm_from_csv(path.path)
+    with file_object:
+        return get_dsm_from_csv(file_object)
 
 
-def get_dsm_from_csv(path) -> dict:
+def get_dsm_from_csv(csv_file) -> dict:
     try:
-        df = pd.read_csv(path)
+        df = pd.read_csv(csv_file)
         dsm = dict()
 
         for v in df.values:
@@ -431,21 +503,6 @@ def get_dsm_from_csv(path) -> dict:
         raise file_ex.FileNotFoundException
 
 
-def csv_from_matrix(matrix: List[List[str or float]]) -> UploadFile:
-    fd, path = tempfile.mkstemp()
-    try:
-        with open(path, "w+") as dsm_file:
-            csv_writer = csv.writer(dsm_file, delimiter=',')
-            csv_writer.writerows(matrix)
-    finally:
-        dsm_file = open(path, "r+b")
-        upload_file = UploadFile(filename=dsm_file.name + ".csv", file=dsm_file)
-        os.close(fd)
-        os.remove(path)
-
-    return upload_file
-
-
 def get_process_names_from_rows(rows: List[vcs_models.VcsRow]) -> List[str]:
     processes = []
     for row in rows:
@@ -58,7 +58,7 @@ def edit_formulas(project_id: int, vcs_id: int, design_group_id: int, formulas:
 
 
 def get_all_formulas(project_id: int, vcs_id: int, design_group_id: int) -> List[models.FormulaRowGet]:
-    with get_connection() as con:
+    with get_connection(read_only=True) as con:
         try:
             res = storage.get_all_formulas(con, project_id, vcs_id, design_group_id)
             con.commit()
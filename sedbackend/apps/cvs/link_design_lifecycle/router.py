@@ -5,6 +5,7 @@ from fastapi import Depends, APIRouter
 from sedbackend.apps.core.authentication.utils import get_current_active_user
 from sedbackend.apps.core.projects.dependencies import SubProjectAccessChecker
 from sedbackend.apps.core.projects.models import AccessLevel
+from sedbackend.apps.core.responses import FastJSONResponse
 from sedbackend.apps.core.users.models import User
 from sedbackend.apps.cvs.link_design_lifecycle import models, implementation
 from sedbackend.apps.cvs.project.router import CVS_APP_SID
@@ -16,10 +17,11 @@ router = APIRouter()
     '/project/{native_project_id}/vcs/{vcs_id}/design-group/{dg_id}/formulas/all',
     summary=f'Get all formulas for a single vcs and design group',
     response_model=List[models.FormulaRowGet],
+    response_class=FastJSONResponse,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_all_formulas(native_project_id: int, vcs_id: int, dg_id: int) -> List[models.FormulaRowGet]:
-    return implementation.get_all_formulas(native_project_id, vcs_id, dg_id)
+def get_all_formulas(native_project_id: int, vcs_id: int, dg_id: int) -> FastJSONResponse:
+    return FastJSONResponse(implementation.get_all_formulas(native_project_id, vcs_id, dg_id))
 
 
 @router.put(
@@ -28,8 +30,8 @@ async def get_all_formulas(native_project_id: int, vcs_id: int, dg_id: int) -> L
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def edit_formula_table(native_project_id: int, vcs_id: int, dg_id: int,
-                             formulas: List[models.FormulaRowPost]) -> bool:
+def edit_formula_table(native_project_id: int, vcs_id: int, dg_id: int,
+                       formulas: List[models.FormulaRowPost]) -> bool:
     return implementation.edit_formulas(native_project_id, vcs_id, dg_id, formulas)
 
 
@@ -39,7 +41,7 @@ async def edit_formula_table(native_project_id: int, vcs_id: int, dg_id: int,
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def delete_formulas(native_project_id: int, vcs_row_id: int, dg_id: int) -> bool:
+def delete_formulas(native_project_id: int, vcs_row_id: int, dg_id: int) -> bool:
     return implementation.delete_formulas(native_project_id, vcs_row_id, dg_id)
 
 
@@ -49,5 +51,5 @@ async def delete_formulas(native_project_id: int, vcs_row_id: int, dg_id: int) -
     response_model=List[models.VcsDgPairs],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_vcs_dg_pairs(native_project_id: int) -> List[models.VcsDgPairs]:
+def get_vcs_dg_pairs(native_project_id: int) -> List[models.VcsDgPairs]:
     return implementation.get_vcs_dg_pairs(native_project_id)
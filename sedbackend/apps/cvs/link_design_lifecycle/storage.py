@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Set, Dict, Tuple
 
 from fastapi.logger import logger
 from mysql.connector.pooling import PooledMySQLConnection
@@ -48,6 +48,12 @@ CVS_STAKEHOLDER_NEEDS_TABLE = "cvs_stakeholder_needs"
 CVS_VCS_ROWS_TABLE = "cvs_vcs_rows"
 CVS_VCS_NEED_DRIVERS_TABLE = "cvs_vcs_need_drivers"
 
+FORMULA_TEXT_COLUMNS = ["time", "time_latex", "cost", "cost_latex", "revenue", "revenue_latex"]
+FORMULA_TEXT_PATTERN = re.compile(r'\{(?P<tag>vd|ef):(?P<id>\d+),"(?P<name>.*?)"\}')
+FORMULA_LATEX_PATTERN = re.compile(
+    r"\\class\{(?P<tag>vd|ef)\}\{\\identifier\{(?P=tag):(?P<id>\d+)\}\{\\text\{(?P<name>.*?)\}\}\}"
+)
+
 
 def create_formulas(
     db_connection: PooledMySQLConnection,
@@ -392,7 +398,7 @@ def get_all_formulas(
     vcs_id: int,
     design_group_id: int,
 ) -> List[models.FormulaRowGet]:
-    logger.debug(f"Fetching all formulas with vcs_id={vcs_id}")
+    logger.debug("Fetching all formulas with vcs_id=%s", vcs_id)
 
     get_design_group(
         db_connection, project_id, design_group_id
@@ -446,7 +452,6 @@ def get_all_formulas(
 
     if vcs_rows:
         with db_connection.cursor(prepared=True) as cursor:
-            logger.debug(f"Running")
             cursor.execute(
                 f"SELECT {CVS_VALUE_DRIVERS_TABLE}.id, {CVS_VALUE_DRIVERS_TABLE}.name, {CVS_VALUE_DRIVERS_TABLE}.unit, {CVS_VALUE_DRIVERS_TABLE}.project, {CVS_VCS_ROWS_TABLE}.id AS vcs_row FROM {CVS_VCS_ROWS_TABLE} "
                 f"INNER JOIN {CVS_STAKEHOLDER_NEEDS_TABLE} ON {CVS_STAKEHOLDER_NEEDS_TABLE}.vcs_row = {CVS_VCS_ROWS_TABLE}.id "
@@ -458,15 +463,22 @@ def get_all_formulas(
             all_row_vds = [
                 dict(zip(cursor.column_names, row)) for row in cursor.fetchall()
             ]
-            logger.debug(f"All row vds: {all_row_vds}")
-
-    formulas = []
+            logger.debug("Fetched %s value drivers for %s vcs rows", len(all_row_vds), len(vcs_rows))
+
+    res_by_row = {r["vcs_row"]: r for r in res}
+    row_vds_by_row, used_vds_by_row, used_efs_by_row = {}, {}, {}
+    for vd in all_row_vds:
+        row_vds_by_row.setdefault(vd["vcs_row"], []).append(vd)
+    for vd in all_used_vds:
+        used_vds_by_row.setdefault((vd["vcs_row"], vd["design_group"]), []).append(vd)
+    for ef in all_used_efs:
+        used_efs_by_row.setdefault((ef["vcs_row"], ef["design_group"]), []).append(ef)
+
+    formula_rows = []
     for row in vcs_rows:
-        row_res = [r for r in res if r["vcs_row"] == row.id]
-        r = {}
-        if row_res:
-            r = row_res[0]
-        else:
+        r = res_by_row.get(row.id)
+        if r is None:
+            r = {}
             r["vcs_row"] = row.id
             r["design_group"] = design_group_id
             r["time"] = ""
@@ -480,140 +492,124 @@ def get_all_formulas(
             r["revenue_comment"] = ""
             r["time_unit"] = TimeFormat.YEAR
             r["rate"] = Rate.PRODUCT
-        r["row_value_drivers"] = [vd for vd in all_row_vds if vd["vcs_row"] == row.id]
-        r["used_value_drivers"] = [
-            vd
-            for vd in all_used_vds
-            if vd["vcs_row"] == row.id and vd["design_group"] == r["design_group"]
-        ]
-        r["used_external_factors"] = [
-            ef
-            for ef in all_used_efs
-            if ef["vcs_row"] == row.id and ef["design_group"] == r["design_group"]
-        ]
-        formulas.append(populate_formula_row(db_connection, r))
+        r["row_value_drivers"] = row_vds_by_row.get(row.id, [])
+        r["used_value_drivers"] = used_vds_by_row.get((row.id, r["design_group"]), [])
+        r["used_external_factors"] = used_efs_by_row.get((row.id, r["design_group"]), [])
+        formula_rows.append(r)
+
+    # Resolve the names of all value drivers and external factors referenced in any formula at once
+    value_driver_ids, external_factor_ids = find_formula_identifiers(
+        [r[column] for r in formula_rows for column in FORMULA_TEXT_COLUMNS]
+    )
+    identifier_names = get_formula_identifier_names(
+        db_connection, value_driver_ids, external_factor_ids
+    )
 
-    return formulas
+    return [populate_formula_row(r, identifier_names) for r in formula_rows]
 
 
-def populate_formula(
+def find_formula_identifiers(texts: List[str]) -> Tuple[Set[int], Set[int]]:
+    """
+    Finds the ids of all value drivers and external factors referenced in the given formula texts and latex strings
+    """
+    value_driver_ids = set()
+    external_factor_ids = set()
+
+    for text in texts:
+        if not text:
+            continue
+        for pattern in [FORMULA_TEXT_PATTERN, FORMULA_LATEX_PATTERN]:
+            for match in pattern.finditer(text):
+                if match.group("tag") == "vd":
+                    value_driver_ids.add(int(match.group("id")))
+                else:
+                    external_factor_ids.add(int(match.group("id")))
+
+    return value_driver_ids, external_factor_ids
+
+
+def get_formula_identifier_names(
     db_connection: PooledMySQLConnection,
-    text: str = "",
-    latex: str = "",
-    comment: str = "",
-) -> models.Formula:
-    used_value_drivers = set()
-    used_external_factors = set()
-    # find all value drivers and external factors
-    vd_pattern = r'\{vd:(?P<id>\d+),"([^"]+)"\}'
-    vd_matches = re.findall(vd_pattern, text)
-    for vd_id, _ in vd_matches:
-        used_value_drivers.add(vd_id)
-    ef_pattern = r'\{ef:(?P<id>\d+),"([^"]+)"\}'
-    ef_matches = re.findall(ef_pattern, text)
-    for ef_id, _ in ef_matches:
-        used_external_factors.add(ef_id)
-
-    # fetch value drivers and external factors
-    vd_names = {}
-    ef_names = {}
-    if len(used_value_drivers):
+    value_driver_ids: Set[int],
+    external_factor_ids: Set[int],
+) -> Dict[str, Dict[int, str]]:
+    """
+    Fetches the display names of value drivers and external factors with one query per kind.
+    Returns the names indexed by tag ("vd" or "ef") and id.
+    """
+    identifier_names = {"vd": {}, "ef": {}}
+
+    for tag, ids, table, columns in [
+        ("vd", value_driver_ids, CVS_VALUE_DRIVERS_TABLE, CVS_VALUE_DRIVERS_COLUMNS),
+        ("ef", external_factor_ids, CVS_EXTERNAL_FACTORS_TABLE, CVS_EXTERNAL_FACTORS_COLUMNS),
+    ]:
+        if not len(ids):
+            continue
         select_statement = MySQLStatementBuilder(db_connection)
-        value_drivers = (
-            select_statement.select(CVS_VALUE_DRIVERS_TABLE, CVS_VALUE_DRIVERS_COLUMNS)
+        results = (
+            select_statement.select(table, columns)
             .where(
-                "id IN ("
-                + ",".join(["%s" for _ in range(len(used_value_drivers))])
-                + ")",
-                used_value_drivers,
+                f"id IN {MySQLStatementBuilder.placeholder_array(len(ids))}",
+                list(ids),
             )
             .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
         )
-        for vd in value_drivers:
-            vd_names[
-                str(vd["id"])
-            ] = f"{vd['name']} [{vd['unit'] if vd['unit'] else 'N/A'}]"
-    if len(used_external_factors):
-        select_statement = MySQLStatementBuilder(db_connection)
-        external_factors = (
-            select_statement.select(
-                CVS_EXTERNAL_FACTORS_TABLE, CVS_EXTERNAL_FACTORS_COLUMNS
-            )
-            .where(
-                "id IN ("
-                + ",".join(["%s" for _ in range(len(used_external_factors))])
-                + ")",
-                used_external_factors,
-            )
-            .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
+        for result in results:
+            identifier_names[tag][
+                result["id"]
+            ] = f"{result['name']} [{result['unit'] if result['unit'] else 'N/A'}]"
+
+    return identifier_names
+
+
+def populate_formula(
+    identifier_names: Dict[str, Dict[int, str]],
+    text: str = "",
+    latex: str = "",
+    comment: str = "",
+) -> models.Formula:
+    def identifier_name(match) -> str:
+        return identifier_names[match.group("tag")].get(
+            int(match.group("id")), "UNDEFINED [N/A]"
         )
-        for ef in external_factors:
-            ef_names[
-                str(ef["id"])
-            ] = f"{ef['name']} [{ef['unit'] if ef['unit'] else 'N/A'}]"
-
-    # replace value driver and external factors names in text
-    for vd in used_value_drivers:
-        vd_replace_pattern = r"\{vd:" + vd + r',"(.*?)"\}'
-        vd_name = vd_names[vd] if vd in vd_names else "UNDEFINED [N/A]"
-        text = re.sub(vd_replace_pattern, "{vd:" + vd + ',"' + vd_name + '"}', text)
-        vd_latex_pattern = r"\\class{vd}{\\identifier{vd:" + vd + r"}{\\text{(.*?)}}}"
-        latex_new = (
-            re.escape("\\class")
-            + "{vd}{"
-            + re.escape("\\identifier")
-            + "{vd:"
-            + str(vd)
-            + "}{"
-            + re.escape("\\text")
-            + "{"
-            + str(vd_name)
-            + "}}}"
+
+    # replace value driver and external factors names in text and latex
+    if text:
+        text = FORMULA_TEXT_PATTERN.sub(
+            lambda m: "{" + m.group("tag") + ":" + m.group("id") + ',"' + identifier_name(m) + '"}',
+            text,
         )
-        latex = re.sub(vd_latex_pattern, latex_new, latex)
-    for ef in used_external_factors:
-        ef_replace_pattern = r"\{ef:" + ef + r',"(.*?)"\}'
-        ef_name = ef_names[ef] if ef in ef_names else "UNDEFINED [N/A]"
-        text = re.sub(ef_replace_pattern, "{ef:" + ef + ',"' + ef_name + '"}', text)
-        ef_latex_pattern = r"\\class{ef}{\\identifier{ef:" + ef + r"}{\\text{(.*?)}}}"
-        latex_new = (
-            re.escape("\\class")
-            + "{ef}{"
-            + re.escape("\\identifier")
-            + "{ef:"
-            + str(ef)
-            + "}{"
-            + re.escape("\\text")
-            + "{"
-            + str(ef_name)
-            + "}}}"
+    if latex:
+        latex = FORMULA_LATEX_PATTERN.sub(
+            lambda m: "\\class{" + m.group("tag") + "}{\\identifier{" + m.group("tag") + ":" + m.group("id")
+            + "}{\\text{" + identifier_name(m) + "}}}",
+            latex,
         )
-        latex = re.sub(ef_latex_pattern, latex_new, latex)
 
     return models.Formula(text=text, latex=latex, comment=comment)
 
 
 def populate_formula_row(
-    db_connection: PooledMySQLConnection, db_result
+    db_result, identifier_names: Dict[str, Dict[int, str]]
 ) -> models.FormulaRowGet:
     return models.FormulaRowGet(
         vcs_row_id=db_result["vcs_row"],
         design_group_id=db_result["design_group"],
         time=populate_formula(
-            db_connection,
+            identifier_names,
             text=db_result["time"],
             latex=db_result["time_latex"],
             comment=db_result["time_comment"],
         ),
         time_unit=db_result["time_unit"],
         cost=populate_formula(
-            db_connection,
+            identifier_names,
             text=db_result["cost"],
             latex=db_result["cost_latex"],
             comment=db_result["cost_comment"],
         ),
         revenue=populate_formula(
-            db_connection,
+            identifier_names,
             text=db_result["revenue"],
             latex=db_result["revenue_latex"],
             comment=db_result["revenue_comment"],
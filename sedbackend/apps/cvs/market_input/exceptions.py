@@ -1,3 +1,6 @@
+from typing import List
+
+
 class ExternalFactorNotFoundException(Exception):
     pass
 
@@ -17,3 +20,17 @@ class ExternalFactorFailedDeletionException(Exception):
 
 class ExternalFactorFormulasNotFoundException(Exception):
     pass
+
+
+class ExternalFactorValueImportFileTypeException(Exception):
+    pass
+
+
+class ExternalFactorValueImportFileException(Exception):
+    def __init__(self, message: str = None):
+        self.message = message
+
+
+class ExternalFactorValueImportColumnException(Exception):
+    def __init__(self, columns: List[str] = None):
+        self.columns = columns
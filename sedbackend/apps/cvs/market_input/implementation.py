@@ -1,10 +1,10 @@
-from typing import List
+from typing import List, Iterator
 
-from fastapi import HTTPException
+from fastapi import HTTPException, UploadFile
 from starlette import status
 
 from sedbackend.apps.core.authentication import exceptions as auth_ex
-from sedbackend.apps.core.db import get_connection
+from sedbackend.apps.core.db import get_connection, JOBS_POOL
 from sedbackend.apps.cvs.project import exceptions as proj_exceptions
 from sedbackend.apps.cvs.market_input import models, storage, exceptions
 from sedbackend.apps.cvs.vcs import exceptions as vcs_exceptions
@@ -228,3 +228,32 @@ def delete_external_factor_value(project_id: int, vcs_id: int, external_factor_i
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f'External factor with id={external_factor_id} is not a part from project with id={project_id}.',
         )
+
+
+def import_external_factor_values(project_id: int, file: UploadFile) -> models.ExternalFactorValueImportResult:
+    try:
+        with get_connection(JOBS_POOL) as con:
+            res = storage.import_external_factor_values(con, project_id, file)
+            con.commit()
+            return res
+    except exceptions.ExternalFactorValueImportFileTypeException:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f'Wrong filetype. Market input values can be imported from .csv or .xlsx files.'
+        )
+    except exceptions.ExternalFactorValueImportFileException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Could not read the file. {e.message}.'
+        )
+    except exceptions.ExternalFactorValueImportColumnException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Columns do not match the market inputs of the project: {", ".join(e.columns)}'
+            if e.columns else f'Could not find a header row in the file.'
+        )
+
+
+def export_external_factor_values(project_id: int) -> Iterator[str]:
+    with get_connection(JOBS_POOL) as con:
+        yield from storage.export_external_factor_values(con, project_id)
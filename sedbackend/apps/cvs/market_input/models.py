@@ -29,3 +29,14 @@ class ExternalFactorValue(BaseModel):
     name: str
     unit: str
     external_factor_values: Optional[List[VcsEFValuePair]]
+
+
+class ExternalFactorValueImportError(BaseModel):
+    row: int
+    message: str
+
+
+class ExternalFactorValueImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ExternalFactorValueImportError]
@@ -1,6 +1,7 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, UploadFile
+from fastapi.responses import StreamingResponse
 
 from sedbackend.apps.core.projects.dependencies import SubProjectAccessChecker
 from sedbackend.apps.core.projects.models import AccessLevel
@@ -21,7 +22,7 @@ router = APIRouter()
     response_model=List[models.ExternalFactor],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_all_market_input(native_project_id: int) -> List[models.ExternalFactor]:
+def get_all_market_input(native_project_id: int) -> List[models.ExternalFactor]:
     return implementation.get_all_external_factors(native_project_id)
 
 
@@ -31,7 +32,7 @@ async def get_all_market_input(native_project_id: int) -> List[models.ExternalFa
     response_model=models.ExternalFactor,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def create_market_input(native_project_id: int, market_input: models.ExternalFactorPost) -> models.ExternalFactor:
+def create_market_input(native_project_id: int, market_input: models.ExternalFactorPost) -> models.ExternalFactor:
     return implementation.create_external_factor(native_project_id, market_input)
 
 
@@ -41,8 +42,8 @@ async def create_market_input(native_project_id: int, market_input: models.Exter
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def update_market_input(native_project_id: int, market_input_id: int,
-                              external_factor: models.ExternalFactorPost) -> bool:
+def update_market_input(native_project_id: int, market_input_id: int,
+                        external_factor: models.ExternalFactorPost) -> bool:
     return implementation.update_external_factor(native_project_id,
                                                  ExternalFactor(id=market_input_id, name=external_factor.name,
                                                                 unit=external_factor.unit))
@@ -54,7 +55,7 @@ async def update_market_input(native_project_id: int, market_input_id: int,
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def delete_market_input(native_project_id: int, market_input_id: int) -> bool:
+def delete_market_input(native_project_id: int, market_input_id: int) -> bool:
     return implementation.delete_external_factor(native_project_id, market_input_id)
 
 
@@ -66,7 +67,7 @@ async def delete_market_input(native_project_id: int, market_input_id: int) -> b
     summary='Create or update values for market inputs',
     response_model=bool
 )
-async def update_market_values(native_project_id: int, ef_values: List[models.ExternalFactorValue]) -> bool:
+def update_market_values(native_project_id: int, ef_values: List[models.ExternalFactorValue]) -> bool:
     return implementation.update_external_factor_values(native_project_id, ef_values)
 
 
@@ -75,5 +76,31 @@ async def update_market_values(native_project_id: int, ef_values: List[models.Ex
     summary='Fetch all market input values for a project',
     response_model=List[models.ExternalFactorValue]
 )
-async def get_all_market_values(native_project_id: int) -> List[models.ExternalFactorValue]:
+def get_all_market_values(native_project_id: int) -> List[models.ExternalFactorValue]:
     return implementation.get_all_external_factor_values(native_project_id)
+
+
+@router.post(
+    '/project/{native_project_id}/market-input-values/import',
+    summary='Import market input values from a .csv or .xlsx sheet. The sheet has one VCS per row, identified by an '
+            '"id" and/or "vcs" (name) column, and one column per market input named by the market input name, '
+            '"name [unit]" or id. Empty cells are left unchanged.',
+    response_model=models.ExternalFactorValueImportResult,
+    dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
+)
+def import_market_values(native_project_id: int, file: UploadFile) -> models.ExternalFactorValueImportResult:
+    return implementation.import_external_factor_values(native_project_id, file)
+
+
+@router.get(
+    '/project/{native_project_id}/market-input-values/export',
+    summary='Export all market input values for a project as a .csv sheet, in the format accepted by the import',
+    response_class=StreamingResponse,
+    dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
+)
+def export_market_values(native_project_id: int) -> StreamingResponse:
+    return StreamingResponse(
+        implementation.export_external_factor_values(native_project_id),
+        media_type='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="market-input-values-{native_project_id}.csv"'}
+    )
@@ -1,5 +1,10 @@
-from typing import List
+import csv
+import io
+import math
+import os
+from typing import List, Set, Tuple, Dict, Optional, Iterator
 
+from fastapi import UploadFile
 from fastapi.logger import logger
 from mysql.connector.pooling import PooledMySQLConnection
 
@@ -7,8 +12,10 @@ from mysqlsb import MySQLStatementBuilder, FetchType, Sort
 from sedbackend.apps.cvs.market_input import models, exceptions
 from sedbackend.apps.cvs.market_input.models import ExternalFactorValue, VcsEFValuePair, ExternalFactor, \
     ExternalFactorPost
-from sedbackend.apps.cvs.vcs import storage as vcs_storage
+from sedbackend.apps.cvs.vcs import storage as vcs_storage, exceptions as vcs_exceptions
 from sedbackend.apps.cvs.project import exceptions as project_exceptions
+from sedbackend.libs.spreadsheets.reader import read_sheet
+from sedbackend.libs.spreadsheets.exceptions import InvalidSheetException, UnsupportedSheetTypeException
 
 CVS_MARKET_INPUT_TABLE = 'cvs_market_inputs'
 CVS_MARKET_INPUT_COLUMN = ['id', 'project', 'name', 'unit']
@@ -16,6 +23,11 @@ CVS_MARKET_INPUT_COLUMN = ['id', 'project', 'name', 'unit']
 CVS_MARKET_VALUES_TABLE = 'cvs_market_input_values'
 CVS_MARKET_VALUES_COLUMN = ['vcs', 'market_input', 'value']
 
+BULK_CHUNK_SIZE = 1000  # Max rows per multi-row statement
+MARKET_VALUES_IMPORT_BATCH_SIZE = 5000  # Values upserted per batch when importing from file
+MARKET_VALUES_IMPORT_MAX_ERRORS = 1000  # Max number of row errors reported when importing from file
+MARKET_VALUES_EXPORT_CHUNK_ROWS = 100  # VCS rows per streamed chunk when exporting
+
 
 ########################################################################################################################
 # Market Input
@@ -179,67 +191,127 @@ def update_external_factor_value(db_connection: PooledMySQLConnection, project_i
     return True
 
 
-# Compare previously stored list of ExternalFactorValues with an updated version and
-# deletes any values that don't appear in the new one
-def compare_and_delete_external_factor_values(db_connection: PooledMySQLConnection, project_id: int,
-                                              prev_ef_values: List[models.ExternalFactorValue],
-                                              new_ef_values: List[models.ExternalFactorValue]):
-    # Delete external factor values that does not exist in the new table but did in the previous one
-    efv_dict2 = {efv.id: {vcs_pair.vcs_id for vcs_pair in efv.external_factor_values} for efv in new_ef_values}
-    for efv in prev_ef_values:
-        parent_id = efv.id
-        if parent_id in efv_dict2:
-            vcs_ids_set1 = {vcs_pair.vcs_id for vcs_pair in efv.external_factor_values}
-            vcs_ids_set2 = efv_dict2[parent_id]
-            for vcs_id in vcs_ids_set1 - vcs_ids_set2:
-                delete_external_factor_value(db_connection, project_id, vcs_id, parent_id)
-
-    return True
+# Makes the stored external factors and values match the input. The difference against the stored table is computed
+# in memory, and then written with set-based statements
+def update_external_factor_values(db_connection: PooledMySQLConnection, project_id: int,
+                                  ef_values: List[models.ExternalFactorValue]) -> bool:
+    logger.debug(f'Update external factor values for project={project_id}')
 
+    # Index stored external factors and values for comparisons
+    prev_ef_values = {efv.id: efv for efv in get_all_external_factor_values(db_connection, project_id)}
+    prev_values = {(efv.id, pair.vcs_id): pair.value
+                   for efv in prev_ef_values.values() for pair in efv.external_factor_values or []}
+
+    check_vcss_in_project(db_connection, project_id,
+                          {pair.vcs_id for efv in ef_values for pair in efv.external_factor_values or []})
+
+    kept_ef_ids = {efv.id for efv in ef_values if efv.id in prev_ef_values}
+    removed_ef_ids = [ef_id for ef_id in prev_ef_values if ef_id not in kept_ef_ids]
+    changed_efs = [efv for efv in ef_values if efv.id in prev_ef_values and
+                   (prev_ef_values[efv.id].name != efv.name or prev_ef_values[efv.id].unit != efv.unit)]
+    new_efs = [efv for efv in ef_values if efv.id not in prev_ef_values]
+
+    # Delete removed external factors. Their values are removed by cascade
+    if len(removed_ef_ids):
+        delete_statement = MySQLStatementBuilder(db_connection)
+        delete_statement \
+            .delete(CVS_MARKET_INPUT_TABLE) \
+            .where(f'project = %s AND id IN {MySQLStatementBuilder.placeholder_array(len(removed_ef_ids))}',
+                   [project_id] + removed_ef_ids) \
+            .execute(fetch_type=FetchType.FETCH_NONE)
+
+    if len(changed_efs):
+        query = f'INSERT INTO {CVS_MARKET_INPUT_TABLE} (id, project, name, unit) ' \
+                f'VALUES {",".join(["(%s, %s, %s, %s)" for _ in range(len(changed_efs))])} ' \
+                f'ON DUPLICATE KEY UPDATE name = VALUES(name), unit = VALUES(unit)'
+        with db_connection.cursor(prepared=True) as cursor:
+            cursor.execute(query, [v for efv in changed_efs for v in (efv.id, project_id, efv.name, efv.unit)])
+
+    new_ef_ids = create_external_factors(db_connection, project_id,
+                                         [ExternalFactorPost(name=efv.name, unit=efv.unit) for efv in new_efs])
+
+    new_values = {}
+    for efv in ef_values:
+        if efv.id in kept_ef_ids:
+            new_values.update({(efv.id, pair.vcs_id): pair.value for pair in efv.external_factor_values or []})
+    for ef_id, efv in zip(new_ef_ids, new_efs):
+        new_values.update({(ef_id, pair.vcs_id): pair.value for pair in efv.external_factor_values or []})
+
+    # Delete values that have been removed from external factors that are kept
+    removed_values = [key for key in prev_values if key[0] in kept_ef_ids and key not in new_values]
+    for i in range(0, len(removed_values), BULK_CHUNK_SIZE):
+        chunk = removed_values[i:i + BULK_CHUNK_SIZE]
+        delete_statement = MySQLStatementBuilder(db_connection)
+        delete_statement \
+            .delete(CVS_MARKET_VALUES_TABLE) \
+            .where(f'(market_input, vcs) IN ({",".join(["(%s, %s)" for _ in range(len(chunk))])})',
+                   [v for key in chunk for v in key]) \
+            .execute(fetch_type=FetchType.FETCH_NONE)
+
+    upsert_external_factor_values(db_connection, [(vcs_id, ef_id, value)
+                                                  for (ef_id, vcs_id), value in new_values.items()
+                                                  if prev_values.get((ef_id, vcs_id)) != value])
 
-# Removes, updates or adds ExternalFactors based on differences between stored and new
-# so everything matches the new list
-def sync_new_external_factors(db_connection: PooledMySQLConnection, project_id: int,
-                              prev_ef_values: List[models.ExternalFactorValue],
-                              new_ef_values: List[models.ExternalFactorValue]):
-
-    ef_ids_to_remove = {efv.id for efv in prev_ef_values} - {efv.id for efv in new_ef_values}
-    for ef_remove_id in ef_ids_to_remove:
-        delete_external_factor(db_connection, project_id, ef_remove_id)
-    updated_ef_values = [efv for efv in prev_ef_values if efv.id not in ef_ids_to_remove]
-
-    for index, new_efv in enumerate(new_ef_values):
-        matching_efv = next((efv for efv in updated_ef_values if efv.id == new_efv.id), None)
-        if matching_efv:
-            if matching_efv.name != new_efv.name or matching_efv.unit != new_efv.unit:
-                update_external_factor(db_connection, project_id,
-                                       ExternalFactor(id=new_efv.id, name=new_efv.name, unit=new_efv.unit))
-            updated_ef_values[index] = new_efv
-        else:
-            new_ef = create_external_factor(db_connection, project_id,
-                                            ExternalFactorPost(name=new_efv.name, unit=new_efv.unit))
-            updated_ef_values.append(ExternalFactorValue(id=new_ef.id, name=new_ef.name, unit=new_ef.unit,
-                                                         external_factor_values=new_efv.external_factor_values))
+    return True
 
-    return updated_ef_values
 
+def create_external_factors(db_connection: PooledMySQLConnection, project_id: int,
+                            external_factors: List[models.ExternalFactorPost]) -> List[int]:
+    """
+    Creates external factors with multi-row inserts and returns their ids, in the same order as the input.
+    """
+    ef_ids = []
+    for i in range(0, len(external_factors), BULK_CHUNK_SIZE):
+        chunk = external_factors[i:i + BULK_CHUNK_SIZE]
+        insert_statement = MySQLStatementBuilder(db_connection)
+        insert_statement \
+            .insert(table=CVS_MARKET_INPUT_TABLE, columns=CVS_MARKET_INPUT_COLUMN[1:]) \
+            .set_values([[project_id, ef.name, ef.unit] for ef in chunk]) \
+            .execute(fetch_type=FetchType.FETCH_NONE)
+
+        # last_insert_id is the id of the first inserted row, and ids within a statement are increasing
+        select_statement = MySQLStatementBuilder(db_connection)
+        res = select_statement \
+            .select(CVS_MARKET_INPUT_TABLE, ['id']) \
+            .where('project = %s AND id >= %s', [project_id, insert_statement.last_insert_id]) \
+            .order_by(['id'], Sort.ASCENDING) \
+            .limit(len(chunk)) \
+            .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
+        ef_ids += [r['id'] for r in res]
+
+    return ef_ids
+
+
+def upsert_external_factor_values(db_connection: PooledMySQLConnection, values: List[Tuple[int, int, float]]) -> bool:
+    """
+    Inserts or updates external factor values with multi-row upserts.
+
+    :param values: List of (vcs id, external factor id, value)
+    """
+    for i in range(0, len(values), BULK_CHUNK_SIZE):
+        chunk = values[i:i + BULK_CHUNK_SIZE]
+        query = f'INSERT INTO {CVS_MARKET_VALUES_TABLE} (vcs, market_input, value) ' \
+                f'VALUES {",".join(["(%s, %s, %s)" for _ in range(len(chunk))])} ' \
+                f'ON DUPLICATE KEY UPDATE value = VALUES(value)'
+        with db_connection.cursor(prepared=True) as cursor:
+            cursor.execute(query, [v for value in chunk for v in value])
 
-def update_external_factor_values(db_connection: PooledMySQLConnection, project_id: int,
-                                  ef_values: List[models.ExternalFactorValue]) -> bool:
-    logger.debug(f'Update external factor values for project={project_id}')
+    return True
 
-    old_ef_values = get_all_external_factor_values(db_connection, project_id) # get stored values for comparisons
 
-    # Delete external factor values that have been removed
-    if len(old_ef_values) > 0:
-        compare_and_delete_external_factor_values(db_connection, project_id, old_ef_values, ef_values)
+def check_vcss_in_project(db_connection: PooledMySQLConnection, project_id: int, vcs_ids: Set[int]) -> bool:
+    if len(vcs_ids) == 0:
+        return True
 
-    # Add, update or remove External Factors that has changed since previously
-    ef_values_new_ids = sync_new_external_factors(db_connection, project_id, old_ef_values, ef_values)
+    select_statement = MySQLStatementBuilder(db_connection)
+    res = select_statement \
+        .select(vcs_storage.CVS_VCS_TABLE, ['id']) \
+        .where(f'project = %s AND id IN {MySQLStatementBuilder.placeholder_array(len(vcs_ids))}',
+               [project_id] + list(vcs_ids)) \
+        .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
 
-    # Update values for External factors
-    for ef_value in ef_values_new_ids:
-        update_external_factor_value(db_connection, project_id, ef_value)
+    if len(res) != len(vcs_ids):
+        raise vcs_exceptions.VCSNotFoundException
 
     return True
 
@@ -276,3 +348,199 @@ def delete_external_factor_value(db_connection: PooledMySQLConnection, project_i
         raise exceptions.ExternalFactorFailedDeletionException
 
     return True
+
+
+########################################################################################################################
+# External Factor value import/export
+########################################################################################################################
+
+def get_project_vcs_names(db_connection: PooledMySQLConnection, project_id: int) -> Dict[int, str]:
+    select_statement = MySQLStatementBuilder(db_connection)
+    res = select_statement \
+        .select(vcs_storage.CVS_VCS_TABLE, ['id', 'name']) \
+        .where('project = %s', [project_id]) \
+        .order_by(['id'], Sort.ASCENDING) \
+        .execute(fetch_type=FetchType.FETCH_ALL, dictionary=True)
+
+    return {r['id']: r['name'] for r in res}
+
+
+def map_external_factor_value_columns(header: list, external_factors: List[models.ExternalFactor]) \
+        -> Tuple[Optional[int], Optional[int], Dict[int, int]]:
+    """
+    Maps the header of an imported sheet to the VCS columns and the external factors of the project.
+    VCSs are identified by an "id" column, a "vcs" (name) column, or both. External factor columns may be
+    named by external factor name, "name [unit]" or id.
+
+    :return: Index of the VCS id column, index of the VCS name column, and a mapping from column index to
+    external factor id
+    """
+    ef_lookup = {}
+    for ef in external_factors:
+        ef_lookup[ef.name.strip().lower()] = ef.id
+        ef_lookup[f'{ef.name} [{ef.unit}]'.strip().lower()] = ef.id
+        ef_lookup[str(ef.id)] = ef.id
+
+    header = ['' if cell is None else str(cell).strip().lower() for cell in header]
+    id_index = header.index('id') if 'id' in header else None
+    vcs_index = header.index('vcs') if 'vcs' in header else None
+    if id_index is None and vcs_index is None:
+        vcs_index = 0
+
+    ef_columns = {}
+    unknown_columns = []
+    for i, cell in enumerate(header):
+        if i in [id_index, vcs_index] or cell == '':
+            continue
+        if cell in ef_lookup:
+            ef_columns[i] = ef_lookup[cell]
+        else:
+            unknown_columns.append(cell)
+
+    if len(unknown_columns):
+        raise exceptions.ExternalFactorValueImportColumnException(unknown_columns)
+
+    return id_index, vcs_index, ef_columns
+
+
+def import_external_factor_values(db_connection: PooledMySQLConnection, project_id: int,
+                                  file: UploadFile) -> models.ExternalFactorValueImportResult:
+    """
+    Imports external factor values from a CSV or Excel sheet with one VCS per row and one external factor per
+    column. The rows are streamed and the values upserted in batches. Empty cells leave the stored value as is.
+    Rows that fail validation are skipped and reported.
+    """
+    logger.debug(f'Importing external factor values from file {file.filename} to project with id={project_id}')
+
+    try:
+        rows = read_sheet(file.file, os.path.splitext(file.filename)[1])
+    except UnsupportedSheetTypeException:
+        raise exceptions.ExternalFactorValueImportFileTypeException
+
+    try:
+        return _import_external_factor_value_rows(db_connection, project_id, rows)
+    except InvalidSheetException as e:
+        raise exceptions.ExternalFactorValueImportFileException(e.message)
+
+
+def _import_external_factor_value_rows(db_connection: PooledMySQLConnection, project_id: int,
+                                       rows: Iterator[list]) -> models.ExternalFactorValueImportResult:
+    header = next(rows, None)
+    if header is None:
+        raise exceptions.ExternalFactorValueImportColumnException([])
+    id_index, vcs_index, ef_columns = map_external_factor_value_columns(
+        header, get_all_external_factors(db_connection, project_id))
+
+    vcs_names = get_project_vcs_names(db_connection, project_id)
+    vcs_ids_by_name = {}
+    for vcs_id, vcs_name in vcs_names.items():
+        vcs_ids_by_name.setdefault(vcs_name.strip().lower(), []).append(vcs_id)
+
+    result = models.ExternalFactorValueImportResult(imported=0, failed=0, errors=[])
+
+    def report_error(row_number: int, message: str):
+        result.failed += 1
+        if len(result.errors) < MARKET_VALUES_IMPORT_MAX_ERRORS:
+            result.errors.append(models.ExternalFactorValueImportError(row=row_number, message=message))
+
+    def find_vcs(cells: List[str]) -> int:
+        vcs_id = cells[id_index] if id_index is not None and id_index < len(cells) else ''
+        if vcs_id != '':
+            try:
+                vcs_id = int(float(vcs_id))
+            except (ValueError, OverflowError):
+                raise ValueError(f'Invalid VCS id "{vcs_id}"')
+            if vcs_id not in vcs_names:
+                raise ValueError(f'Could not find VCS with id={vcs_id} in project')
+            return vcs_id
+
+        vcs_name = cells[vcs_index] if vcs_index is not None and vcs_index < len(cells) else ''
+        if vcs_name == '':
+            raise ValueError('Missing VCS')
+        matches = vcs_ids_by_name.get(vcs_name.lower(), [])
+        if len(matches) != 1:
+            raise ValueError(f'Could not find VCS "{vcs_name}" in project' if len(matches) == 0 else
+                             f'VCS name "{vcs_name}" is not unique in project, use the id column')
+        return matches[0]
+
+    batch = []
+    for row_number, row in enumerate(rows, start=2):
+        cells = ['' if cell is None else str(cell).strip() for cell in row]
+        if not any(cells):
+            continue
+
+        try:
+            vcs_id = find_vcs(cells)
+            row_values = []
+            for column, ef_id in ef_columns.items():
+                value = cells[column] if column < len(cells) else ''
+                if value == '':
+                    continue
+                try:
+                    number = float(value)
+                except ValueError:
+                    number = math.nan
+                if not math.isfinite(number):   # float() accepts "nan" and "inf", which cannot be stored
+                    raise ValueError(f'Value "{value}" in column {column + 1} is not a number')
+                row_values.append((vcs_id, ef_id, number))
+        except ValueError as e:
+            report_error(row_number, str(e))
+            continue
+
+        batch += row_values
+        if len(batch) >= MARKET_VALUES_IMPORT_BATCH_SIZE:
+            upsert_external_factor_values(db_connection, batch)
+            result.imported += len(batch)
+            batch.clear()
+
+    if len(batch):
+        upsert_external_factor_values(db_connection, batch)
+        result.imported += len(batch)
+
+    logger.debug(f'Imported {result.imported} external factor values, {result.failed} rows failed')
+
+    return result
+
+
+def export_external_factor_values(db_connection: PooledMySQLConnection, project_id: int) -> Iterator[str]:
+    """
+    Streams the external factor values of a project as CSV, with one VCS per row and one external factor per column.
+    The sheet has the layout expected by import_external_factor_values.
+    """
+    logger.debug(f'Exporting external factor values for project with id={project_id}')
+
+    external_factors = get_all_external_factors(db_connection, project_id)
+    vcs_names = get_project_vcs_names(db_connection, project_id)
+    ef_columns = {ef.id: i for i, ef in enumerate(external_factors)}
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['id', 'vcs'] + [f'{ef.name} [{ef.unit}]' for ef in external_factors])
+
+    query = f'SELECT vcs, market_input, value \
+            FROM {CVS_MARKET_VALUES_TABLE} \
+            INNER JOIN {CVS_MARKET_INPUT_TABLE} ON {CVS_MARKET_INPUT_TABLE}.id = market_input \
+            WHERE project = %s \
+            ORDER BY vcs'
+
+    # Values are read with an unbuffered cursor and grouped per VCS, so only one row is held in memory at a time
+    with db_connection.cursor() as cursor:
+        cursor.execute(query, [project_id])
+        db_rows = iter(cursor)
+        db_row = next(db_rows, None)
+        for row_count, (vcs_id, vcs_name) in enumerate(vcs_names.items(), start=1):
+            row = [''] * len(external_factors)
+            while db_row is not None and db_row[0] <= vcs_id:
+                if db_row[0] == vcs_id:
+                    row[ef_columns[db_row[1]]] = db_row[2]
+                db_row = next(db_rows, None)
+            writer.writerow([vcs_id, vcs_name] + row)
+
+            if row_count % MARKET_VALUES_EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        for _ in db_rows:
+            pass  # Consume remaining rows so the connection can be reused
+
+    yield buffer.getvalue()
@@ -4,13 +4,22 @@ from starlette import status
 
 from sedbackend.apps.core.authentication import exceptions as auth_ex
 from sedbackend.apps.core.db import get_connection
+from sedbackend.apps.core.projects import storage as proj_storage
 from sedbackend.apps.cvs.project import models, exceptions, storage
 from sedbackend.libs.datastructures.pagination import ListChunk
 
 
-def get_all_cvs_project(user_id: int) -> ListChunk[models.CVSProject]:
-    with get_connection() as con:
-        return storage.get_all_cvs_project(con, user_id)
+def get_all_cvs_project(user_id: int, limit: int = None, after_id: int = None, order_by: str = 'id',
+                        order_direction: str = 'asc') -> ListChunk[models.CVSProject]:
+    try:
+        with get_connection() as con:
+            return storage.get_all_cvs_project(con, user_id, limit=limit, after_id=after_id, order_by=order_by,
+                                               order_direction=order_direction)
+    except ValueError as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(err)
+        )
 
 
 def get_cvs_project(project_id: int, user_id: int) -> models.CVSProject:
@@ -34,6 +43,7 @@ def create_cvs_project(project_post: models.CVSProjectPost, user_id: int) -> mod
         logger.debug(f'In create_cvs_proj: {user_id}, {project_post}')
         result = storage.create_cvs_project(con, project_post, user_id)
         con.commit()
+        proj_storage.invalidate_access_cache()
         return result
 
 
@@ -42,6 +52,7 @@ def edit_cvs_project(project_id: int, project_post: models.CVSProjectPost, user_
         with get_connection() as con:
             result = storage.edit_cvs_project(con, project_id, project_post, user_id)
             con.commit()
+            proj_storage.invalidate_access_cache()
             return result
     except exceptions.CVSProjectNotFoundException:
         raise HTTPException(
@@ -65,6 +76,7 @@ def delete_cvs_project(project_id: int, user_id: int) -> bool:
         with get_connection() as con:
             res = storage.delete_cvs_project(con, project_id, user_id)
             con.commit()
+            proj_storage.invalidate_access_cache()
             return res
     except exceptions.CVSProjectFailedDeletionException:
         raise HTTPException(
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from fastapi import Depends, APIRouter
 from fastapi.logger import logger
 from sedbackend.apps.core.authentication.utils import get_current_active_user
@@ -14,11 +16,15 @@ CVS_APP_SID = 'MOD.CVS'
 @router.get(
     '/project/all',
     summary='Returns all of the user\'s CVS projects',
+    description='Returns the user\'s CVS projects ordered by order_by (id, name or datetime_created). '
+                'To page through the projects, set limit and pass the id of the last project of a page as after_id.',
     response_model=ListChunk[models.CVSProject],
 )
-async def get_all_cvs_project(user: User = Depends(get_current_active_user)) \
-        -> ListChunk[models.CVSProject]:
-    return implementation.get_all_cvs_project(user.id)
+def get_all_cvs_project(limit: Optional[int] = None, after_id: Optional[int] = None,
+                        order_by: Optional[str] = 'id', order_direction: Optional[str] = 'asc',
+                        user: User = Depends(get_current_active_user)) -> ListChunk[models.CVSProject]:
+    return implementation.get_all_cvs_project(user.id, limit=limit, after_id=after_id, order_by=order_by,
+                                              order_direction=order_direction)
 
 
 @router.get(
@@ -28,7 +34,7 @@ async def get_all_cvs_project(user: User = Depends(get_current_active_user)) \
     response_model=models.CVSProject,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_csv_project(native_project_id: int, user: User = Depends(get_current_active_user)) -> models.CVSProject:
+def get_csv_project(native_project_id: int, user: User = Depends(get_current_active_user)) -> models.CVSProject:
     return implementation.get_cvs_project(native_project_id, user.id)
 
 
@@ -37,8 +43,8 @@ async def get_csv_project(native_project_id: int, user: User = Depends(get_curre
     summary='Creates a new CVS project',
     response_model=models.CVSProject,
 )
-async def create_csv_project(project_post: models.CVSProjectPost,
-                             user: User = Depends(get_current_active_user)) -> models.CVSProject:
+def create_csv_project(project_post: models.CVSProjectPost,
+                       user: User = Depends(get_current_active_user)) -> models.CVSProject:
     logger.debug("Entered router")
     return implementation.create_cvs_project(project_post, user.id)
 
@@ -49,8 +55,8 @@ async def create_csv_project(project_post: models.CVSProjectPost,
     response_model=models.CVSProject,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def edit_csv_project(native_project_id: int, project_post: models.CVSProjectPost,
-                           user: User = Depends(get_current_active_user)) -> models.CVSProject:
+def edit_csv_project(native_project_id: int, project_post: models.CVSProjectPost,
+                     user: User = Depends(get_current_active_user)) -> models.CVSProject:
     return implementation.edit_cvs_project(project_id=native_project_id, project_post=project_post, user_id=user.id)
 
 
@@ -60,5 +66,5 @@ async def edit_csv_project(native_project_id: int, project_post: models.CVSProje
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_are_admins(), CVS_APP_SID))]
 )
-async def delete_cvs_project(native_project_id: int, user: User = Depends(get_current_active_user)) -> bool:
+def delete_cvs_project(native_project_id: int, user: User = Depends(get_current_active_user)) -> bool:
     return implementation.delete_cvs_project(native_project_id, user.id)
@@ -1,7 +1,10 @@
+import mysqlsb.exceptions
 from fastapi.logger import logger
 from mysql.connector.pooling import PooledMySQLConnection
+from mysqlsb.utils import validate_order_request
 
-from sedbackend.apps.core.users.storage import db_get_user_safe_with_id
+from sedbackend.apps.core.users.models import User
+from sedbackend.apps.core.users.storage import db_get_user_safe_with_id, db_get_users_with_ids
 from sedbackend.apps.cvs.project import models as models, exceptions as exceptions
 from sedbackend.libs.datastructures.pagination import ListChunk
 from mysqlsb import MySQLStatementBuilder, Sort, FetchType
@@ -19,6 +22,8 @@ CVS_PROJECT_COLUMNS = [
     "datetime_created",
 ]
 
+CVS_PROJECT_SORT_COLUMNS = ["id", "name", "datetime_created"]
+
 PROJECTS_SUBPROJECTS_TABLE = "projects_subprojects"
 PROJECTS_SUBPROJECTS_COLUMNS = [
     "id",
@@ -32,36 +37,79 @@ PROJECTS_SUBPROJECTS_COLUMNS = [
 
 
 def get_all_cvs_project(
-    db_connection: PooledMySQLConnection, user_id: int
+    db_connection: PooledMySQLConnection,
+    user_id: int,
+    limit: int = None,
+    after_id: int = None,
+    order_by: str = "id",
+    order_direction: str = "asc",
 ) -> ListChunk[models.CVSProject]:
+    """
+    Fetches the CVS projects the user owns or participates in, with keyset pagination. The projects are
+    ordered by order_by, and then by id. Pass the id of the last project of a page as after_id to get the next page.
+    """
     logger.debug(f"Fetching all CVS projects for user with id={user_id}.")
 
-    # The issue is that cvs_project.id is not the same as 
+    try:
+        # Order by is not a prepared statement, so we need to validate it for security
+        (order_by, direction) = validate_order_request(order_by, CVS_PROJECT_SORT_COLUMNS, order_direction)
+    except mysqlsb.exceptions.OrderValueException as err:
+        raise ValueError(str(err))
+    if limit is not None and limit < 1:
+        raise ValueError("Limit needs to be a positive integer")
+
+    # A cvs project maps to at most one subproject, whose project the user may participate in
+    from_statement = "FROM cvs_projects p \
+            LEFT JOIN projects_subprojects ps ON ps.native_project_id = p.id AND ps.application_sid = %s \
+            LEFT JOIN projects_participants pp ON pp.project_id = ps.project_id AND pp.user_id = %s \
+            WHERE (p.owner_id = %s OR ps.owner_id = %s OR pp.user_id = %s)"
+    values = [CVS_APPLICATION_SID, user_id, user_id, user_id, user_id]
 
-    query = f"SELECT DISTINCT p.*, COALESCE(pp.access_level, 4) AS my_access_right \
-            FROM cvs_projects p \
-            LEFT JOIN projects_subprojects ps ON p.id = ps.native_project_id \
-            LEFT JOIN projects_participants pp ON ps.project_id = pp.project_id AND pp.user_id = %s \
-            WHERE p.owner_id = %s OR ps.owner_id = %s OR pp.user_id = %s;"
+    with db_connection.cursor(prepared=True, dictionary=True) as cursor:
+        cursor.execute(f"SELECT COUNT(*) AS total {from_statement}", values)
+        length_total = cursor.fetchone()["total"]
+
+    query = f"SELECT p.*, COALESCE(pp.access_level, 4) AS my_access_right, \
+            {', '.join([f'ps.{col} AS subproject_{col}' for col in PROJECTS_SUBPROJECTS_COLUMNS])} \
+            {from_statement}"
+    if after_id is not None:
+        comparison = ">" if direction == Sort.ASCENDING else "<"
+        if order_by == "id":
+            query += f" AND p.id {comparison} %s"
+            values = values + [after_id]
+        else:
+            query += f" AND (p.{order_by}, p.id) {comparison} \
+                    ((SELECT {order_by} FROM cvs_projects WHERE id = %s), %s)"
+            values = values + [after_id, after_id]
+    query += f" ORDER BY p.{order_by} {direction.value}" + (
+        f", p.id {direction.value}" if order_by != "id" else "")
+    if limit is not None:
+        query += " LIMIT %s"
+        values = values + [limit]
 
     with db_connection.cursor(prepared=True, dictionary=True) as cursor:
-        cursor.execute(query, [user_id, user_id, user_id, user_id])
+        cursor.execute(query, values)
         result = cursor.fetchall()
 
+    owners = {owner.id: owner for owner in db_get_users_with_ids(
+        db_connection, list({res["owner_id"] for res in result}))} if len(result) else {}
+    projects = proj_storage.db_get_projects_with_ids(
+        db_connection, [res["subproject_project_id"] for res in result
+                        if res["subproject_project_id"] is not None])
+
     cvs_project_list = []
     for res in result:
-        subproject = proj_storage.db_get_subproject_native(
-            db_connection, "MOD.CVS", res["id"]
-        )
-        project = None
-        if subproject.project_id:
-            project = proj_storage.db_get_project(db_connection, subproject.project_id)
+        subproject = None
+        if res["subproject_id"] is not None:
+            subproject = proj_models.SubProject(
+                **{col: res[f"subproject_{col}"] for col in PROJECTS_SUBPROJECTS_COLUMNS})
+        project = projects.get(subproject.project_id) if subproject else None
         cvs_project_list.append(
-            populate_cvs_project(db_connection, res, project, subproject)
+            populate_cvs_project(db_connection, res, project, subproject, owners[res["owner_id"]])
         )
 
     return ListChunk[models.CVSProject](
-        chunk=cvs_project_list, length_total=len(cvs_project_list)
+        chunk=cvs_project_list, length_total=length_total
     )
 
 
@@ -221,14 +269,15 @@ def populate_cvs_project(
     db_result,
     project: proj_models.Project = None,
     subproject: proj_models.SubProject = None,
+    owner: User = None,
 ) -> models.CVSProject:
-    logger.debug(f"Populating cvs project with {db_result}")
+    logger.debug('Populating cvs project with %s', db_result)
     return models.CVSProject(
         id=db_result["id"],
         name=db_result["name"],
         description=db_result["description"],
         currency=db_result["currency"],
-        owner=db_get_user_safe_with_id(db_connection, db_result["owner_id"]),
+        owner=owner if owner else db_get_user_safe_with_id(db_connection, db_result["owner_id"]),
         datetime_created=db_result["datetime_created"],
         my_access_right=db_result["my_access_right"],
         project=project,
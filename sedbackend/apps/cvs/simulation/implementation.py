@@ -7,7 +7,9 @@ from fastapi.logger import logger
 from sedbackend.apps.cvs.simulation import models, storage
 
 from sedbackend.apps.core.authentication import exceptions as auth_ex
-from sedbackend.apps.core.db import get_connection
+from sedbackend.apps.core import metrics
+from sedbackend.apps.core.db import get_connection, JOBS_POOL
+from sedbackend.apps.core.db_async import get_async_connection
 from sedbackend.apps.cvs.project import exceptions as project_exceptions
 from sedbackend.apps.cvs.simulation.exceptions import (
     BadlyFormattedSettingsException,
@@ -44,19 +46,24 @@ def run_simulation(
     is_multiprocessing: bool = False,
 ) -> models.SimulationFetch:
     try:
-        with get_connection() as con:
-            result = storage.run_simulation(
-                con,
-                sim_settings,
-                project_id,
-                vcs_ids,
-                design_group_ids,
-                user_id,
-                normalized_npv,
-                is_multiprocessing,
-            )
-            con.commit()
-            return result
+        with metrics.track_job("simulation"):
+            with get_connection(JOBS_POOL, read_only=True) as con:
+                sim_result = storage.simulate(
+                    con,
+                    sim_settings,
+                    project_id,
+                    vcs_ids,
+                    design_group_ids,
+                    user_id,
+                    normalized_npv,
+                    is_multiprocessing,
+                )
+            with get_connection(JOBS_POOL) as con:
+                result = storage.save_simulation_result(
+                    con, project_id, sim_settings, sim_result, user_id
+                )
+                con.commit()
+                return result
     except auth_ex.UnauthorizedOperationException:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -141,7 +148,7 @@ def run_dsm_file_simulation(
     user_id: int, project_id: int, sim_params: models.FileParams, dsm_file: UploadFile
 ) -> List[models.Simulation]:
     try:
-        with get_connection() as con:
+        with metrics.track_job("dsm_file_simulation"), get_connection(JOBS_POOL) as con:
             res = storage.run_sim_with_dsm_file(
                 con, user_id, project_id, sim_params, dsm_file
             )  # Wtf saknar xlsx file
@@ -231,6 +238,16 @@ def get_simulations(project_id: int) -> List[models.SimulationFetch]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Could not find project"
         )
+
+
+async def get_simulations_async(project_id: int) -> List[models.SimulationFetch]:
+    try:
+        async with get_async_connection() as con:
+            return await storage.get_simulation_files_async(con, project_id)
+    except project_exceptions.CVSProjectNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Could not find project"
+        )
         
         
 def remove_simulation_files(project_id: int, user_id: int) -> bool:
@@ -269,6 +286,11 @@ def get_simulation_file_content(user_id: int, file_id) -> SimulationResult:
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Could not find project"
         )
+    except file_ex.FileNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Could not find simulation file",
+        )
     except Exception as e:
         logger.exception(e)
         raise HTTPException(
@@ -278,6 +300,17 @@ def get_simulation_file_content(user_id: int, file_id) -> SimulationResult:
         
         
         
+def get_precompressed_simulation_file(user_id: int, file_id) -> str:
+    try:
+        with get_connection() as con:
+            return storage.get_precompressed_file_key(con, user_id, file_id)
+    except file_ex.FileNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Could not find simulation file",
+        )
+
+
 def remove_simulation_file(project_id: int, user_id, file_id) -> bool:
     try:
         with get_connection() as con:
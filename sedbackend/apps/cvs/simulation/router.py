@@ -1,4 +1,4 @@
-from fastapi import Depends, APIRouter
+from fastapi import Depends, APIRouter, Request
 from typing import List, Optional
 from sedbackend.apps.core.authentication.utils import get_current_active_user
 from sedbackend.apps.core.projects.dependencies import SubProjectAccessChecker
@@ -7,6 +7,9 @@ from sedbackend.apps.cvs.project.router import CVS_APP_SID
 from sedbackend.apps.core.users.models import User
 from sedbackend.apps.cvs.simulation import implementation, models
 from sedbackend.apps.cvs.simulation.models import SimulationResult
+from sedbackend.apps.core.responses import FastJSONResponse
+from sedbackend.apps.core.files import responses as file_responses
+from sedbackend.libs.compression.middleware import accepts_encoding
 
 
 router = APIRouter()
@@ -18,9 +21,9 @@ router = APIRouter()
     response_model=models.SimulationFetch,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def run_simulation(sim_settings: models.EditSimSettings, native_project_id: int, vcs_ids: List[int],
-                         design_group_ids: List[int], normalized_npv: Optional[bool] = False,
-                         user: User = Depends(get_current_active_user)) -> models.SimulationFetch:
+def run_simulation(sim_settings: models.EditSimSettings, native_project_id: int, vcs_ids: List[int],
+                   design_group_ids: List[int], normalized_npv: Optional[bool] = False,
+                   user: User = Depends(get_current_active_user)) -> models.SimulationFetch:
     return implementation.run_simulation(sim_settings, native_project_id, vcs_ids, design_group_ids, user.id,
                                          normalized_npv)
 
@@ -33,9 +36,9 @@ async def run_simulation(sim_settings: models.EditSimSettings, native_project_id
     response_model=List[models.Simulation],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def run_dsm_file_simulation(native_project_id: int, sim_params: models.FileParams = Depends(),
-                                  dsm_file: UploadFile = File(default=None),
-                                  user: User = Depends(get_current_active_user)) -> List[models.Simulation]:
+def run_dsm_file_simulation(native_project_id: int, sim_params: models.FileParams = Depends(),
+                            dsm_file: UploadFile = File(default=None),
+                            user: User = Depends(get_current_active_user)) -> List[models.Simulation]:
     if dsm_file.content_type != 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' and \
             dsm_file.content_type != 'text/csv':
         print("Content-type: ", dsm_file.content_type)
@@ -50,9 +53,9 @@ async def run_dsm_file_simulation(native_project_id: int, sim_params: models.Fil
     response_model=models.SimulationFetch,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def run_multiprocessing(sim_settings: models.EditSimSettings, native_project_id: int, vcs_ids: List[int],
-                              design_group_ids: List[int], normalized_npv: Optional[bool] = False,
-                              user: User = Depends(get_current_active_user)) -> models.SimulationFetch:
+def run_multiprocessing(sim_settings: models.EditSimSettings, native_project_id: int, vcs_ids: List[int],
+                        design_group_ids: List[int], normalized_npv: Optional[bool] = False,
+                        user: User = Depends(get_current_active_user)) -> models.SimulationFetch:
     return implementation.run_simulation(sim_settings, native_project_id, vcs_ids, design_group_ids, user.id,
                                          normalized_npv, True)
 
@@ -63,7 +66,7 @@ async def run_multiprocessing(sim_settings: models.EditSimSettings, native_proje
     response_model=models.SimSettings,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_sim_settings(native_project_id: int) -> models.SimSettings:
+def get_sim_settings(native_project_id: int) -> models.SimSettings:
     return implementation.get_sim_settings(native_project_id)
 
 
@@ -74,7 +77,7 @@ async def get_sim_settings(native_project_id: int) -> models.SimSettings:
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
 async def get_simulations(native_project_id: int) -> List[models.SimulationFetch]:
-    return implementation.get_simulations(native_project_id)
+    return await implementation.get_simulations_async(native_project_id)
 
 
 @router.delete(
@@ -83,7 +86,7 @@ async def get_simulations(native_project_id: int) -> List[models.SimulationFetch
     response_model= bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def remove_simulation_files(native_project_id: int, user: User = Depends(get_current_active_user)) -> bool:
+def remove_simulation_files(native_project_id: int, user: User = Depends(get_current_active_user)) -> bool:
     return implementation.remove_simulation_files(native_project_id, user.id)
 
 @router.put(
@@ -92,8 +95,8 @@ async def remove_simulation_files(native_project_id: int, user: User = Depends(g
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def put_sim_settings(native_project_id: int, sim_settings: models.EditSimSettings,
-                           user: User = Depends(get_current_active_user)) -> bool:
+def put_sim_settings(native_project_id: int, sim_settings: models.EditSimSettings,
+                     user: User = Depends(get_current_active_user)) -> bool:
     return implementation.edit_sim_settings(native_project_id, sim_settings, user.id)
 
 
@@ -101,10 +104,16 @@ async def put_sim_settings(native_project_id: int, sim_settings: models.EditSimS
    '/project/{native_project_id}/simulation/file/{file_id}',
     summary='Get simulation file',
     response_model=models.SimulationResult,
+    response_class=FastJSONResponse,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_simulation_file_content(native_project_id,file_id: int, user: User = Depends(get_current_active_user)) -> models.SimulationResult:
-    return implementation.get_simulation_file_content(user.id, file_id)
+def get_simulation_file_content(native_project_id,file_id: int, request: Request,
+                                user: User = Depends(get_current_active_user)):
+    if accepts_encoding(request.headers.get('accept-encoding', ''), 'gzip'):
+        key = implementation.get_precompressed_simulation_file(user.id, file_id)
+        return file_responses.stored_content_response(
+            key, media_type='application/json', headers={'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'})
+    return FastJSONResponse(implementation.get_simulation_file_content(user.id, file_id))
 
 @router.delete(
    '/project/{native_project_id}/simulation/file/{file_id}',
@@ -112,5 +121,5 @@ async def get_simulation_file_content(native_project_id,file_id: int, user: User
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_simulation_file_content(native_project_id,file_id: int, user: User = Depends(get_current_active_user)) -> bool:
+def get_simulation_file_content(native_project_id,file_id: int, user: User = Depends(get_current_active_user)) -> bool:
     return implementation.remove_simulation_file(native_project_id, user.id, file_id)
\ No newline at end of file
@@ -1,9 +1,7 @@
+import io
 import re
 import sys
 from math import isnan
-import magic
-import os
-import tempfile
 from datetime import datetime
 from plusminus import BaseArithmeticParser
 
@@ -12,13 +10,13 @@ import pandas as pd
 from mysql.connector import Error
 
 from fastapi.logger import logger
-from fastapi import UploadFile
 
 from desim import interface as des
 from desim.data import NonTechCost, TimeFormat
 from desim.simulation import Process
 
 from typing import List
+from sedbackend.apps.cvs.design.models import Design
 from sedbackend.apps.cvs.design.storage import get_all_designs
 
 from mysqlsb import FetchType, MySQLStatementBuilder, Sort
@@ -32,7 +30,6 @@ from sedbackend.apps.cvs.simulation import models
 import sedbackend.apps.cvs.simulation.exceptions as e
 from sedbackend.apps.cvs.vcs import storage as vcs_storage
 from sedbackend.apps.cvs.life_cycle import (
-    exceptions as life_cycle_exceptions,
     storage as life_cycle_storage,
 )
 from sedbackend.apps.core.files import (
@@ -43,6 +40,7 @@ from sedbackend.apps.core.files import (
 from sedbackend.apps.core.projects import storage as core_project_storage
 from sedbackend.apps.core.files import models as file_models, storage as file_storage
 from sedbackend.apps.core.files.models import StoredFilePath
+from sedbackend.apps.core import db_async, responses
 
 
 SIM_SETTINGS_TABLE = "cvs_simulation_settings"
@@ -93,20 +91,7 @@ CVS_SIMULATION_FILES_TABLE = "cvs_simulation_files"
 CVS_SIMULATION_FILES_COLUMNSS = ["project_id", "file", "vs_x_ds"]
 CVS_SIMULATION_FILES_COLUMNS = ["project_id", "file", "insert_timestamp", "vs_x_ds"]
 
-
-def csv_from_dataframe(dataframe) -> UploadFile:
-    dataframe = pd.DataFrame(dataframe)
-    fd, path = tempfile.mkstemp()
-    try:
-        with open(path, "w+") as csv_file:
-            dataframe.to_json(csv_file, orient="columns")
-    finally:
-        csv_file = open(path, "r+b")
-        upload_file = UploadFile(filename=csv_file.name + ".json", file=csv_file)
-        os.close(fd)
-        os.remove(path)
-
-    return upload_file
+file_storage.register_file_references(CVS_APP_SID, CVS_SIMULATION_FILES_TABLE, "file")
 
 
 def save_simulation(
@@ -116,45 +101,37 @@ def save_simulation(
     user_id: int,
     vs_x_ds: str,
 ) -> bool:
-    upload_file = csv_from_dataframe(simulation)
-    logger.debug(f"upload_files: {upload_file.read}")
-    return save_simulation_file(
-        db_connection, project_id, upload_file, user_id, vs_x_ds
-    )
+    save_simulation_file(db_connection, project_id, simulation, user_id, vs_x_ds)
+    return True
 
 
 def save_simulation_file(
     db_connection: PooledMySQLConnection,
     project_id: int,
-    file: UploadFile,
+    simulation: SimulationResult,
     user_id,
     vs_x_ds: str,
-) -> bool:
+) -> file_models.StoredFileEntry:
     subproject = core_project_storage.db_get_subproject_native(
         db_connection, CVS_APP_SID, project_id
     )
-    model_file = file_models.StoredFilePost.import_fastapi_file(
-        file, user_id, subproject.id
+    # Serialized straight into the file store. The result is generated here, so it is not checked like uploads are
+    stored_file = file_storage.db_save_generated_file(
+        db_connection,
+        "simulation.json",
+        user_id,
+        subproject.id,
+        lambda f: pd.DataFrame(simulation).to_json(f, orient="columns"),
+        encoding="utf-8",
     )
 
-    with model_file.file_object as f:
-        f.seek(0)
-        tmp_file = f.read()
-        mime = magic.from_buffer(tmp_file)
-        if mime != "JSON text data" and "ASCII text" not in mime:
-            raise life_cycle_exceptions.InvalidFileTypeException
-        f.seek(0)
-        logger.debug(f"File content: {model_file}")
-        f.seek(0)
-        stored_file = file_storage.db_save_file(db_connection, model_file)
-
     insert_statement = MySQLStatementBuilder(db_connection)
     insert_statement.insert(
         CVS_SIMULATION_FILES_TABLE, CVS_SIMULATION_FILES_COLUMNSS
     ).set_values([project_id, stored_file.id, vs_x_ds]).execute(
         fetch_type=FetchType.FETCH_NONE
     )
-    return True
+    return stored_file
 
 
 def get_simulation_files(
@@ -174,6 +151,21 @@ def get_simulation_files(
     return file_res
 
 
+async def get_simulation_files_async(db_connection, project_id: int) -> List[models.SimulationFetch]:
+    """
+    Same as get_simulation_files, for async connections.
+    """
+    file_res = await db_async.fetch_all(
+        db_connection,
+        f"SELECT {', '.join(CVS_SIMULATION_FILES_COLUMNS)} FROM {CVS_SIMULATION_FILES_TABLE} "
+        f"WHERE project_id = %s ORDER BY file DESC",
+        [project_id],
+    )
+    for row in file_res:
+        row["insert_timestamp"] = row["insert_timestamp"].strftime("%Y-%m-%d")
+    return file_res
+
+
 def get_simulation_file_path(
     db_connection: PooledMySQLConnection, file_id, user_id
 ) -> StoredFilePath:
@@ -183,15 +175,14 @@ def get_simulation_file_path(
 def delete_simulation_file(
     db_connection: PooledMySQLConnection, project_id: int, file_id, user_id: int
 ) -> bool:
-    if file_id is None:
-        file_storage.db_delete_file(db_connection, file_id, user_id)
-
     delete_statement = MySQLStatementBuilder(db_connection)
     _, rows = (
         delete_statement.delete(CVS_SIMULATION_FILES_TABLE)
-        .where("file = %s", [file_id])
+        .where("file = %s AND project_id = %s", [file_id, project_id])
         .execute(return_affected_rows=True)
     )
+    if rows > 0:  # Only files of this project
+        file_storage.db_delete_file(db_connection, file_id, user_id)
     return True
 
 
@@ -204,11 +195,29 @@ def delete_all_simulation_files(
     return True
 
 
+def get_precompressed_file_key(
+    db_connection: PooledMySQLConnection, user_id, file_id
+) -> str:
+    """
+    Key of the gzip compressed response body of a simulation file in the storage backend. It is rendered from the
+    stored file when it is first requested, like the uncompressed response is, so that saving a simulation does not
+    read its result back.
+    """
+    key = get_simulation_file_path(db_connection, file_id, user_id).key
+    precompressed_key = file_storage.get_precompressed_key(key)
+    if precompressed_key is None:
+        content = get_file_content(db_connection, user_id, file_id)
+        precompressed_key = file_storage.save_precompressed(key, responses.dumps(content))
+    return precompressed_key
+
+
 def get_file_content(
     db_connection: PooledMySQLConnection, user_id, file_id
 ) -> SimulationResult:
-    path = get_simulation_file_path(db_connection, file_id, user_id).path
-    with open(path, newline="") as f:
+    stored_file_path = get_simulation_file_path(db_connection, file_id, user_id)
+    with io.TextIOWrapper(
+        file_storage.open_stored_file(stored_file_path), encoding="utf-8", newline=""
+    ) as f:
         data = pd.read_json(f, orient="columns")
         designs, vcss, vds, run = data[1]
 
@@ -246,6 +255,34 @@ def run_simulation(
     normalized_npv: bool = False,
     is_multiprocessing: bool = False,
 ) -> models.SimulationFetch:
+    sim_result = simulate(
+        db_connection,
+        sim_settings,
+        project_id,
+        vcs_ids,
+        design_group_ids,
+        user_id,
+        normalized_npv,
+        is_multiprocessing,
+    )
+    return save_simulation_result(
+        db_connection, project_id, sim_settings, sim_result, user_id
+    )
+
+
+def simulate(
+    db_connection: PooledMySQLConnection,
+    sim_settings: models.EditSimSettings,
+    project_id: int,
+    vcs_ids: List[int],
+    design_group_ids: List[int],
+    user_id,
+    normalized_npv: bool = False,
+    is_multiprocessing: bool = False,
+) -> SimulationResult:
+    """
+    Runs the simulations without writing anything, so the connection may be read-only.
+    """
     settings_msg = check_sim_settings(sim_settings)
     if settings_msg:
         raise e.BadlyFormattedSettingsException(settings_msg)
@@ -262,9 +299,10 @@ def run_simulation(
     all_sim_data = get_all_sim_data(db_connection, vcs_ids, design_group_ids)
     all_market_values = get_all_market_values(db_connection, vcs_ids)
     all_designs = get_all_designs(db_connection, design_group_ids)
-    all_vd_design_values = get_all_vd_design_values(
-        db_connection, [design.id for design in all_designs]
-    )
+    all_vd_design_values = get_all_vd_design_values(db_connection, all_designs)
+    vd_design_values_by_design = {}
+    for vd in all_vd_design_values:
+        vd_design_values_by_design.setdefault(vd["design"], []).append(vd)
 
     unique_vds = {}
     for vd in all_vd_design_values:
@@ -315,9 +353,7 @@ def run_simulation(
                 raise e.DesignIdsNotFoundException
 
             for design in designs:
-                vd_values = [
-                    vd for vd in all_vd_design_values if vd["design"] == design
-                ]
+                vd_values = vd_design_values_by_design.get(design, [])
                 processes, non_tech_processes = populate_processes(
                     non_tech_add, sim_data, design, market_values, vd_values
                 )
@@ -393,6 +429,17 @@ def run_simulation(
                 )
 
                 sim_result.runs.append(sim_run_res)
+
+    return sim_result
+
+
+def save_simulation_result(
+    db_connection: PooledMySQLConnection,
+    project_id: int,
+    sim_settings: models.EditSimSettings,
+    sim_result: SimulationResult,
+    user_id,
+) -> models.SimulationFetch:
     vs_x_ds = str(len(sim_result.vcss)) + "x" + str(len(sim_result.designs))
     edit_simulation_settings(db_connection, project_id, sim_settings, user_id)
     save_simulation(db_connection, project_id, sim_result, user_id, vs_x_ds)
@@ -519,22 +566,52 @@ def get_all_sim_data(
     return res
 
 
-def get_all_vd_design_values(db_connection: PooledMySQLConnection, designs: List[int]):
+def get_all_vd_design_values(
+    db_connection: PooledMySQLConnection, designs: List[Design]
+) -> List[dict]:
+    """
+    Combines the value driver values of already loaded designs with the value driver details
+    and the vcs rows the value drivers are used in. Only the value drivers are queried, the
+    design values are taken from the given designs.
+    """
+    vd_ids = list(
+        {
+            vd_value.vd_id
+            for design in designs
+            if design.vd_design_values
+            for vd_value in design.vd_design_values
+        }
+    )
+    if len(vd_ids) == 0:
+        return []
+
     try:
-        query = f'SELECT design, value, vcs_row, cvd.name, cvd.unit, cvd.id, cvd.project \
-                FROM cvs_vd_design_values cvdv \
-                INNER JOIN cvs_value_drivers cvd ON cvdv.value_driver = cvd.id \
+        query = f'SELECT vcs_row, cvd.name, cvd.unit, cvd.id, cvd.project \
+                FROM cvs_value_drivers cvd \
                 INNER JOIN cvs_vcs_need_drivers cvnd ON cvnd.value_driver = cvd.id \
                 INNER JOIN cvs_stakeholder_needs csn ON csn.id = cvnd.stakeholder_need \
-                WHERE design IN ({",".join(["%s" for _ in range(len(designs))])})'
+                WHERE cvd.id IN ({",".join(["%s" for _ in range(len(vd_ids))])})'
         with db_connection.cursor(prepared=True) as cursor:
-            cursor.execute(query, designs)
+            cursor.execute(query, vd_ids)
             res = cursor.fetchall()
             res = [dict(zip(cursor.column_names, row)) for row in res]
     except Error as error:
         logger.debug(f"Error msg: {error.msg}")
         raise e.CouldNotFetchValueDriverDesignValuesException
-    return res
+
+    vd_rows = {}
+    for row in res:
+        vd_rows.setdefault(row["id"], []).append(row)
+
+    vd_design_values = []
+    for design in designs:
+        for vd_value in design.vd_design_values or []:
+            for row in vd_rows.get(vd_value.vd_id, []):
+                vd_design_values.append(
+                    {"design": design.id, "value": vd_value.value, **row}
+                )
+
+    return vd_design_values
 
 
 def get_simulation_settings(db_connection: PooledMySQLConnection, project_id: int):
@@ -3,6 +3,7 @@ from fastapi import Depends, APIRouter
 from sedbackend.apps.core.authentication.utils import get_current_active_user
 from sedbackend.apps.core.projects.dependencies import SubProjectAccessChecker
 from sedbackend.apps.core.projects.models import AccessLevel
+from sedbackend.apps.core.responses import FastJSONResponse
 from sedbackend.apps.core.users.models import User
 from sedbackend.apps.cvs.project.router import CVS_APP_SID
 from sedbackend.apps.cvs.vcs.models import ValueDriver
@@ -23,7 +24,7 @@ router = APIRouter()
     response_model=ListChunk[models.VCS],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_all_vcs(native_project_id: int, user: User = Depends(get_current_active_user)) -> ListChunk[models.VCS]:
+def get_all_vcs(native_project_id: int, user: User = Depends(get_current_active_user)) -> ListChunk[models.VCS]:
     return implementation.get_all_vcs(native_project_id, user.id)
 
 
@@ -33,7 +34,7 @@ async def get_all_vcs(native_project_id: int, user: User = Depends(get_current_a
     response_model=models.VCS,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_vcs(native_project_id: int, vcs_id: int, user: User = Depends(get_current_active_user)) -> models.VCS:
+def get_vcs(native_project_id: int, vcs_id: int, user: User = Depends(get_current_active_user)) -> models.VCS:
     return implementation.get_vcs(native_project_id, vcs_id, user.id)
 
 
@@ -43,8 +44,8 @@ async def get_vcs(native_project_id: int, vcs_id: int, user: User = Depends(get_
     response_model=models.VCS,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def create_vcs(native_project_id: int, vcs_post: models.VCSPost,
-                     user: User = Depends(get_current_active_user)) -> models.VCS:
+def create_vcs(native_project_id: int, vcs_post: models.VCSPost,
+               user: User = Depends(get_current_active_user)) -> models.VCS:
     return implementation.create_vcs(native_project_id, vcs_post, user.id)
 
 
@@ -54,8 +55,8 @@ async def create_vcs(native_project_id: int, vcs_post: models.VCSPost,
     response_model=models.VCS,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def edit_vcs(native_project_id: int, vcs_id: int, vcs_post: models.VCSPost,
-                   user: User = Depends(get_current_active_user)) -> models.VCS:
+def edit_vcs(native_project_id: int, vcs_id: int, vcs_post: models.VCSPost,
+             user: User = Depends(get_current_active_user)) -> models.VCS:
     return implementation.edit_vcs(native_project_id, vcs_id, vcs_post, user.id)
 
 
@@ -65,7 +66,7 @@ async def edit_vcs(native_project_id: int, vcs_id: int, vcs_post: models.VCSPost
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def delete_vcs(native_project_id: int, vcs_id: int, user: User = Depends(get_current_active_user)) -> bool:
+def delete_vcs(native_project_id: int, vcs_id: int, user: User = Depends(get_current_active_user)) -> bool:
     return implementation.delete_vcs(user.id, native_project_id, vcs_id)
 
 
@@ -78,10 +79,11 @@ async def delete_vcs(native_project_id: int, vcs_id: int, user: User = Depends(g
     '/project/{native_project_id}/vcs/{vcs_id}/table',
     summary='Returns the table of a a VCS',
     response_model=List[models.VcsRow],
+    response_class=FastJSONResponse,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_vcs_table(native_project_id: int, vcs_id: int) -> List[models.VcsRow]:
-    return implementation.get_vcs_table(native_project_id, vcs_id)
+def get_vcs_table(native_project_id: int, vcs_id: int) -> FastJSONResponse:
+    return FastJSONResponse(implementation.get_vcs_table(native_project_id, vcs_id))
 
 
 @router.put(
@@ -90,7 +92,7 @@ async def get_vcs_table(native_project_id: int, vcs_id: int) -> List[models.VcsR
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def edit_vcs_table(native_project_id: int, vcs_id: int, updated_table: List[models.VcsRowPost]) -> bool:
+def edit_vcs_table(native_project_id: int, vcs_id: int, updated_table: List[models.VcsRowPost]) -> bool:
     return implementation.edit_vcs_table(native_project_id, vcs_id, updated_table)
 
 
@@ -104,7 +106,7 @@ async def edit_vcs_table(native_project_id: int, vcs_id: int, updated_table: Lis
     summary='Returns all of value drivers',
     response_model=List[models.ValueDriver],
 )
-async def get_all_value_driver(user: User = Depends(get_current_active_user)) -> List[models.ValueDriver]:
+def get_all_value_driver(user: User = Depends(get_current_active_user)) -> List[models.ValueDriver]:
     return implementation.get_all_value_driver(user.id)
 
 
@@ -114,7 +116,7 @@ async def get_all_value_driver(user: User = Depends(get_current_active_user)) ->
     response_model=List[ValueDriver],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_all_value_driver_vcs(native_project_id: int, vcs_id: int) -> List[ValueDriver]:
+def get_all_value_driver_vcs(native_project_id: int, vcs_id: int) -> List[ValueDriver]:
     return vcs_impl.get_all_value_driver_vcs(native_project_id, vcs_id)
 
 
@@ -124,8 +126,8 @@ async def get_all_value_driver_vcs(native_project_id: int, vcs_id: int) -> List[
     response_model=List[ValueDriver],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_value_drivers_vcs_row(native_project_id: int, vcs_id: int, vcs_row_id: int,
-                                    user: User = Depends(get_current_active_user)) -> List[ValueDriver]:
+def get_value_drivers_vcs_row(native_project_id: int, vcs_id: int, vcs_row_id: int,
+                              user: User = Depends(get_current_active_user)) -> List[ValueDriver]:
     return vcs_impl.get_all_value_drivers_vcs_row(native_project_id, vcs_id, vcs_row_id, user.id)
 
 
@@ -134,7 +136,7 @@ async def get_value_drivers_vcs_row(native_project_id: int, vcs_id: int, vcs_row
     summary='Returns a value driver',
     response_model=models.ValueDriver,
 )
-async def get_value_driver(value_driver_id: int, user: User = Depends(get_current_active_user)) -> models.ValueDriver:
+def get_value_driver(value_driver_id: int, user: User = Depends(get_current_active_user)) -> models.ValueDriver:
     return implementation.get_value_driver(value_driver_id, user.id)
 
 
@@ -143,8 +145,8 @@ async def get_value_driver(value_driver_id: int, user: User = Depends(get_curren
     summary='Creates a new value driver',
     response_model=models.ValueDriver,
 )
-async def create_value_driver(value_driver_post: models.ValueDriverPost,
-                              user: User = Depends(get_current_active_user)) -> models.ValueDriver:
+def create_value_driver(value_driver_post: models.ValueDriverPost,
+                        user: User = Depends(get_current_active_user)) -> models.ValueDriver:
     return implementation.create_value_driver(user.id, value_driver_post)
 
 @router.post(
@@ -153,7 +155,7 @@ async def create_value_driver(value_driver_post: models.ValueDriverPost,
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def add_drivers_to_needs(native_project_id: int, need_driver_ids: List[Tuple[int, int]]):
+def add_drivers_to_needs(native_project_id: int, need_driver_ids: List[Tuple[int, int]]):
     return implementation.add_vcs_multiple_needs_drivers(need_driver_ids)
 
 @router.put(
@@ -161,8 +163,8 @@ async def add_drivers_to_needs(native_project_id: int, need_driver_ids: List[Tup
     summary='Edits a value driver',
     response_model=models.ValueDriver,
 )
-async def edit_value_driver(value_driver_id: int, value_driver: models.ValueDriverPut,
-                            user: User = Depends(get_current_active_user)) -> models.ValueDriver:
+def edit_value_driver(value_driver_id: int, value_driver: models.ValueDriverPut,
+                      user: User = Depends(get_current_active_user)) -> models.ValueDriver:
     return implementation.edit_value_driver(value_driver_id, value_driver, user.id)
 
 
@@ -171,7 +173,7 @@ async def edit_value_driver(value_driver_id: int, value_driver: models.ValueDriv
     summary='Deletes a value driver',
     response_model=bool,
 )
-async def delete_value_driver(native_project_id: int, value_driver_id: int) -> bool:
+def delete_value_driver(native_project_id: int, value_driver_id: int) -> bool:
     return implementation.delete_value_driver(native_project_id, value_driver_id)
 
 
@@ -185,7 +187,7 @@ async def delete_value_driver(native_project_id: int, value_driver_id: int) -> b
     summary='Returns all ISO processes',
     response_model=List[models.VCSISOProcess],
 )
-async def get_all_iso_process() -> List[models.VCSISOProcess]:
+def get_all_iso_process() -> List[models.VCSISOProcess]:
     return implementation.get_all_iso_process()
 
 
@@ -200,7 +202,7 @@ async def get_all_iso_process() -> List[models.VCSISOProcess]:
     response_model=List[models.VCSSubprocess],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_all_subprocess(native_project_id: int) -> List[models.VCSSubprocess]:
+def get_all_subprocess(native_project_id: int) -> List[models.VCSSubprocess]:
     return implementation.get_all_subprocess(native_project_id)
 
 
@@ -210,7 +212,7 @@ async def get_all_subprocess(native_project_id: int) -> List[models.VCSSubproces
     response_model=models.VCSSubprocess,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_read(), CVS_APP_SID))]
 )
-async def get_subprocess(native_project_id: int, subprocess_id: int) -> models.VCSSubprocess:
+def get_subprocess(native_project_id: int, subprocess_id: int) -> models.VCSSubprocess:
     return implementation.get_subprocess(native_project_id, subprocess_id)
 
 
@@ -220,8 +222,8 @@ async def get_subprocess(native_project_id: int, subprocess_id: int) -> models.V
     response_model=models.VCSSubprocess,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def create_subprocess(native_project_id: int,
-                            subprocess_post: models.VCSSubprocessPost) -> models.VCSSubprocess:
+def create_subprocess(native_project_id: int,
+                      subprocess_post: models.VCSSubprocessPost) -> models.VCSSubprocess:
     return implementation.create_subprocess(native_project_id, subprocess_post)
 
 
@@ -231,8 +233,8 @@ async def create_subprocess(native_project_id: int,
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def edit_subprocess(native_project_id: int, subprocess_id: int,
-                          subprocess: models.VCSSubprocessPut) -> bool:
+def edit_subprocess(native_project_id: int, subprocess_id: int,
+                    subprocess: models.VCSSubprocessPut) -> bool:
     return implementation.edit_subprocess(native_project_id, subprocess_id, subprocess)
 
 
@@ -242,7 +244,7 @@ async def edit_subprocess(native_project_id: int, subprocess_id: int,
     response_model=bool,
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def delete_subprocess(native_project_id: int, subprocess_id: int) -> bool:
+def delete_subprocess(native_project_id: int, subprocess_id: int) -> bool:
     return implementation.delete_subprocess(native_project_id, subprocess_id)
 
 
@@ -256,6 +258,6 @@ async def delete_subprocess(native_project_id: int, subprocess_id: int) -> bool:
     response_model=List[models.VCS],
     dependencies=[Depends(SubProjectAccessChecker(AccessLevel.list_can_edit(), CVS_APP_SID))]
 )
-async def duplicate_vcs(native_project_id: int, vcs_id: int, n: int,
-                        user: User = Depends(get_current_active_user)) -> List[models.VCS]:
+def duplicate_vcs(native_project_id: int, vcs_id: int, n: int,
+                  user: User = Depends(get_current_active_user)) -> List[models.VCS]:
     return implementation.duplicate_vcs(native_project_id, vcs_id, n, user.id)
@@ -491,7 +491,7 @@ def delete_all_value_drivers(db_connection: PooledMySQLConnection, user_id: int)
 
 
 def populate_value_driver(db_result) -> models.ValueDriver:
-    logger.debug(f'Populating value driver with: {db_result}')
+    logger.debug('Populating value driver with: %s', db_result)
     return models.ValueDriver(
         id=db_result['id'],
         name=db_result['name'],
@@ -697,7 +697,7 @@ def delete_subprocess(db_connection: PooledMySQLConnection, project_id: int, sub
 
 
 def populate_subprocess(db_result) -> models.VCSSubprocess:
-    logger.debug(f'Populating model for subprocess with id={db_result["id"]}.')
+    logger.debug('Populating model for subprocess with id=%s.', db_result['id'])
     return models.VCSSubprocess(
         id=db_result['id'],
         project_id=db_result['project'],
@@ -716,7 +716,7 @@ def populate_subprocess(db_result) -> models.VCSSubprocess:
 
 
 def populate_stakeholder_need(db_connection: PooledMySQLConnection, result) -> models.StakeholderNeed:
-    logger.debug(f'Populating model for stakeholder need with id={result["id"]}.')
+    logger.debug('Populating model for stakeholder need with id=%s.', result['id'])
     return models.StakeholderNeed(
         id=result['id'],
         need=result['need'],
@@ -863,7 +863,7 @@ def get_vcs_row(db_connection: PooledMySQLConnection, project_id: int, vcs_row_i
 
 
 def populate_vcs_row(db_connection: PooledMySQLConnection, project_id: int, db_result) -> models.VcsRow:
-    logger.debug(f'Populating model for table row with id={db_result["id"]}.')
+    logger.debug('Populating model for table row with id=%s.', db_result['id'])
 
     iso_process, subprocess = None, None
     if db_result['iso_process'] is not None:
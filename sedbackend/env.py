@@ -25,8 +25,22 @@ class Environment:
         Environment.parsed = True
 
     @staticmethod
-    def get_variable(var_name):
+    def get_variable(var_name, default=None):
+        """
+        Returns the value of a variable. Raises KeyError if the variable is not set and no default is given.
+        """
         if Environment.parsed is False:
             Environment.parse_env()
 
+        if default is not None and var_name not in Environment.vars:
+            return default
+
         return Environment.vars[var_name]
+
+    @staticmethod
+    def get_int(var_name, default: int) -> int:
+        return int(Environment.get_variable(var_name, str(default)).strip())
+
+    @staticmethod
+    def get_bool(var_name, default: bool) -> bool:
+        return Environment.get_variable(var_name, str(default)).strip().lower() in ('1', 'true', 'yes')
@@ -0,0 +1,190 @@
+import zlib
+from typing import Dict, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:     # Optional. Without it, only gzip is offered
+    brotli = None
+
+# Formats that are not compressed already
+COMPRESSIBLE_CONTENT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml',
+                              'image/svg+xml')
+
+
+class GzipCompressor:
+    encoding = 'gzip'
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    encoding = 'br'
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Parses an Accept-Encoding header into the quality value of each encoding, e.g. "gzip, br;q=0.5" becomes
+    {"gzip": 1.0, "br": 0.5}
+    """
+    encodings = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def accepts_encoding(header: str, encoding: str) -> bool:
+    encodings = parse_accept_encoding(header)
+    return encodings.get(encoding, encodings.get('*', 0.0)) > 0
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, whichever the client prefers, with brotli first among equals. Responses
+    smaller than minimum_size, of types that are compressed already, or with a Content-Encoding of their own (e.g. a
+    pre-compressed file) are sent as they are. Streamed responses are compressed as they are produced, and flushed
+    to the client whenever flush_size bytes have accumulated. Flushing every small chunk would cost compression.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4,
+                 content_types: Sequence[str] = COMPRESSIBLE_CONTENT_TYPES, flush_size: int = 16 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.flush_size = flush_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = tuple(content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or scope['method'] == 'HEAD':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        encodings = parse_accept_encoding(accept_encoding)
+        wildcard = encodings.get('*', 0.0)
+        candidates = (['br'] if brotli is not None else []) + ['gzip']
+        best, best_quality = None, 0.0
+        for encoding in candidates:
+            quality = encodings.get(encoding, wildcard)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compressor(self, encoding: str):
+        if encoding == 'br':
+            return BrotliCompressor(self.brotli_quality)
+        return GzipCompressor(self.gzip_level)
+
+    def should_compress(self, status: int, headers: Headers, first_body: bytes, more_body: bool) -> bool:
+        if status < 200 or status in (204, 206, 304) or 'content-encoding' in headers:
+            return False
+        if not headers.get('content-type', '').startswith(self.content_types):
+            return False
+        if 'content-length' in headers:
+            return int(headers['content-length']) >= self.minimum_size
+        return more_body or len(first_body) >= self.minimum_size
+
+
+class _CompressionResponder:
+    """
+    Holds back the start of the response until the first part of the body shows whether it should be compressed
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.started = False
+        self.pending = bytearray()  # Uncompressed body that has not been flushed yet
+
+    async def send(self, message: Message):
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+            return
+        if message['type'] != 'http.response.body':
+            await self._send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.start_message['headers'])
+            if not self.middleware.should_compress(self.start_message['status'], headers, body, more_body):
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            self.compressor = self.middleware.compressor(self.encoding)
+            headers['Content-Encoding'] = self.encoding
+            headers.add_vary_header('Accept-Encoding')
+            etag = headers.get('etag')
+            if etag is not None and not etag.startswith('W/'):
+                headers['ETag'] = 'W/' + etag   # The compressed bytes differ from those the strong ETag was made for
+            if not more_body:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers['Content-Length'] = str(len(body))
+                await self._send(self.start_message)
+                await self._send({**message, 'body': body})
+                return
+            del headers['Content-Length']
+            await self._send(self.start_message)
+        elif self.compressor is None:
+            await self._send(message)
+            return
+
+        self.pending += body
+        if more_body and len(self.pending) < self.middleware.flush_size:
+            return
+        body = self.compressor.compress(bytes(self.pending))
+        body += self.compressor.flush() if more_body else self.compressor.finish()
+        self.pending.clear()
+        await self._send({**message, 'body': body})
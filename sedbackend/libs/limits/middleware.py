@@ -0,0 +1,49 @@
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """
+    Rejects requests with a body larger than max_size bytes with 413 Request Entity Too Large, as soon as that is known:
+    from the Content-Length header before any of the body is read, or, without one, at the chunk that goes over the
+    limit. The check is made when the body is received, so the error is raised in the request handler and answered by
+    the exception handlers like any other HTTPException. Requests whose body is never read are not affected.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        content_length = _content_length(Headers(scope=scope))
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            if content_length is not None and content_length > self.max_size:
+                raise self.too_large()
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_size:
+                    raise self.too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def too_large(self) -> HTTPException:
+        return HTTPException(status_code=413, detail=f'Request body is larger than {self.max_size} bytes')
+
+
+def _content_length(headers: Headers) -> Optional[int]:
+    try:
+        return int(headers['content-length'])
+    except (KeyError, ValueError):
+        return None
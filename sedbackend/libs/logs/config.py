@@ -0,0 +1,161 @@
+import atexit
+import functools
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Applies a log level per module. The application, and mysqlsb, log through the shared "fastapi" logger, so a record
+    is matched on the module it was logged from as well as on its logger name. The longest matching prefix wins.
+    """
+
+    def __init__(self, default_level: int, module_levels: Dict[str, int]):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = sorted(module_levels.items(), key=lambda item: len(item[0]), reverse=True)
+        self._levels: Dict[tuple, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.pathname)
+        level = self._levels.get(key)
+        if level is None:
+            level = self._level_for(record.name, module_name(record.pathname))
+            self._levels[key] = level
+        return record.levelno >= level
+
+    def _level_for(self, logger_name: str, module: str) -> int:
+        for prefix, level in self.module_levels:
+            for name in (module, logger_name):
+                if name == prefix or name.startswith(prefix + '.'):
+                    return level
+        return self.default_level
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': module_name(record.pathname),
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    Merges the message arguments and the traceback into the record before it is queued, but leaves the formatting
+    to the handlers of the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue handler is the only handler of the root logger, so the record can be changed in place
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+@functools.lru_cache(maxsize=1024)
+def module_name(pathname: str) -> str:
+    """
+    Dotted module name of a source file, e.g. sedbackend.apps.cvs.vcs.storage, or mysqlsb.builder for an installed
+    package. Files outside of the sedbackend package are resolved against the longest entry of sys.path that
+    contains them. A package is named by its __init__ file.
+    """
+    path = os.path.normpath(os.path.abspath(os.path.splitext(pathname)[0]))
+    parts = path.split(os.sep)
+    if 'sedbackend' in parts:
+        parts = parts[parts.index('sedbackend'):]
+    else:
+        root = _import_root(path)
+        parts = os.path.relpath(path, root).split(os.sep) if root is not None else parts[-1:]
+    if len(parts) > 1 and parts[-1] == '__init__':
+        parts = parts[:-1]
+    return '.'.join(parts)
+
+
+def _import_root(path: str) -> Optional[str]:
+    roots = [os.path.normpath(os.path.abspath(entry)) for entry in sys.path]
+    roots = [root for root in roots if path.startswith(root.rstrip(os.sep) + os.sep)]
+    return max(roots, key=len) if roots else None
+
+
+def parse_module_levels(spec: str) -> Dict[str, int]:
+    """
+    Parses per-module levels written as "module=LEVEL,module=LEVEL", e.g. "sedbackend.apps.cvs=DEBUG,mysqlsb=WARNING"
+    """
+    module_levels = {}
+    for item in spec.split(','):
+        if '=' not in item:
+            continue
+        module, level = item.split('=', 1)
+        module_levels[module.strip()] = parse_level(level)
+    return module_levels
+
+
+def parse_level(level: str) -> int:
+    levelno = logging.getLevelName(level.strip().upper())
+    if not isinstance(levelno, int):
+        raise ValueError(f'Unknown log level "{level}"')
+    return levelno
+
+
+def _stop_listener(listener: QueueListener):
+    if listener._thread is not None:     # Not stopped already, which would fail
+        listener.stop()
+
+
+def configure_logging(handlers: List[logging.Handler], level: int = logging.INFO,
+                      module_levels: Optional[Dict[str, int]] = None, json_output: bool = False) -> QueueListener:
+    """
+    Routes all logging through a queue to the given handlers, which run in a background thread. Request threads only
+    pay for the level checks and for merging the arguments of records that pass them, never for formatting log
+    lines or disk I/O.
+    :param handlers: Handlers that write the records, e.g. to a file
+    :param level: Default level
+    :param module_levels: Levels of specific modules or loggers, overriding the default level
+    :param json_output: Write one JSON object per record instead of text
+    :return: The started listener. It is stopped when the interpreter exits.
+    """
+    module_levels = module_levels or {}
+    formatter = JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ModuleLevelFilter(level, module_levels))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    # The cheap level check on the logger only has to let through what the most verbose module needs
+    root.setLevel(min([level] + list(module_levels.values())))
+
+    return listener
@@ -0,0 +1,185 @@
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int       # Bytes
+    mtime: float    # Seconds since the epoch
+
+
+class StorageBackend(ABC):
+    """
+    Where stored content is kept. Content is addressed by keys, relative paths with / as separator such as
+    "ab/cd/<hash>", and is never modified in place: it is written once, read, and deleted. Missing content raises
+    FileNotFoundError.
+    """
+
+    @abstractmethod
+    def store(self, key: str, local_path: str):
+        """
+        Moves a local file, e.g. an upload that was written to a temporary file, to key. The local file is gone after.
+        """
+        ...
+
+    @abstractmethod
+    def upload(self, key: str, file_object: BinaryIO):
+        """
+        Copies the content of a readable file object to key
+        """
+        ...
+
+    @abstractmethod
+    def put_bytes(self, key: str, content: bytes):
+        """
+        Writes content to key
+        """
+        ...
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[StoredObject]:
+        """
+        Size and modification time of the content at key, or None if there is none
+        """
+        ...
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """
+        Opens the content at key for reading. The file is seekable, since readers of e.g. Excel files need that.
+        """
+        ...
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int, end: int, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Reads the bytes from start to end, inclusive, in chunks
+        """
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Deletes the content at key, if there is any
+        """
+        ...
+
+    @abstractmethod
+    def list_objects(self) -> Iterator[StoredObject]:
+        """
+        All stored content, ordered by key
+        """
+        ...
+
+    def local_path(self, key: str) -> Optional[str]:
+        """
+        Path of the content at key in the local filesystem, for backends that keep it there, otherwise None
+        """
+        return None
+
+    def presigned_url(self, key: str, filename: str, expires_in: int) -> Optional[str]:
+        """
+        URL that clients can download the content at key from directly for expires_in seconds, as filename, for
+        backends that support it, otherwise None
+        """
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Keeps content in a directory of the local filesystem, under the path of its key. Content is written to a temporary
+    file next to its final path first, so that readers never see partial content.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.join(os.path.abspath(root), '')
+
+    def local_path(self, key: str) -> str:
+        return self._path(key)
+
+    def _path(self, key: str) -> str:
+        return self.root + key
+
+    def store(self, key: str, local_path: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(local_path, path)
+
+    def upload(self, key: str, file_object: BinaryIO):
+        self._write(key, lambda f: shutil.copyfileobj(file_object, f, COPY_CHUNK_SIZE))
+
+    def put_bytes(self, key: str, content: bytes):
+        self._write(key, lambda f: f.write(content))
+
+    def _write(self, key: str, write_content):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                write_content(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat_result = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key, stat_result.st_size, stat_result.st_mtime)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), 'rb')
+
+    def iter_range(self, key: str, start: int, end: int, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+        with self.open(key) as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list_objects(self) -> Iterator[StoredObject]:
+        if os.path.isdir(self.root):
+            yield from self._walk(self.root, '')
+
+    def _walk(self, directory: str, prefix: str) -> Iterator[StoredObject]:
+        # Directories are sorted with their separator, so that the keys come out in the order that a flat listing
+        # of them would have, e.g. "ab/cd" before "ab0"
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    entries.append((entry.name + '/', entry))
+                elif entry.is_file(follow_symlinks=False):
+                    entries.append((entry.name, entry))
+
+        for name, entry in sorted(entries, key=lambda e: e[0]):
+            if name.endswith('/'):
+                yield from self._walk(entry.path, prefix + name)
+            else:
+                try:
+                    stat_result = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue    # Deleted meanwhile
+                yield StoredObject(prefix + name, stat_result.st_size, stat_result.st_mtime)
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from typing import BinaryIO, Iterator, Optional
+from urllib.parse import quote
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:     # Optional. Only needed with the S3 backend
+    boto3 = None
+
+from sedbackend.libs.objectstorage.backends import COPY_CHUNK_SIZE, StorageBackend, StoredObject
+
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+SPOOL_SIZE = 8 * 1024 * 1024    # Downloads for reading that are larger are spooled to a temporary file
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Keeps content in a bucket of an S3 compatible object store, e.g. AWS S3 or MinIO, so that several API nodes can
+    share it. Content larger than MULTIPART_CHUNK_SIZE is uploaded in parts, several at a time, streamed from the file
+    it is read from.
+    """
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, region: Optional[str] = None,
+                 access_key: Optional[str] = None, secret_key: Optional[str] = None, max_concurrency: int = 4):
+        if boto3 is None:
+            raise RuntimeError('The S3 storage backend requires the boto3 package')
+
+        self.bucket = bucket
+        # Path style addressing, since MinIO and most other S3 compatible stores do not resolve bucket subdomains
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region, aws_access_key_id=access_key,
+                                   aws_secret_access_key=secret_key,
+                                   config=Config(signature_version='s3v4', s3={'addressing_style': 'path'},
+                                                 max_pool_connections=max(10, max_concurrency * 2)))
+        self.transfer_config = TransferConfig(multipart_threshold=MULTIPART_CHUNK_SIZE,
+                                              multipart_chunksize=MULTIPART_CHUNK_SIZE,
+                                              max_concurrency=max_concurrency)
+
+    def store(self, key: str, local_path: str):
+        self.client.upload_file(local_path, self.bucket, key, Config=self.transfer_config)
+        os.remove(local_path)
+
+    def upload(self, key: str, file_object: BinaryIO):
+        self.client.upload_fileobj(file_object, self.bucket, key, Config=self.transfer_config)
+
+    def put_bytes(self, key: str, content: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=content)
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            res = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if _is_not_found(e):
+                return None
+            raise
+        return StoredObject(key, res['ContentLength'], res['LastModified'].timestamp())
+
+    def open(self, key: str) -> BinaryIO:
+        file_object = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        try:
+            self.client.download_fileobj(self.bucket, key, file_object, Config=self.transfer_config)
+        except ClientError as e:
+            file_object.close()
+            if _is_not_found(e):
+                raise FileNotFoundError(key)
+            raise
+        file_object.seek(0)
+        return file_object
+
+    def iter_range(self, key: str, start: int, end: int, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=key, Range=f'bytes={start}-{end}')['Body']
+        except ClientError as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(key)
+            raise
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list_objects(self) -> Iterator[StoredObject]:
+        # Listed in the order of the UTF-8 bytes of the keys, which is the order of the strings for ASCII keys
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket):
+            for obj in page.get('Contents', []):
+                yield StoredObject(obj['Key'], obj['Size'], obj['LastModified'].timestamp())
+
+    def presigned_url(self, key: str, filename: str, expires_in: int) -> str:
+        return self.client.generate_presigned_url(
+            'get_object', ExpiresIn=expires_in,
+            Params={'Bucket': self.bucket, 'Key': key,
+                    'ResponseContentDisposition': f"attachment; filename*=utf-8''{quote(filename)}"})
+
+
+def _is_not_found(error: 'ClientError') -> bool:
+    return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
@@ -0,0 +1,11 @@
+class UnsupportedSheetTypeException(Exception):
+    def __init__(self, extension: str = None):
+        self.extension = extension
+
+
+class InvalidSheetException(Exception):
+    """
+    The file could not be read as a sheet of its type, e.g. a CSV file that is not UTF-8 or a corrupt Excel workbook
+    """
+    def __init__(self, message: str = None):
+        self.message = message
@@ -0,0 +1,64 @@
+import csv
+import io
+import zipfile
+from typing import Iterator, BinaryIO
+
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+
+from sedbackend.libs.spreadsheets.exceptions import InvalidSheetException, UnsupportedSheetTypeException
+
+CSV_EXTENSIONS = ['.csv']
+EXCEL_EXTENSIONS = ['.xlsx', '.xlsm']
+SUPPORTED_EXTENSIONS = CSV_EXTENSIONS + EXCEL_EXTENSIONS
+
+
+def read_sheet(file: BinaryIO, extension: str) -> Iterator[list]:
+    """
+    Streams the rows of a CSV or Excel sheet as lists of cell values, without loading the whole sheet into memory.
+    Only the first worksheet of an Excel workbook is read.
+
+    :raises UnsupportedSheetTypeException: If the extension is not a supported sheet type
+    :raises InvalidSheetException: While the rows are read, if the file cannot be read as a sheet of its type
+    """
+    extension = extension.lower()
+    if extension in CSV_EXTENSIONS:
+        return _read_rows(_read_csv(file))
+    elif extension in EXCEL_EXTENSIONS:
+        return _read_rows(_read_excel(file))
+    raise UnsupportedSheetTypeException(extension)
+
+
+def _read_rows(rows: Iterator[list]) -> Iterator[list]:
+    # The sheet is read lazily, so errors in its content only surface while the rows are iterated
+    try:
+        yield from rows
+    except UnicodeDecodeError:
+        raise InvalidSheetException('The file is not UTF-8 encoded')
+    except csv.Error as e:
+        raise InvalidSheetException(f'The file is not a valid CSV file: {e}')
+    except (zipfile.BadZipFile, InvalidFileException, KeyError):
+        raise InvalidSheetException('The file is not a valid Excel workbook')
+
+
+def _read_csv(file: BinaryIO) -> Iterator[list]:
+    text_file = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        sample = text_file.read(4096)
+        text_file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(text_file, dialect)
+    finally:
+        text_file.detach()  # Leave the file open for its owner
+
+
+def _read_excel(file: BinaryIO) -> Iterator[list]:
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
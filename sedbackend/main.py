@@ -32,5 +32,19 @@ app.add_middleware(
 )
 
 
+setup.install_compression(app)
+
+setup.install_body_size_limit(app)
+
 # Misc middleware
 setup.install_middleware(app)
+
+setup.install_query_stats(app)
+
+setup.install_metrics(app)
+
+setup.install_threadpool(app)
+
+setup.install_database(app)
+
+setup.install_file_reconciliation(app)
@@ -1,32 +1,229 @@
+import secrets
 import time
-import logging
 from logging.handlers import TimedRotatingFileHandler
 import tempfile
 
+import anyio
 import mysqlsb
 from fastapi import Request
 from fastapi.logger import logger
-from starlette.responses import Response
+from mysql.connector.errors import PoolError
+from starlette.responses import Response, JSONResponse
+
+from sedbackend.apps.core.db import POOL_SIZE, JOBS_POOL_SIZE, JOBS_POOL_MAX_WAITING, REPLICA_HOSTS, \
+    REPLICA_JOBS_POOL_SIZE, start_replica_health_checks, get_pool_stats
+from sedbackend.apps.core.db_async import close_async_pool
+from sedbackend.apps.core import query_stats, metrics
+from sedbackend.apps.core.files.reconcile import start_reconciliation
+from sedbackend.env import Environment
+from sedbackend.libs.compression.middleware import CompressionMiddleware
+from sedbackend.libs.limits.middleware import BodySizeLimitMiddleware
+from sedbackend.libs.logs.config import configure_logging, parse_level, parse_module_levels
 
 # Set database logger
 mysqlsb.Configuration.logger = logger
 
+DEBUG = Environment.get_bool('DEBUG', False)
+METRICS_TOKEN = Environment.get_variable('METRICS_TOKEN', '').strip()   # Required by /metrics, which is off without it
+
+COMPRESSION_MIN_SIZE = Environment.get_int('COMPRESSION_MIN_SIZE', 1000)   # Bytes
+GZIP_LEVEL = Environment.get_int('GZIP_LEVEL', 6)                           # 1 (fastest) - 9 (smallest)
+BROTLI_QUALITY = Environment.get_int('BROTLI_QUALITY', 4)                   # 0 (fastest) - 11 (smallest)
+
+# Bytes. Room for the largest file upload (100MB) and its multipart framing
+MAX_REQUEST_BODY_SIZE = Environment.get_int('MAX_REQUEST_BODY_SIZE', 101 * 10 ** 6)
+
 
 def config_default_logging():
     """
-    Should be run during application setup
+    Should be run during application setup.
+    The level is set by LOG_LEVEL (default INFO), per-module levels by LOG_LEVELS, e.g.
+    "sedbackend.apps.cvs.vcs=DEBUG,mysqlsb=WARNING", and LOG_JSON switches to one JSON object per line.
     :return:
     """
-    log_level = logging.DEBUG
     log_name = tempfile.gettempdir()+"/sed-backend.log"
     file_name_date_handler = TimedRotatingFileHandler(log_name, when="midnight", interval=1)
     file_name_date_handler.suffix = "%Y%m%d"
-    log_format = "%(asctime)s - %(levelname)s - %(message)s"
     handlers = [file_name_date_handler]
-    logging.basicConfig(
-        handlers=handlers,
-        format=log_format,
-        level=log_level)
+    configure_logging(
+        handlers,
+        level=parse_level(Environment.get_variable('LOG_LEVEL', 'INFO')),
+        module_levels=parse_module_levels(Environment.get_variable('LOG_LEVELS', '')),
+        json_output=Environment.get_bool('LOG_JSON', False))
+
+
+# Request handlers and dependencies are sync functions, which Starlette runs in the default thread pool. Threads beyond
+# the connection pool size wait for a connection in get_connection, while leaving room for work that does not need
+# the database (password hashing, cached authentication, file parsing). Jobs can hold at most
+# JOBS_POOL_SIZE + JOBS_POOL_MAX_WAITING threads, plus REPLICA_JOBS_POOL_SIZE per read replica, so they never take the
+# threads of interactive requests.
+THREADPOOL_SIZE = 2 * POOL_SIZE + JOBS_POOL_SIZE + JOBS_POOL_MAX_WAITING + REPLICA_JOBS_POOL_SIZE * len(REPLICA_HOSTS)
+
+
+def install_threadpool(app):
+    """
+    Bounds the thread pool used for sync request handlers
+    :param app: FastAPI app
+    :return: Null
+    """
+
+    @app.on_event("startup")
+    async def set_threadpool_size():
+        anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+
+def install_database(app):
+    """
+    Starts the read replica health checks, closes the async database pool when the application shuts down, and
+    answers requests that could not get a database connection with 503 Service Unavailable
+    :param app: FastAPI app
+    :return: Null
+    """
+    app.add_event_handler("startup", start_replica_health_checks)
+    app.add_event_handler("shutdown", close_async_pool)
+
+    @app.exception_handler(PoolError)
+    async def pool_exhausted(request: Request, exc: PoolError):
+        return JSONResponse(status_code=503, content={"detail": "The server is busy, please try again later"},
+                            headers={"Retry-After": "5"})
+
+
+def install_query_stats(app):
+    """
+    Records the database queries of every request and aggregates them per route. Statements executed many times in
+    one request, typically once per row, are logged as warnings. In debug mode, the numbers are also returned as
+    response headers.
+    :param app: FastAPI app
+    :return: Null
+    """
+    route_name = _route_names(app)
+
+    @app.middleware("http")
+    async def record_queries(request: Request, call_next):
+        with query_stats.record_request_queries() as stats:
+            response = await call_next(request)
+
+        route = f'{request.method} {route_name(request)}'
+        repeated = stats.repeated()
+        if repeated:
+            logger.warning('Possible N+1 queries in %s: %s', route,
+                           '; '.join(f'{n}x "{fp}"' for fp, n in repeated[:3]))
+        query_stats.add_route_stats(route, stats, len(repeated) > 0)
+
+        if DEBUG:
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Query-Time'] = f'{stats.total_time * 1000:.2f}'
+            response.headers['X-DB-Repeated-Queries'] = str(len(repeated))
+        return response
+
+
+def install_metrics(app):
+    """
+    Exposes metrics in the Prometheus text format on /metrics: latency and response size histograms and request
+    counts per route, requests in progress, database connection pools and simulation jobs. Scrapers have to send
+    METRICS_TOKEN as a bearer token. Without a token, the endpoint denies all requests.
+    :param app: FastAPI app
+    :return: Null
+    """
+    route_name = _route_names(app)
+    metrics.registry.register_collector(_pool_metrics)
+
+    @app.middleware("http")
+    async def record_metrics(request: Request, call_next):
+        method = request.method
+        metrics.http_requests_in_progress.inc(method=method)
+        start_time = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            metrics.http_requests_in_progress.dec(method=method)
+            route = route_name(request)
+            metrics.http_request_duration.observe(time.perf_counter() - start_time, method=method, route=route)
+            metrics.http_requests.inc(method=method, route=route, status=status_code)
+
+        content_length = response.headers.get('content-length')
+        if content_length is not None:
+            metrics.http_response_size.observe(int(content_length), method=method, route=route)
+        return response
+
+    # Async, so that scrapes are answered even when all worker threads are busy
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics(request: Request):
+        if not METRICS_TOKEN:
+            return Response(status_code=403)    # Route names and pool sizes are not for the public
+        if not secrets.compare_digest(request.headers.get('authorization', ''), f'Bearer {METRICS_TOKEN}'):
+            return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _pool_metrics():
+    stats = get_pool_stats()
+    pool_metrics = [
+        (metrics.Gauge('db_pool_size', 'Connections in the pool', ['pool']), 'size'),
+        (metrics.Gauge('db_pool_connections_in_use', 'Connections checked out', ['pool']), 'in_use'),
+        (metrics.Counter('db_pool_checkouts_total', 'Connections checked out', ['pool']), 'checkouts'),
+        (metrics.Counter('db_pool_waits_total', 'Checkouts that waited for a free connection', ['pool']), 'waits'),
+        (metrics.Counter('db_pool_rejected_total', 'Checkouts that timed out or were refused', ['pool']), 'rejected'),
+        (metrics.Counter('db_pool_wait_seconds_total', 'Time spent waiting for connections', ['pool']),
+         'wait_time_total'),
+        (metrics.Counter('db_pool_checkout_seconds_total', 'Time connections were held', ['pool']),
+         'checkout_duration_total'),
+        (metrics.Gauge('db_pool_healthy', '1 if the pool is in rotation', ['pool']), 'healthy'),
+    ]
+    for metric, field in pool_metrics:
+        for pool_stats in stats:
+            metric.set(float(getattr(pool_stats, field)), pool=pool_stats.name)
+    return [metric for metric, _ in pool_metrics]
+
+
+def _route_names(app):
+    """
+    Returns a function that names the route of a request by its path template, e.g. /api/cvs/project/{native_project_id}
+    rather than the requested path, so that requests to the same endpoint are counted together
+    """
+    endpoint_paths = {}
+
+    def route_name(request: Request) -> str:
+        endpoint = request.scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        if not endpoint_paths:
+            endpoint_paths.update({r.endpoint: r.path for r in app.routes if hasattr(r, 'endpoint')})
+        return endpoint_paths.get(endpoint, endpoint.__name__)
+
+    return route_name
+
+
+def install_compression(app):
+    """
+    Compresses responses of COMPRESSION_MIN_SIZE bytes or more with brotli or gzip. Install it before the middleware
+    that measures responses, so that they see the compressed size.
+    :param app: FastAPI app
+    :return: Null
+    """
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_level=GZIP_LEVEL,
+                       brotli_quality=BROTLI_QUALITY)
+
+
+def install_body_size_limit(app):
+    """
+    Answers requests with a body larger than MAX_REQUEST_BODY_SIZE bytes with 413 Request Entity Too Large, before the
+    body is read or spooled to disk
+    :param app: FastAPI app
+    :return: Null
+    """
+    app.add_middleware(BodySizeLimitMiddleware, max_size=MAX_REQUEST_BODY_SIZE)
+
+
+def install_file_reconciliation(app):
+    """
+    Reconciles stored files with the database every FILES_RECONCILE_INTERVAL seconds, if it is set
+    :param app: FastAPI app
+    :return: Null
+    """
+    app.add_event_handler("startup", start_reconciliation)
 
 
 def install_middleware(app):
@@ -55,7 +252,7 @@ def install_middleware(app):
         if request.url.query:
             url_str += ('?' + request.url.query)
 
-        logger.info(f"Request completed_in={formatted_process_time}ms status_code={response.status_code} "
-                    f"path={url_str}")
+        logger.info("Request completed_in=%sms status_code=%s path=%s", formatted_process_time, response.status_code,
+                    url_str)
 
         return response
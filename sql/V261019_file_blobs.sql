@@ -0,0 +1,12 @@
+# Files with the same content share one blob, stored under its SHA-256 hash as <ab>/<cd>/<hash> in the upload
+# directory. The blob is removed when the last file referencing it is deleted.
+CREATE TABLE IF NOT EXISTS `seddb`.`files_blobs` (
+  `hash` CHAR(64) NOT NULL,
+  `size` BIGINT UNSIGNED NOT NULL,
+  `ref_count` INT UNSIGNED NOT NULL DEFAULT 0,
+  PRIMARY KEY (`hash`));
+
+# Hash of the blob of a file. Files stored before have none, and are not shared.
+ALTER TABLE `seddb`.`files`
+    ADD COLUMN `hash` CHAR(64) NULL DEFAULT NULL AFTER `extension`,
+    ADD INDEX `FILES_HASH` (`hash` ASC) VISIBLE;
@@ -0,0 +1,3 @@
+# Looks up files on disk by name (the uuid) when stored files are reconciled with the database
+ALTER TABLE `seddb`.`files`
+    ADD INDEX `FILES_UUID` (`uuid` ASC) VISIBLE;
@@ -0,0 +1,100 @@
+import io
+import os
+
+import pytest
+
+import sedbackend.apps.core.files.migrate as migrate
+import sedbackend.apps.core.files.models as models
+from sedbackend.libs.objectstorage.backends import LocalStorageBackend, StorageBackend
+
+# Runs the S3 tests against a local MinIO, e.g. the one in the README, if set: http://localhost:9000
+S3_TEST_ENDPOINT_URL = os.environ.get('S3_TEST_ENDPOINT_URL')
+
+
+def check_backend(backend, local_path):
+    # Setup
+    with open(local_path, 'wb') as f:
+        f.write(b'0123456789')
+
+    # Act
+    backend.store('ab/cd/abcd', local_path)
+    backend.put_bytes('ab/cd/abcd.gz', b'compressed')
+    backend.upload('ab0', io.BytesIO(b'legacy'))
+    with backend.open('ab/cd/abcd') as f:
+        content = f.read()
+    content_range = b''.join(backend.iter_range('ab/cd/abcd', 2, 4, chunk_size=2))
+    keys = [stored_object.key for stored_object in backend.list_objects()]
+    stat = backend.stat('ab/cd/abcd')
+    backend.delete('ab/cd/abcd')
+    backend.delete('ab/cd/abcd')
+
+    # Assert
+    assert os.path.exists(local_path) is False
+    assert content == b'0123456789'
+    assert content_range == b'234'
+    assert keys == ['ab/cd/abcd', 'ab/cd/abcd.gz', 'ab0']
+    assert stat.size == 10
+    assert backend.exists('ab/cd/abcd') is False
+    assert backend.stat('ab/cd/abcd') is None
+    with pytest.raises(FileNotFoundError):
+        backend.open('ab/cd/abcd')
+
+    # Cleanup
+    backend.delete('ab/cd/abcd.gz')
+    backend.delete('ab0')
+
+
+def test_local_backend(tmp_path):
+    check_backend(LocalStorageBackend(str(tmp_path / 'storage')), str(tmp_path / 'upload'))
+
+
+def test_backend_must_implement_all_operations():
+    # Setup
+    class ReadOnlyBackend(StorageBackend):
+        def stat(self, key):
+            return None
+
+    # Act, Assert
+    with pytest.raises(TypeError):
+        StorageBackend()
+    with pytest.raises(TypeError):
+        ReadOnlyBackend()
+
+
+@pytest.mark.skipif(S3_TEST_ENDPOINT_URL is None, reason='S3_TEST_ENDPOINT_URL is not set')
+def test_s3_backend(tmp_path):
+    from sedbackend.libs.objectstorage.s3 import S3StorageBackend
+    backend = S3StorageBackend('sed-test', endpoint_url=S3_TEST_ENDPOINT_URL,
+                               access_key=os.environ.get('S3_TEST_ACCESS_KEY', 'minioadmin'),
+                               secret_key=os.environ.get('S3_TEST_SECRET_KEY', 'minioadmin'))
+    try:
+        backend.client.create_bucket(Bucket='sed-test')
+    except backend.client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    check_backend(backend, str(tmp_path / 'upload'))
+
+
+def test_migrate_files(tmp_path):
+    # Setup
+    source = LocalStorageBackend(str(tmp_path / 'source'))
+    destination = LocalStorageBackend(str(tmp_path / 'destination'))
+    for i in range(20):
+        source.put_bytes(f'{i:02x}/00/{i:02x}00', bytes(i))
+    source.put_bytes('tmp/upload', b'Not copied')
+    destination.put_bytes('00/00/0000', bytes(0))
+
+    # Act
+    report = migrate.migrate_files(source, destination, models.StorageMigrationReport(source='a', destination='b'),
+                                   workers=4)
+
+    # Assert
+    assert report.objects_checked == 20
+    assert report.objects_copied == 19
+    assert report.objects_skipped == 1
+    assert report.objects_failed == 0
+    assert report.bytes_copied == sum(range(20))
+    assert [obj.key for obj in destination.list_objects()] == [obj.key for obj in source.list_objects()
+                                                               if not obj.key.startswith('tmp/')]
+    with destination.open('13/00/1300') as f:
+        assert f.read() == bytes(19)
@@ -1,4 +1,8 @@
+import hashlib
 import tempfile
+
+import pytest
+
 import tests.apps.core.projects.testutils as tu_proj
 import tests.apps.core.users.testutils as tu_users
 import tests.apps.core.files.testutils as tu_files
@@ -6,7 +10,11 @@ import tests.testutils as tu
 
 import sedbackend.apps.core.files.implementation as impl
 import sedbackend.apps.core.files.models as models
+import sedbackend.apps.core.files.storage as storage
+import sedbackend.apps.core.files.exceptions as exc
+import sedbackend.apps.core.files.responses as responses
 import sedbackend.apps.core.users.implementation as impl_users
+from sedbackend.apps.core.db import get_connection
 from sedbackend.apps.core.projects.models import AccessLevel
 
 
@@ -156,3 +164,169 @@ def test_delete_file_owner(client, std_headers, std_user):
     # Cleanup
     tu_proj.delete_subprojects([subp])
     tu_proj.delete_projects([project])
+
+
+def test_identical_files_share_blob(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu_proj.seed_random_project(current_user.id)
+    subp = tu_proj.seed_random_subproject(current_user.id, project.id)
+    content = bytes(tu.random_str(100, 200), 'utf-8')
+
+    saved_files = []
+    for _ in range(2):
+        tmp_file = tempfile.SpooledTemporaryFile()
+        tmp_file.write(content)
+        tmp_file.seek(0)
+        post_file = models.StoredFilePost(
+            filename="hello.txt",
+            owner_id=current_user.id,
+            extension=".txt",
+            file_object=tmp_file,
+            subproject_id=subp.id
+        )
+        saved_files.append(impl.impl_save_file(post_file))
+
+    # Act
+    paths = [impl.impl_get_file_path(saved_file.id, current_user.id) for saved_file in saved_files]
+    impl.impl_delete_file(saved_files[0].id, current_user.id)
+    exists_after_first_delete = storage.stored_file_exists(paths[1])
+    res = client.get(f"/api/core/files/{saved_files[1].id}/download", headers=std_headers)
+    impl.impl_delete_file(saved_files[1].id, current_user.id)
+
+    # Assert
+    assert saved_files[0].id != saved_files[1].id
+    assert paths[0].key == paths[1].key
+    assert paths[0].hash is not None
+    assert exists_after_first_delete
+    assert res.content == content
+    assert storage.stored_file_exists(paths[1]) is False
+
+    # Cleanup
+    tu_proj.delete_subprojects([subp])
+    tu_proj.delete_projects([project])
+
+
+def test_delete_file_rolled_back_keeps_content(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu_proj.seed_random_project(current_user.id)
+    subp = tu_proj.seed_random_subproject(current_user.id, project.id)
+    content = bytes(tu.random_str(100, 200), 'utf-8')
+    tmp_file = tempfile.SpooledTemporaryFile()
+    tmp_file.write(content)
+    tmp_file.seek(0)
+    post_file = models.StoredFilePost(
+        filename="hello.txt",
+        owner_id=current_user.id,
+        extension=".txt",
+        file_object=tmp_file,
+        subproject_id=subp.id
+    )
+    saved_file = impl.impl_save_file(post_file)
+    path = impl.impl_get_file_path(saved_file.id, current_user.id)
+
+    # Act
+    with get_connection() as con:
+        storage.db_delete_file(con, saved_file.id, current_user.id)
+        con.rollback()
+    res = client.get(f"/api/core/files/{saved_file.id}/download", headers=std_headers)
+
+    # Assert
+    assert storage.stored_file_exists(path)
+    assert res.status_code == 200
+    assert res.content == content
+
+    # Cleanup
+    tu_files.delete_files([saved_file], [current_user])
+    tu_proj.delete_subprojects([subp])
+    tu_proj.delete_projects([project])
+
+
+def test_check_upload():
+    # Setup
+    tmp_file = tempfile.SpooledTemporaryFile()
+    tmp_file.write(b'Processes,Start,Stop\n' + b'Process,1,0\n' * 10000)
+
+    # Act
+    mime = storage.check_upload(tmp_file, max_size=200000)
+
+    # Assert
+    assert mime == 'CSV text'
+    assert tmp_file.tell() == 0
+    with pytest.raises(exc.FileSizeException):
+        storage.check_upload(tmp_file, max_size=1000)
+
+
+def test_write_temp_content():
+    # Act
+    tmp_path, digest, size = storage.write_temp_content(lambda f: f.write('Processes,Start\r\nÅ,X\r\n'),
+                                                        encoding='utf-8')
+    with open(tmp_path, 'rb') as f:
+        content = f.read()
+    storage.remove_temp_file(tmp_path)
+
+    # Assert
+    assert content == 'Processes,Start\r\nÅ,X\r\n'.encode('utf-8')
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert size == len(content)
+    with pytest.raises(exc.FileSizeException):
+        storage.write_temp_content(lambda f: f.write(b'0' * 100), max_size=10)
+
+
+def test_get_file_conditional_and_range(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu_proj.seed_random_project(current_user.id)
+    subp = tu_proj.seed_random_subproject(current_user.id, project.id)
+    content = bytes(tu.random_str(100, 200), 'utf-8')
+    tmp_file = tempfile.SpooledTemporaryFile()
+    tmp_file.write(content)
+    tmp_file.seek(0)
+    post_file = models.StoredFilePost(
+        filename="hello.txt",
+        owner_id=current_user.id,
+        extension=".txt",
+        file_object=tmp_file,
+        subproject_id=subp.id
+    )
+    saved_file = impl.impl_save_file(post_file)
+    url = f"/api/core/files/{saved_file.id}/download"
+
+    # Act
+    res = client.get(url, headers=std_headers)
+    res_etag = client.get(url, headers={**std_headers, 'If-None-Match': res.headers['ETag']})
+    res_date = client.get(url, headers={**std_headers, 'If-Modified-Since': res.headers['Last-Modified']})
+    res_range = client.get(url, headers={**std_headers, 'Range': 'bytes=10-19'})
+    res_stale_range = client.get(url, headers={**std_headers, 'Range': 'bytes=10-19', 'If-Range': '"stale"'})
+    res_outside = client.get(url, headers={**std_headers, 'Range': f'bytes={len(content)}-'})
+
+    # Assert
+    assert res.status_code == 200
+    assert res.headers['ETag'] == f'"{impl.impl_get_file_path(saved_file.id, current_user.id).hash}"'
+    assert 'immutable' in res.headers['Cache-Control']
+    assert res_etag.status_code == 304
+    assert res_date.status_code == 304
+    assert res_range.status_code == 206
+    assert res_range.headers['Content-Range'] == f'bytes 10-19/{len(content)}'
+    assert res_range.content == content[10:20]
+    assert res_stale_range.status_code == 200
+    assert res_stale_range.content == content
+    assert res_outside.status_code == 416
+
+    # Cleanup
+    tu_files.delete_files([saved_file], [current_user])
+    tu_proj.delete_subprojects([subp])
+    tu_proj.delete_projects([project])
+
+
+def test_parse_range():
+    # Act, Assert
+    assert responses.parse_range('bytes=0-99', 1000) == (0, 99)
+    assert responses.parse_range('bytes=900-', 1000) == (900, 999)
+    assert responses.parse_range('bytes=-100', 1000) == (900, 999)
+    assert responses.parse_range('bytes=900-2000', 1000) == (900, 999)
+    assert responses.parse_range('bytes=0-1,5-6', 1000) is None
+    assert responses.parse_range('lines=0-1', 1000) is None
+    with pytest.raises(responses.RangeNotSatisfiable):
+        responses.parse_range('bytes=1000-', 1000)
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import time
+
+import sedbackend.apps.core.files.reconcile as reconcile
+import sedbackend.apps.core.files.storage as storage
+from sedbackend.apps.core.db import get_dedicated_connection
+from sedbackend.libs.objectstorage.backends import LocalStorageBackend
+
+
+def test_reconcile_orphaned_blob(tmp_path, monkeypatch):
+    # Setup
+    # Only the content in storage is checked, in a storage of its own, since the rows of the shared database would
+    # otherwise look like files whose content is missing
+    backend = LocalStorageBackend(str(tmp_path / 'storage'))
+    monkeypatch.setattr(storage, '_storage_backend', backend)
+    monkeypatch.setattr(storage, 'FILES_TMP_DIR', str(tmp_path / 'tmp') + '/')
+    digest = hashlib.sha256(os.urandom(16)).hexdigest()
+    key = storage.blob_key(digest)
+    backend.put_bytes(key, b'No row references this blob')
+    backend.put_bytes(key + '.gz', b'Nor its pre-compressed response')
+    backend.put_bytes('recent/upload', b'Not a blob')
+    past = time.time() - 2 * reconcile.GRACE_PERIOD
+    os.utime(backend.local_path(key), (past, past))
+    os.utime(backend.local_path(key + '.gz'), (past, past))
+
+    # Act
+    with get_dedicated_connection() as con:
+        dry_run = reconcile._Reconciler(con, False, 100, reconcile._Throttle(0))
+        dry_run.check_disk()
+        exists_after_dry_run = backend.exists(key)
+        applied = reconcile._Reconciler(con, True, 100, reconcile._Throttle(0))
+        applied.check_disk()
+
+    # Assert
+    assert dry_run.report.dry_run is True
+    assert dry_run.report.orphaned_disk_files == 2
+    assert exists_after_dry_run
+    assert applied.report.dry_run is False
+    assert applied.report.orphaned_disk_files == 2
+    assert backend.exists(key) is False
+    assert backend.exists(key + '.gz') is False
+    assert backend.exists('recent/upload')
+
+
+def test_reconcile_single_run(tmp_path, monkeypatch):
+    # Setup
+    monkeypatch.setattr(storage, '_storage_backend', LocalStorageBackend(str(tmp_path / 'storage')))
+    monkeypatch.setattr(storage, 'FILES_TMP_DIR', str(tmp_path / 'tmp') + '/')
+
+    # Act
+    with get_dedicated_connection() as con:
+        with con.cursor() as cursor:
+            cursor.execute('SELECT GET_LOCK(%s, 0)', [reconcile.LOCK_NAME])
+            cursor.fetchall()
+        report = reconcile.run_reconciliation(apply=False, io_rate=0)
+        with con.cursor() as cursor:
+            cursor.execute('SELECT RELEASE_LOCK(%s)', [reconcile.LOCK_NAME])
+            cursor.fetchall()
+
+    # Assert
+    assert report is None
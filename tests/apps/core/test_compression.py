@@ -0,0 +1,86 @@
+import asyncio
+import gzip
+
+from sedbackend.libs.compression.middleware import parse_accept_encoding, CompressionMiddleware
+
+
+def test_parse_accept_encoding():
+    # Act
+    encodings = parse_accept_encoding('gzip, deflate;q=0.5, br;q=0, *;q=0.1')
+
+    # Assert
+    assert encodings == {'gzip': 1.0, 'deflate': 0.5, 'br': 0.0, '*': 0.1}
+
+
+def test_choose_encoding():
+    # Setup
+    middleware = CompressionMiddleware(None)
+
+    # Act, Assert
+    assert middleware.choose_encoding('gzip, br;q=0') == 'gzip'
+    assert middleware.choose_encoding('identity') is None
+    assert middleware.choose_encoding('gzip;q=0') is None
+    assert middleware.choose_encoding('*') is not None
+
+
+def test_large_response_compressed(client):
+    # Act
+    res = client.get('/openapi.json', headers={'Accept-Encoding': 'gzip'})
+
+    # Assert
+    assert res.status_code == 200
+    assert res.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in res.headers['vary']
+    assert int(res.headers['content-length']) < len(res.content)
+    assert res.json()['paths']
+
+
+def test_small_response_not_compressed(client):
+    # Act
+    res = client.get('/api/core/users/me', headers={'Accept-Encoding': 'gzip'})
+
+    # Assert
+    assert res.status_code == 401
+    assert 'content-encoding' not in res.headers
+
+
+def test_uncompressed_without_accept_encoding(client):
+    # Act
+    res = client.get('/openapi.json', headers={'Accept-Encoding': 'identity'})
+
+    # Assert
+    assert res.status_code == 200
+    assert 'content-encoding' not in res.headers
+
+
+def test_streamed_response_compressed():
+    # Setup
+    chunks = [f'{{"row": {i}}}\n'.encode() for i in range(5000)]
+
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'application/json')]})
+        for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    middleware = CompressionMiddleware(app, flush_size=16 * 1024)
+    scope = {'type': 'http', 'method': 'GET', 'headers': [(b'accept-encoding', b'gzip')]}
+
+    # Act
+    asyncio.run(middleware(scope, None, send))
+
+    # Assert
+    headers = dict(messages[0]['headers'])
+    bodies = [message['body'] for message in messages[1:]]
+    content = b''.join(chunks)
+    assert headers[b'content-encoding'] == b'gzip'
+    assert b'content-length' not in headers
+    assert gzip.decompress(b''.join(bodies)) == content
+    assert len(bodies) <= len(content) // (16 * 1024) + 1    # Flushed once per 16 KB, not once per chunk
+    assert messages[-1]['more_body'] is False
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+from mysql.connector.errors import PoolError
+
+import sedbackend.apps.core.db as db
+import sedbackend.apps.core.db_async as db_async
+from sedbackend.apps.core.db import ConnectionPool, INTERACTIVE_POOL, JOBS_POOL
+
+
+def test_pool_rejects_when_exhausted():
+    # Setup
+    pool = ConnectionPool('test-exhausted', 1, checkout_timeout=0.1)
+
+    # Act
+    with pool.connection():
+        with pytest.raises(PoolError):
+            with pool.connection():
+                pass
+    with pool.connection() as con:
+        with con.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+    # Assert
+    stats = pool.stats()
+    assert stats.checkouts == 2
+    assert stats.waits == 1
+    assert stats.rejected == 1
+    assert stats.in_use == 0
+
+
+def test_pool_max_waiting():
+    # Setup
+    pool = ConnectionPool('test-max-waiting', 1, checkout_timeout=10, max_waiting=0)
+
+    # Act
+    with pool.connection():
+        with pytest.raises(PoolError):
+            with pool.connection():
+                pass
+
+    # Assert
+    stats = pool.stats()
+    assert stats.waits == 0     # Rejected without waiting for the timeout
+    assert stats.rejected == 1
+
+
+def test_get_pool_stats(client, admin_headers):
+    # Act
+    res = client.get('/api/core/db/pools', headers=admin_headers)
+
+    # Assert
+    assert res.status_code == 200
+    assert {pool['name'] for pool in res.json()} == {INTERACTIVE_POOL, JOBS_POOL}
+
+
+def test_get_pool_stats_not_admin(client, std_headers):
+    # Act
+    res = client.get('/api/core/db/pools', headers=std_headers)
+
+    # Assert
+    assert res.status_code == 403
+
+
+def test_read_only_falls_back_to_primary(monkeypatch):
+    # Setup
+    unreachable = db.Replica('127.0.0.1:1')
+    monkeypatch.setattr(db, 'replicas', [unreachable])
+    with db.get_connection() as con:
+        with con.cursor() as cursor:
+            cursor.execute('SELECT @@server_id')
+            primary_server_id = cursor.fetchone()[0]
+
+    # Act
+    with db.get_connection(read_only=True) as con:
+        with con.cursor() as cursor:
+            cursor.execute('SELECT @@server_id')
+            server_id = cursor.fetchone()[0]
+
+    # Assert
+    assert server_id == primary_server_id
+    assert not unreachable.healthy
+
+
+@pytest.mark.skipif(len(db.replicas) == 0, reason='No read replicas configured (MYSQL_REPLICA_HOSTS)')
+def test_read_only_uses_replica():
+    # Setup
+    with db.get_connection() as con:
+        with con.cursor() as cursor:
+            cursor.execute('SELECT @@server_id')
+            primary_server_id = cursor.fetchone()[0]
+
+    # Act
+    db.check_replicas()
+    with db.get_connection(read_only=True) as con:
+        with con.cursor() as cursor:
+            cursor.execute('SELECT @@server_id')
+            server_id = cursor.fetchone()[0]
+
+    # Assert
+    assert server_id != primary_server_id
+
+
+def test_replica_pools_per_named_pool(monkeypatch):
+    # Setup
+    unreachable = db.Replica('127.0.0.1:1')
+    monkeypatch.setattr(db, 'replicas', [unreachable])
+
+    # Act
+    stats = db.get_pool_stats()
+
+    # Assert
+    assert [pool.name for pool in stats] == [INTERACTIVE_POOL, JOBS_POOL, 'replica:127.0.0.1:1:interactive',
+                                             'replica:127.0.0.1:1:jobs']
+    assert stats[3].size == db.REPLICA_JOBS_POOL_SIZE
+
+
+@pytest.mark.skipif(len(db.replicas) == 0, reason='No read replicas configured (MYSQL_REPLICA_HOSTS)')
+def test_read_only_jobs_use_replica_jobs_pool():
+    # Setup
+    db.check_replicas()
+
+    # Act
+    with db.get_connection(JOBS_POOL, read_only=True):
+        in_use = {pool.name: pool.in_use for pool in db.get_pool_stats()}
+
+    # Assert
+    assert sum(n for name, n in in_use.items() if name.endswith(':' + JOBS_POOL)) == 1
+    assert sum(n for name, n in in_use.items() if name.endswith(':' + INTERACTIVE_POOL)) == 0
+
+
+def test_async_connection_reused():
+    async def connection_ids():
+        ids = []
+        for _ in range(2):
+            async with db_async.get_async_connection() as con:
+                row = await db_async.fetch_one(con, 'SELECT CONNECTION_ID() AS id')
+                ids.append(row['id'])
+        await db_async.close_async_pool()
+        return ids
+
+    # Act
+    first_id, second_id = asyncio.run(connection_ids())
+
+    # Assert
+    assert first_id == second_id
@@ -0,0 +1,69 @@
+from fastapi import FastAPI, Request
+from starlette.testclient import TestClient
+
+from sedbackend.libs.limits.middleware import BodySizeLimitMiddleware
+
+
+def limited_client(max_size: int) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_size=max_size)
+
+    @app.post('/echo')
+    async def echo(request: Request):
+        return {'size': len(await request.body())}
+
+    @app.post('/ignore')
+    async def ignore():
+        return {}
+
+    return TestClient(app)
+
+
+def test_body_within_limit():
+    # Setup
+    client = limited_client(100)
+
+    # Act
+    res = client.post('/echo', content=b'x' * 100)
+
+    # Assert
+    assert res.status_code == 200
+    assert res.json() == {'size': 100}
+
+
+def test_body_over_limit():
+    # Setup
+    client = limited_client(100)
+
+    # Act
+    res = client.post('/echo', content=b'x' * 101)
+
+    # Assert
+    assert res.status_code == 413
+
+
+def test_streamed_body_over_limit():
+    # Setup
+    client = limited_client(100)
+
+    def chunks():
+        for _ in range(10):
+            yield b'x' * 50
+
+    # Act
+    res = client.post('/echo', content=chunks())
+
+    # Assert
+    assert res.status_code == 413
+
+
+def test_unread_body_not_limited():
+    # Setup
+    client = limited_client(100)
+
+    # Act
+    res = client.post('/ignore', content=b'x' * 101)
+
+    # Assert
+    assert res.status_code == 200
+
@@ -0,0 +1,44 @@
+import logging
+
+import mysqlsb.builder
+import pytest
+
+import sedbackend.apps.core.db as db
+from sedbackend.libs.logs.config import ModuleLevelFilter, module_name, parse_module_levels
+
+
+def make_record(logger_name: str, pathname: str, level: int) -> logging.LogRecord:
+    return logging.LogRecord(logger_name, level, pathname, 1, 'Message', None, None)
+
+
+def test_module_name():
+    # Act, Assert
+    assert module_name(db.__file__) == 'sedbackend.apps.core.db'
+    assert module_name(mysqlsb.builder.__file__) == 'mysqlsb.builder'
+    assert module_name(mysqlsb.__file__) == 'mysqlsb'
+    assert module_name(logging.__file__) == 'logging'
+
+
+def test_parse_module_levels():
+    # Act
+    module_levels = parse_module_levels(' sedbackend.apps.cvs=debug, mysqlsb=WARNING,,no-level')
+
+    # Assert
+    assert module_levels == {'sedbackend.apps.cvs': logging.DEBUG, 'mysqlsb': logging.WARNING}
+    with pytest.raises(ValueError):
+        parse_module_levels('mysqlsb=LOUD')
+
+
+def test_module_level_filter():
+    # Setup
+    log_filter = ModuleLevelFilter(logging.INFO, parse_module_levels('sedbackend.apps=DEBUG,sedbackend.apps.core=ERROR,'
+                                                                     'mysqlsb=WARNING,uvicorn=ERROR'))
+
+    # Act, Assert
+    assert log_filter.filter(make_record('fastapi', db.__file__, logging.WARNING)) is False
+    assert log_filter.filter(make_record('fastapi', db.__file__, logging.ERROR)) is True
+    assert log_filter.filter(make_record('fastapi', mysqlsb.builder.__file__, logging.INFO)) is False
+    assert log_filter.filter(make_record('fastapi', mysqlsb.builder.__file__, logging.WARNING)) is True
+    assert log_filter.filter(make_record('uvicorn.error', logging.__file__, logging.WARNING)) is False
+    assert log_filter.filter(make_record('fastapi', logging.__file__, logging.INFO)) is True
+    assert log_filter.filter(make_record('fastapi', logging.__file__, logging.DEBUG)) is False
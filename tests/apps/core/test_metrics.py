@@ -0,0 +1,49 @@
+import sedbackend.setup as setup
+from sedbackend.apps.core.metrics import Histogram
+
+
+def test_histogram_buckets_are_cumulative():
+    # Setup
+    histogram = Histogram('test_duration_seconds', 'Test', ['route'], buckets=[0.1, 1])
+
+    # Act
+    for value in [0.05, 0.5, 0.5, 5]:
+        histogram.observe(value, route='/a')
+    lines = histogram.render()
+
+    # Assert
+    assert 'test_duration_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_duration_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'test_duration_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'test_duration_seconds_count{route="/a"} 4' in lines
+    assert 'test_duration_seconds_sum{route="/a"} 6.05' in lines
+
+
+def test_metrics_per_route_template(client, std_headers, monkeypatch):
+    # Setup
+    monkeypatch.setattr(setup, 'METRICS_TOKEN', 'metrics-token')
+
+    # Act
+    client.get("/api/core/users/me", headers=std_headers)
+    res = client.get("/metrics", headers={"Authorization": "Bearer metrics-token"})
+
+    # Assert
+    assert res.status_code == 200
+    assert res.headers['content-type'].startswith('text/plain')
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/core/users/me"}' in res.text
+    assert 'http_requests_in_progress{method="GET"}' in res.text
+    assert 'db_pool_size{pool="interactive"}' in res.text
+
+
+def test_metrics_require_token(client, monkeypatch):
+    # Act
+    monkeypatch.setattr(setup, 'METRICS_TOKEN', '')
+    res_no_token_set = client.get("/metrics")
+    monkeypatch.setattr(setup, 'METRICS_TOKEN', 'metrics-token')
+    res_no_token = client.get("/metrics")
+    res_wrong_token = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+
+    # Assert
+    assert res_no_token_set.status_code == 403
+    assert res_no_token.status_code == 401
+    assert res_wrong_token.status_code == 401
@@ -0,0 +1,66 @@
+import pytest
+
+import tests.testutils as tu
+import tests.apps.cvs.testutils as tu_cvs
+import sedbackend.apps.core.users.implementation as impl_users
+import sedbackend.apps.core.users.storage as storage_users
+from sedbackend.apps.core.db import get_connection
+from sedbackend.apps.core.query_stats import fingerprint
+
+
+def test_fingerprint():
+    # Act
+    fp1 = fingerprint("SELECT * FROM users WHERE id = 5 AND username = 'bob'")
+    fp2 = fingerprint("SELECT *  FROM users\n WHERE id = %s AND username = %s")
+    fp3 = fingerprint("SELECT * FROM users WHERE id IN (%s, %s, %s)")
+
+    # Assert
+    assert fp1 == fp2 == "SELECT * FROM users WHERE id = ? AND username = ?"
+    assert fp3 == "SELECT * FROM users WHERE id IN (...)"
+
+
+def test_query_budget_catches_repeated_queries(std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+
+    # Act, Assert
+    with pytest.raises(AssertionError):
+        with tu.query_budget(100):
+            with get_connection() as con:
+                for _ in range(20):
+                    storage_users.db_get_user_safe_with_id(con, current_user.id)
+
+
+def test_after_commit():
+    # Setup
+    called = []
+
+    # Act
+    with get_connection() as con:
+        con.after_commit(lambda: called.append('rolled back'))
+        con.rollback()
+        con.after_commit(lambda: called.append('committed'))
+        called_before_commit = list(called)
+        con.commit()
+        con.commit()
+
+    # Assert
+    assert called_before_commit == []
+    assert called == ['committed']
+
+
+def test_get_all_cvs_projects_query_budget(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    projects = [tu_cvs.seed_random_project(current_user.id) for _ in range(10)]
+
+    # Act
+    with tu.query_budget(8):
+        res = client.get("/api/cvs/project/all", headers=std_headers)
+
+    # Assert
+    assert res.status_code == 200
+
+    # Cleanup
+    for project in projects:
+        tu_cvs.delete_project_by_id(project.id, current_user.id)
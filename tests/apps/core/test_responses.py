@@ -0,0 +1,27 @@
+import json
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from sedbackend.apps.core.measurements.models import MeasurementResultData, MeasurementDataType
+from sedbackend.apps.core.responses import FastJSONResponse
+from sedbackend.apps.cvs.simulation.models import Simulation, SimulationResult
+
+
+def test_fast_json_response_same_as_default_encoding():
+    # Setup
+    content = [
+        SimulationResult(designs=[], vcss=[], vds=[], runs=[
+            Simulation(time=[0, 1.5], mean_NPV=[1, 2], max_NPVs=[3], mean_payback_time=1.5, all_npvs=[[1, 2], [3, 4]],
+                       payback_time=2, surplus_value_end_result=0.1, design_id=1, vcs_id=2)]),
+        MeasurementResultData(id=1, measurement_id=2, value='x', type=list(MeasurementDataType)[0],
+                              insert_timestamp=datetime(2023, 5, 1, 12, 30), measurement_timestamp=None,
+                              individual_id=None)
+    ]
+
+    # Act
+    res = FastJSONResponse(content)
+
+    # Assert
+    assert json.loads(res.body) == jsonable_encoder(content)
+    assert res.media_type == 'application/json'
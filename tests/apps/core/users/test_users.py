@@ -83,6 +83,21 @@ def test_delete_user(client, std_headers):
     users_impl.impl_delete_user_from_db(new_user.id)
 
 
+def test_deleted_user_token_rejected(client):
+    # Setup
+    user = tu_users.random_user_post(admin=False, disabled=False)
+    new_user = users_impl.impl_post_user(user)
+    res = client.post('/api/core/auth/token', data={"username": user.username, "password": user.password})
+    headers = {"Authorization": f'Bearer {res.json()["access_token"]}'}
+    res_before = client.get('/api/core/users/me', headers=headers)
+    # Act
+    users_impl.impl_delete_user_from_db(new_user.id)
+    res_after = client.get('/api/core/users/me', headers=headers)
+    # Assert
+    assert res_before.status_code == 200
+    assert res_after.status_code == 401
+
+
 def test_get_user_as_admin(client, admin_headers):
     # Setup
     user = tu_users.random_user_post(admin=False, disabled=False)
@@ -2,9 +2,11 @@ import tests.testutils as testutils
 import tests.apps.cvs.testutils as tu
 import sedbackend.apps.core.users.implementation as impl_users
 from sedbackend.apps.cvs.vcs import implementation as impl_vcs, models as vcs_model
+from sedbackend.apps.core.db import get_connection
 from sedbackend.apps.cvs.link_design_lifecycle import (
     implementation as impl_connect,
     models as connect_model,
+    storage as storage_connect,
 )
 from sedbackend.apps.cvs.market_input import (
     implementation as impl_market_input,
@@ -760,3 +762,37 @@ def test_get_all_formulas_name_change(client, std_headers, std_user):
     tu.delete_VCS_with_ids(current_user.id, project.id, [vcs.id])
     tu.delete_project_by_id(project.id, current_user.id)
     tu.delete_vd_from_user(current_user.id)
+
+
+def test_formula_identifier_names(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vd = tu.seed_random_value_driver(current_user.id, project.id)
+    ef = tu.seed_random_external_factor(project.id)
+    missing_id = 2147483647
+    text = f'2*{{vd:{vd.id},"old"}}+{{ef:{ef.id},"old"}}+{{vd:{missing_id},"old"}}'
+    latex = f'2\\cdot\\class{{vd}}{{\\identifier{{vd:{vd.id}}}{{\\text{{old}}}}}}' \
+            f'+\\class{{ef}}{{\\identifier{{ef:{ef.id}}}{{\\text{{old}}}}}}'
+
+    # Act
+    vd_ids, ef_ids = storage_connect.find_formula_identifiers([text, latex])
+    with get_connection() as con:
+        with testutils.query_budget(2):     # One query per kind of identifier, however many there are
+            identifier_names = storage_connect.get_formula_identifier_names(con, vd_ids, ef_ids)
+    formula = storage_connect.populate_formula(identifier_names, text=text, latex=latex, comment='comment')
+
+    # Assert
+    vd_name = f'{vd.name} [{vd.unit if vd.unit else "N/A"}]'
+    ef_name = f'{ef.name} [{ef.unit if ef.unit else "N/A"}]'
+    assert vd_ids == {vd.id, missing_id}
+    assert ef_ids == {ef.id}
+    assert formula.text == f'2*{{vd:{vd.id},"{vd_name}"}}+{{ef:{ef.id},"{ef_name}"}}' \
+                           f'+{{vd:{missing_id},"UNDEFINED [N/A]"}}'
+    assert formula.latex == f'2\\cdot\\class{{vd}}{{\\identifier{{vd:{vd.id}}}{{\\text{{{vd_name}}}}}}}' \
+                            f'+\\class{{ef}}{{\\identifier{{ef:{ef.id}}}{{\\text{{{ef_name}}}}}}}'
+    assert formula.comment == 'comment'
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
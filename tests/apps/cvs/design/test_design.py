@@ -1,8 +1,12 @@
 import random
 
 import tests.apps.cvs.testutils as tu
+import tests.testutils as testutils
 import sedbackend.apps.core.users.implementation as impl_users
 import sedbackend.apps.cvs.design.implementation as impl_design
+import sedbackend.apps.cvs.design.models as models_design
+import sedbackend.apps.cvs.design.storage as storage_design
+from sedbackend.apps.core.db import get_connection
 
 
 def test_create_design(client, std_headers, std_user):
@@ -168,3 +172,217 @@ def test_get_all_designs(client, std_headers, std_user):
     # Cleanup
     tu.delete_project_by_id(project.id, current_user.id)
     tu.delete_vd_from_user(current_user.id)
+
+
+def test_get_all_designs_with_and_without_values(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    tu.seed_vcs_table_rows(current_user.id, project.id, vcs.id, 3)  # To get value drivers to vcs
+    design_group = tu.seed_random_design_group(project.id, None, vcs.id)
+    other_design_group = tu.seed_random_design_group(project.id)
+    impl_design.edit_designs(project.id, design_group.id, [
+        tu.random_design([vd.id for vd in design_group.vds]),
+        tu.random_design(),
+        tu.random_design([vd.id for vd in design_group.vds]),
+    ])
+    tu.seed_random_designs(project.id, other_design_group.id, 2)
+
+    # Act
+    with get_connection() as con:
+        with testutils.query_budget(1):     # The designs and their values are joined, not fetched per design
+            designs = storage_design.get_all_designs(con, [design_group.id, other_design_group.id])
+
+    # Assert
+    assert len(designs) == 5
+    assert len({design.id for design in designs}) == 5
+    assert [design.id for design in designs] == sorted(design.id for design in designs)
+    assert [len(design.vd_design_values) for design in designs[:3]] == [len(design_group.vds), 0, len(design_group.vds)]
+    assert all(design.vd_design_values == [] for design in designs[3:])
+    assert [design.design_group_id for design in designs] == [design_group.id] * 3 + [other_design_group.id] * 2
+    assert designs[:3] == impl_design.get_designs(project.id, design_group.id)
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_get_all_designs_same_as_sync(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    tu.seed_vcs_table_rows(current_user.id, project.id, vcs.id, 5)  # To get value drivers to vcs
+    design_group = tu.seed_random_design_group(project.id, None, vcs.id)
+    impl_design.edit_designs(project.id, design_group.id, [
+        models_design.DesignPut(name=f'design {i}', vd_design_values=[
+            models_design.ValueDriverDesignValue(vd_id=vd.id, value=str(round(random.random()*10, 4)))
+            for vd in design_group.vds
+        ]) for i in range(5)
+    ])
+    other_project = tu.seed_random_project(current_user.id)
+    # Act
+    res = client.get(f'/api/cvs/project/{project.id}/design-group/{design_group.id}/design/all', headers=std_headers)
+    res_other = client.get(f'/api/cvs/project/{other_project.id}/design-group/{design_group.id}/design/all',
+                           headers=std_headers)
+
+    # Assert
+    assert res.status_code == 200  # 200 OK
+    designs = impl_design.get_designs(project.id, design_group.id)
+    assert res.json() == [design.dict() for design in designs]
+    assert res_other.status_code == 400  # 400 Bad Request
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_project_by_id(other_project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_edit_designs_bulk(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    tu.seed_vcs_table_rows(current_user.id, project.id, vcs.id, 5)  # To get value drivers to vcs
+    design_group = tu.seed_random_design_group(project.id, None, vcs.id)
+    designs = tu.seed_random_designs(project.id, design_group.id, 10)
+    kept_designs = designs[:5]
+    # Act
+    res = client.put(f'/api/cvs/project/{project.id}/design-group/{design_group.id}/designs', headers=std_headers,
+                     json=[{
+                         'id': design.id,
+                         'name': f'kept design {i}',
+                         'vd_design_values': [
+                             {'vd_id': vd.id, 'value': i} for vd in design_group.vds
+                         ]
+                     } for i, design in enumerate(kept_designs)] + [{
+                         'name': f'new design {i}',
+                         'vd_design_values': [
+                             {'vd_id': vd.id, 'value': i} for vd in design_group.vds
+                         ]
+                     } for i in range(20)])
+
+    # Assert
+    assert res.status_code == 200  # 200 OK
+    designs = impl_design.get_designs(project.id, design_group.id)
+    assert len(designs) == 25
+    assert [d.id for d in designs[:5]] == [d.id for d in kept_designs]
+    assert [d.name for d in designs] == [f'kept design {i}' for i in range(5)] + \
+           [f'new design {i}' for i in range(20)]
+    for design in designs:
+        assert len(design.vd_design_values) == len(design_group.vds)
+        assert all(float(val.value) == float(design.name.split(' ')[-1]) for val in design.vd_design_values)
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_import_designs_csv(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    tu.seed_vcs_table_rows(current_user.id, project.id, vcs.id, 5)  # To get value drivers to vcs
+    design_group = tu.seed_random_design_group(project.id, None, vcs.id)
+    header = ['name'] + [str(vd.id) for vd in design_group.vds]
+    lines = [','.join(header)] + \
+            [','.join([f'design {i}'] + [str(round(random.random()*10, 4)) for _ in design_group.vds])
+             for i in range(50)] + \
+            [','.join([''] + ['1' for _ in design_group.vds])]  # Missing name
+    _file = {'file': ('designs.csv', '\n'.join(lines).encode(), 'text/csv')}
+    # Act
+    res = client.post(f'/api/cvs/project/{project.id}/design-group/{design_group.id}/designs/import',
+                      headers=std_headers,
+                      files=_file)
+
+    # Assert
+    assert res.status_code == 200  # 200 OK
+    assert res.json()['imported'] == 50
+    assert res.json()['failed'] == 1
+    assert res.json()['errors'][0]['row'] == 52
+    designs = impl_design.get_designs(project.id, design_group.id)
+    assert len(designs) == 50
+    assert all(len(design.vd_design_values) == len(design_group.vds) for design in designs)
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_import_designs_unknown_column(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    design_group = tu.seed_random_design_group(project.id, None, vcs.id)
+    _file = {'file': ('designs.csv', b'name,not a value driver\ndesign,1', 'text/csv')}
+    # Act
+    res = client.post(f'/api/cvs/project/{project.id}/design-group/{design_group.id}/designs/import',
+                      headers=std_headers,
+                      files=_file)
+
+    # Assert
+    assert res.status_code == 400  # 400 Bad Request
+    assert len(impl_design.get_designs(project.id, design_group.id)) == 0
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_import_designs_no_name_column(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    tu.seed_vcs_table_rows(current_user.id, project.id, vcs.id, 5)  # To get value drivers to vcs
+    design_group = tu.seed_random_design_group(project.id, None, vcs.id)
+    header = [str(vd.id) for vd in design_group.vds]
+    lines = [','.join(header), ','.join(['1' for _ in design_group.vds])]
+    _file = {'file': ('designs.csv', '\n'.join(lines).encode(), 'text/csv')}
+    # Act
+    res = client.post(f'/api/cvs/project/{project.id}/design-group/{design_group.id}/designs/import',
+                      headers=std_headers,
+                      files=_file)
+
+    # Assert
+    assert res.status_code == 400  # 400 Bad Request
+    assert 'name column' in res.json()['detail']
+    assert len(impl_design.get_designs(project.id, design_group.id)) == 0
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_import_designs_invalid_file(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    design_group = tu.seed_random_design_group(project.id, None, vcs.id)
+    not_utf8 = {'file': ('designs.csv', 'name\ndesign \xe9'.encode('latin-1'), 'text/csv')}
+    not_excel = {'file': ('designs.xlsx', b'Not a workbook', 'application/octet-stream')}
+    unsupported = {'file': ('designs.ods', b'Not supported', 'application/octet-stream')}
+    # Act
+    res_csv = client.post(f'/api/cvs/project/{project.id}/design-group/{design_group.id}/designs/import',
+                          headers=std_headers,
+                          files=not_utf8)
+    res_excel = client.post(f'/api/cvs/project/{project.id}/design-group/{design_group.id}/designs/import',
+                            headers=std_headers,
+                            files=not_excel)
+    res_unsupported = client.post(f'/api/cvs/project/{project.id}/design-group/{design_group.id}/designs/import',
+                                  headers=std_headers,
+                                  files=unsupported)
+
+    # Assert
+    assert res_csv.status_code == 400  # 400 Bad Request
+    assert res_excel.status_code == 400  # 400 Bad Request
+    assert res_unsupported.status_code == 415  # 415 Unsupported Media Type
+    assert len(impl_design.get_designs(project.id, design_group.id)) == 0
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
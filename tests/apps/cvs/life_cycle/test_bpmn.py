@@ -1,4 +1,8 @@
 import pytest
+import tests.apps.cvs.testutils as tu
+import sedbackend.apps.core.users.implementation as impl_users
+import sedbackend.apps.cvs.life_cycle.implementation as impl_life_cycle
+
 
 def test_create_bpmn_node(client, std_headers, std_user):
     pass
@@ -9,4 +13,52 @@ def test_get_bpmn(client, std_headers, std_user):
    
 
 def test_edit_bpmn(client, std_headers, std_user):
-    pass
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    tu.seed_vcs_table_rows(current_user.id, project.id, vcs.id, 4)
+    bpmn = impl_life_cycle.get_bpmn(project.id, vcs.id, current_user.id)
+
+    nodes = [node.dict() for node in bpmn.nodes]
+    nodes[0]['pos_x'] += 10
+    nodes[1]['pos_y'] += 20
+
+    # Act
+    res = client.put(f'/api/cvs/project/{project.id}/vcs/{vcs.id}/bpmn',
+                     headers=std_headers,
+                     json={'nodes': nodes})
+
+    # Assert
+    assert res.status_code == 200
+    updated_bpmn = impl_life_cycle.get_bpmn(project.id, vcs.id, current_user.id)
+    for node, updated_node in zip(nodes, updated_bpmn.nodes):
+        assert updated_node.id == node['id']
+        assert updated_node.pos_x == node['pos_x']
+        assert updated_node.pos_y == node['pos_y']
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_edit_bpmn_node_not_in_vcs(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    other_vcs = tu.seed_random_vcs(project.id, current_user.id)
+    tu.seed_vcs_table_rows(current_user.id, project.id, other_vcs.id, 2)
+    other_bpmn = impl_life_cycle.get_bpmn(project.id, other_vcs.id, current_user.id)
+
+    # Act
+    res = client.put(f'/api/cvs/project/{project.id}/vcs/{vcs.id}/bpmn',
+                     headers=std_headers,
+                     json={'nodes': [node.dict() for node in other_bpmn.nodes]})
+
+    # Assert
+    assert res.status_code == 400
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
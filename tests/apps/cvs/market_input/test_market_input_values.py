@@ -139,3 +139,142 @@ def test_get_market_input_values(client, std_headers, std_user):
     # Cleanup
     tu.delete_project_by_id(project.id, current_user.id)
     tu.delete_vd_from_user(current_user.id)
+
+
+def test_edit_external_factor_values_mixed(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs1 = tu.seed_random_vcs(project.id, current_user.id)
+    vcs2 = tu.seed_random_vcs(project.id, current_user.id)
+    kept = tu.seed_random_external_factor(project.id)
+    removed = tu.seed_random_external_factor(project.id)
+    tu.seed_random_external_factor_values(project.id, vcs1.id, kept.id)
+    tu.seed_random_external_factor_values(project.id, vcs2.id, kept.id)
+    tu.seed_random_external_factor_values(project.id, vcs1.id, removed.id)
+    new_value = random.random() * 100
+    # Act
+    res = client.put(f'/api/cvs/project/{project.id}/market-input-values', headers=std_headers, json=[
+        {
+            'id': kept.id,
+            'name': 'renamed',
+            'unit': kept.unit,
+            'external_factor_values': [
+                {'vcs_id': vcs2.id, 'value': new_value}
+            ]
+        },
+        {
+            'id': -1,
+            'name': 'new',
+            'unit': 'unit',
+            'external_factor_values': [
+                {'vcs_id': vcs1.id, 'value': 1},
+                {'vcs_id': vcs2.id, 'value': 2}
+            ]
+        }
+    ])
+    # Assert
+    efvs = impl_market_input.get_all_external_factor_values(project.id)
+    assert res.status_code == 200  # 200 OK
+    assert len(efvs) == 2
+    kept_efv = next(efv for efv in efvs if efv.id == kept.id)
+    new_efv = next(efv for efv in efvs if efv.id != kept.id)
+    assert kept_efv.name == 'renamed'
+    assert len(kept_efv.external_factor_values) == 1
+    assert kept_efv.external_factor_values[0].vcs_id == vcs2.id
+    assert abs(kept_efv.external_factor_values[0].value - new_value) < 0.0001
+    assert new_efv.name == 'new'
+    assert {pair.vcs_id: pair.value for pair in new_efv.external_factor_values} == {vcs1.id: 1, vcs2.id: 2}
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_import_market_input_values_csv(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs1 = tu.seed_random_vcs(project.id, current_user.id)
+    vcs2 = tu.seed_random_vcs(project.id, current_user.id)
+    external_factor = tu.seed_random_external_factor(project.id)
+    lines = [f'id,{external_factor.id}', f'{vcs1.id},1.5', f'{vcs2.id},2.5', f'{vcs2.id + 1000},3']
+    _file = {'file': ('values.csv', '\n'.join(lines).encode(), 'text/csv')}
+    # Act
+    res = client.post(f'/api/cvs/project/{project.id}/market-input-values/import', headers=std_headers,
+                      files=_file)
+    # Assert
+    assert res.status_code == 200  # 200 OK
+    assert res.json()['imported'] == 2
+    assert res.json()['failed'] == 1
+    assert res.json()['errors'][0]['row'] == 4
+    efvs = impl_market_input.get_all_external_factor_values(project.id)
+    assert {pair.vcs_id: pair.value for pair in efvs[0].external_factor_values} == {vcs1.id: 1.5, vcs2.id: 2.5}
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_import_market_input_values_not_finite(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    external_factor = tu.seed_random_external_factor(project.id)
+    lines = [f'id,{external_factor.id}', f'{vcs.id},nan', f'{vcs.id},inf', 'inf,1', f'{vcs.id},4']
+    _file = {'file': ('values.csv', '\n'.join(lines).encode(), 'text/csv')}
+    # Act
+    res = client.post(f'/api/cvs/project/{project.id}/market-input-values/import', headers=std_headers,
+                      files=_file)
+    # Assert
+    assert res.status_code == 200  # 200 OK
+    assert res.json()['imported'] == 1
+    assert res.json()['failed'] == 3
+    assert [error['row'] for error in res.json()['errors']] == [2, 3, 4]
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_import_market_input_values_invalid_file(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    external_factor = tu.seed_random_external_factor(project.id)
+    not_utf8 = {'file': ('values.csv', f'id,{external_factor.id}\n1,\xe9'.encode('latin-1'), 'text/csv')}
+    not_excel = {'file': ('values.xlsx', b'Not a workbook', 'application/octet-stream')}
+    # Act
+    res_csv = client.post(f'/api/cvs/project/{project.id}/market-input-values/import', headers=std_headers,
+                          files=not_utf8)
+    res_excel = client.post(f'/api/cvs/project/{project.id}/market-input-values/import', headers=std_headers,
+                            files=not_excel)
+    # Assert
+    assert res_csv.status_code == 400  # 400 Bad request
+    assert res_excel.status_code == 400  # 400 Bad request
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
+
+
+def test_export_market_input_values(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    external_factor = tu.seed_random_external_factor(project.id)
+    efv = tu.seed_random_external_factor_values(project.id, vcs.id, external_factor.id)[0]
+    # Act
+    res = client.get(f'/api/cvs/project/{project.id}/market-input-values/export', headers=std_headers)
+    # Assert
+    lines = res.text.splitlines()
+    assert res.status_code == 200  # 200 OK
+    assert lines[0] == f'id,vcs,{external_factor.name} [{external_factor.unit}]'
+    assert lines[1].startswith(f'{vcs.id},')
+    assert abs(float(lines[1].split(',')[-1]) - efv.external_factor_values[0].value) < 0.0001
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
@@ -10,6 +10,10 @@ import tests.apps.cvs.testutils as tu
 import tests.testutils as testutils
 import sedbackend.apps.core.users.implementation as impl_users
 import sedbackend.apps.core.users.models as models_users
+import sedbackend.apps.core.projects.implementation as impl_projects
+import sedbackend.apps.core.projects.models as models_projects
+import sedbackend.apps.core.projects.storage as storage_projects
+from sedbackend.apps.core.db import get_connection
 
 
 def test_create_cvs_project(client, admin_headers):
@@ -260,6 +264,33 @@ def test_get_all_cvs_projects(client, std_headers, std_user):
     tu.delete_project_by_id(proj3.id, current_user.id)
 
 
+def test_get_all_cvs_projects_paginated(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    projects = [tu.seed_random_project(current_user.id) for _ in range(3)]
+
+    # Act
+    res1 = client.get(f"/api/cvs/project/all", headers=std_headers,
+                      params={"limit": 2, "after_id": projects[0].id - 1})
+    res2 = client.get(f"/api/cvs/project/all", headers=std_headers,
+                      params={"limit": 2, "after_id": res1.json()["chunk"][-1]["id"]})
+    res_desc = client.get(f"/api/cvs/project/all", headers=std_headers,
+                          params={"limit": 1, "order_by": "datetime_created", "order_direction": "desc"})
+    res_bad = client.get(f"/api/cvs/project/all", headers=std_headers, params={"order_by": "owner_id"})
+
+    # Assert
+    assert res1.status_code == 200
+    assert [p["id"] for p in res1.json()["chunk"]] == [projects[0].id, projects[1].id]
+    assert res1.json()["length_total"] >= 3
+    assert [p["id"] for p in res2.json()["chunk"]] == [projects[2].id]
+    assert res_desc.json()["chunk"][0]["id"] == projects[2].id
+    assert res_bad.status_code == 400
+
+    # Cleanup
+    for project in projects:
+        tu.delete_project_by_id(project.id, current_user.id)
+
+
 def test_create_project_participants(client, std_headers, std_user):
     # Setup
     current_user = impl_users.impl_get_user_with_username(std_user.username)
@@ -440,3 +471,102 @@ def test_update_project_participant(client, std_headers, std_user):
     # Cleanup
     tu.delete_project_by_id(cvs_project["id"], current_user.id)
     impl_users.impl_delete_user_from_db(participant.id)
+
+
+def test_project_access_cache_invalidated_on_participant_change(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    participant = impl_users.impl_post_user(
+        models_users.UserPost(
+            username=testutils.random_str(10, 20),
+            password=testutils.random_str(10, 20),
+            email=testutils.random_str(10, 20),
+            full_name="Test User",
+        ),
+    )
+    project = tu.seed_random_project(current_user.id)
+
+    # Act
+    impl_projects.impl_post_participant(project.project.id, participant.id, models_projects.AccessLevel.READONLY)
+    access_added = impl_projects.impl_get_subproject_native_access(participant.id, "MOD.CVS", project.id)
+    impl_projects.impl_delete_participant(project.project.id, participant.id)
+    access_removed = impl_projects.impl_get_subproject_native_access(participant.id, "MOD.CVS", project.id)
+
+    # Assert
+    assert access_added.access_level == models_projects.AccessLevel.READONLY
+    assert access_removed.access_level is None
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    impl_users.impl_delete_user_from_db(participant.id)
+
+
+def test_project_access_cache_invalidated_after_commit(client, std_headers, std_user, monkeypatch):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    participant = impl_users.impl_post_user(
+        models_users.UserPost(
+            username=testutils.random_str(10, 20),
+            password=testutils.random_str(10, 20),
+            email=testutils.random_str(10, 20),
+            full_name="Test User",
+        ),
+    )
+    project = tu.seed_random_project(current_user.id)
+    invalidate_access_cache = storage_projects.invalidate_access_cache
+    seen_by_others = []
+
+    def invalidate_and_check():
+        # What another request would cache at this point, read on a connection of its own
+        with get_connection() as con:
+            seen_by_others.append(
+                storage_projects.db_get_subproject_native_access(con, participant.id, "MOD.CVS", project.id))
+        invalidate_access_cache()
+
+    monkeypatch.setattr(storage_projects, "invalidate_access_cache", invalidate_and_check)
+
+    # Act
+    impl_projects.impl_post_participant(project.project.id, participant.id, models_projects.AccessLevel.READONLY)
+
+    # Assert
+    assert len(seen_by_others) == 1
+    assert seen_by_others[0].access_level == models_projects.AccessLevel.READONLY
+
+    # Cleanup
+    monkeypatch.undo()
+    tu.delete_project_by_id(project.id, current_user.id)
+    impl_users.impl_delete_user_from_db(participant.id)
+
+
+def test_project_access_cache_invalidated_on_project_edit(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    participant = impl_users.impl_post_user(
+        models_users.UserPost(
+            username=testutils.random_str(10, 20),
+            password=testutils.random_str(10, 20),
+            email=testutils.random_str(10, 20),
+            full_name="Test User",
+        ),
+    )
+    project = tu.seed_random_project(current_user.id)
+    impl_projects.impl_post_participant(project.project.id, participant.id, models_projects.AccessLevel.READONLY)
+    access_before = impl_projects.impl_get_subproject_native_access(participant.id, "MOD.CVS", project.id)
+
+    # Act
+    res = client.put(
+        f"/api/cvs/project/{project.id}",
+        headers=std_headers,
+        json={"name": project.name, "description": project.description, "currency": project.currency,
+              "participants_access": {}},
+    )
+    access_after = impl_projects.impl_get_subproject_native_access(participant.id, "MOD.CVS", project.id)
+
+    # Assert
+    assert res.status_code == 200
+    assert access_before.access_level == models_projects.AccessLevel.READONLY
+    assert access_after.access_level is None
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    impl_users.impl_delete_user_from_db(participant.id)
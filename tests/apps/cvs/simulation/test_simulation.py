@@ -1,6 +1,11 @@
 import tests.apps.cvs.testutils as tu
+import tests.testutils as testutils
 import testutils as sim_tu
 import sedbackend.apps.core.users.implementation as impl_users
+import sedbackend.apps.cvs.design.implementation as impl_design
+import sedbackend.apps.cvs.design.storage as storage_design
+import sedbackend.apps.cvs.simulation.storage as storage_sim
+from sedbackend.apps.core.db import get_connection
 
 
 def test_run_single_simulation(client, std_headers, std_user):
@@ -348,3 +353,113 @@ def test_run_single_simulation_no_values(client, std_headers, std_user):
     tu.delete_design_group(project.id, design_group.id)
     tu.delete_VCS_with_ids(current_user.id, project.id, [vcs.id])
     tu.delete_project_by_id(project.id, current_user.id)
+
+
+def test_get_simulation_file_precompressed(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project, vcs, design_group, design, settings = sim_tu.setup_single_simulation(
+        current_user.id
+    )
+    settings.monte_carlo = False
+    saveSim = client.post(
+        f"/api/cvs/project/{project.id}/simulation/run",
+        headers=std_headers,
+        json={
+            "sim_settings": settings.dict(),
+            "vcs_ids": [vcs.id],
+            "design_group_ids": [design_group.id],
+        },
+    )
+
+    # Act
+    res_gzip = client.get(
+        f"/api/cvs/project/{project.id}/simulation/file/{saveSim.json()['file']}",
+        headers={**std_headers, "Accept-Encoding": "gzip"}
+    )
+    res_identity = client.get(
+        f"/api/cvs/project/{project.id}/simulation/file/{saveSim.json()['file']}",
+        headers={**std_headers, "Accept-Encoding": "identity"}
+    )
+
+    # Assert
+    assert saveSim.status_code == 200
+    assert res_gzip.status_code == 200
+    assert res_gzip.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in res_identity.headers
+    assert res_gzip.json() == res_identity.json()
+
+    # Cleanup
+    tu.delete_design_group(project.id, design_group.id)
+    tu.delete_VCS_with_ids(current_user.id, project.id, [vcs.id])
+    tu.delete_project_by_id(project.id, current_user.id)
+
+
+def test_remove_simulation_file(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project, vcs, design_group, design, settings = sim_tu.setup_single_simulation(
+        current_user.id
+    )
+    settings.monte_carlo = False
+    saveSim = client.post(
+        f"/api/cvs/project/{project.id}/simulation/run",
+        headers=std_headers,
+        json={
+            "sim_settings": settings.dict(),
+            "vcs_ids": [vcs.id],
+            "design_group_ids": [design_group.id],
+        },
+    )
+    file_id = saveSim.json()['file']
+
+    # Act
+    res = client.delete(
+        f"/api/cvs/project/{project.id}/simulation/file/{file_id}",
+        headers=std_headers
+    )
+    res_get = client.get(
+        f"/api/cvs/project/{project.id}/simulation/file/{file_id}",
+        headers=std_headers
+    )
+
+    # Assert
+    assert res.status_code == 200
+    assert res_get.status_code == 404   # The file is deleted, not only its simulation entry
+
+    # Cleanup
+    tu.delete_design_group(project.id, design_group.id)
+    tu.delete_VCS_with_ids(current_user.id, project.id, [vcs.id])
+    tu.delete_project_by_id(project.id, current_user.id)
+
+
+def test_vd_design_values_from_loaded_designs(client, std_headers, std_user):
+    # Setup
+    current_user = impl_users.impl_get_user_with_username(std_user.username)
+    project = tu.seed_random_project(current_user.id)
+    vcs = tu.seed_random_vcs(project.id, current_user.id)
+    tu.seed_vcs_table_rows(current_user.id, project.id, vcs.id, 3)  # To get value drivers to vcs
+    design_group = tu.seed_random_design_group(project.id, None, vcs.id)
+    impl_design.edit_designs(project.id, design_group.id, [
+        tu.random_design([vd.id for vd in design_group.vds]),
+        tu.random_design(),
+    ])
+
+    # Act
+    with get_connection() as con:
+        designs = storage_design.get_all_designs(con, [design_group.id])
+        designs[0].vd_design_values[0].value = 'loaded'     # Only in memory, so it shows where the values come from
+        with testutils.query_budget(1):     # Only the value drivers are queried, not the design values
+            vd_design_values = storage_sim.get_all_vd_design_values(con, designs)
+        with testutils.query_budget(0):
+            no_vd_design_values = storage_sim.get_all_vd_design_values(con, designs[1:])
+
+    # Assert
+    assert {(vd['design'], vd['id']) for vd in vd_design_values} == \
+           {(designs[0].id, value.vd_id) for value in designs[0].vd_design_values}
+    assert {vd['value'] for vd in vd_design_values if vd['id'] == designs[0].vd_design_values[0].vd_id} == {'loaded'}
+    assert no_vd_design_values == []
+
+    # Cleanup
+    tu.delete_project_by_id(project.id, current_user.id)
+    tu.delete_vd_from_user(current_user.id)
@@ -1,7 +1,25 @@
 import random
+from contextlib import contextmanager
+
+from sedbackend.apps.core.query_stats import capture_queries, N_PLUS_ONE_THRESHOLD
 
 
 def random_str(min_length, max_length):
     alphabet = "abcdefghijklmnopqrstuvwxyz"
     numbers = "0123456789"
     return ''.join(random.choice(alphabet + numbers) for _ in range(random.randint(min_length, max_length)))
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: int = N_PLUS_ONE_THRESHOLD - 1):
+    """
+    Fails if the block executes more than max_queries database queries, or any statement more than max_repeats times.
+    Catches N+1 queries and other regressions in the number of queries an endpoint needs.
+    """
+    with capture_queries() as stats:
+        yield stats
+
+    repeated = ', '.join(f'{n}x "{fp}"' for fp, n in stats.repeated(max_repeats + 1))
+    assert stats.count <= max_queries, f'Executed {stats.count} queries, the budget is {max_queries}. ' \
+                                       f'Repeated statements: {repeated or "none"}'
+    assert not repeated, f'Statements executed more than {max_repeats} times: {repeated}'